@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'boards.metrics.RequestMetricsMiddleware',
+    'boards.compression.CompressionMiddleware',
+    'boards.routers.ReplicaPinningMiddleware',
+    'boards.sharding.ProjectShardMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,11 +85,54 @@ WSGI_APPLICATION = 'Trello.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'boards.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
+# DJANGO_DB_PROFILE=production tunes the default database for a server taking concurrent requests. Left off
+# for development and tests: WAL persists in the database file and keeps -wal/-shm files next to it.
+DATABASE_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default']['OPTIONS'].update({
+        # Writers take the lock when their transaction begins and queue on the busy timeout.
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {
+            # Readers no longer block the writer; WAL persists in the database file.
+            'journal_mode': 'WAL',
+            # Safe with WAL: a power loss can only drop the last commits, not corrupt the file.
+            'synchronous': 'NORMAL',
+            'busy_timeout': 20000,
+            'cache_size': -65536,    # 64 MiB page cache per connection.
+            'mmap_size': 268435456,  # 256 MiB memory-mapped reads.
+            'temp_store': 'MEMORY',
+        },
+    })
+    # Keep connections open between requests; health checks drop ones that went bad. Not under ASGI
+    # (Trello.asgi sets ASYNC_READ_VIEWS), where each request's queries run in a new thread whose
+    # connection would never be reused or closed.
+    DATABASES['default']['CONN_MAX_AGE'] = 0 if os.environ.get('ASYNC_READ_VIEWS') == '1' else 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas of 'default': add each to DATABASES (with 'TEST': {'MIRROR': 'default'}) and list its alias
+# here. Reads are spread over them; after a write the client reads from the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5
+
+# Aliases in DATABASES that store projects with their boards, tasks and memberships; new projects are spread
+# over them by id, users and profiles stay in 'default'. Give shards other than 'default' the pragma
+# 'foreign_keys': 'OFF' and migrate each with `migrate --database <alias>`.
+PROJECT_SHARDS = ['default']
+# Seconds a process trusts its cached copy of a project's shard; move_project waits this long before switching.
+PROJECT_SHARD_DIRECTORY_TTL = 30
+# Row ids on the n-th shard start at n * PROJECT_SHARD_ID_BLOCK, so rows keep their ids when a project moves.
+PROJECT_SHARD_ID_BLOCK = 10 ** 12
+
+DATABASE_ROUTERS = ['boards.sharding.ProjectShardRouter', 'boards.routers.ReadWriteRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -132,8 +180,13 @@ MEDIA_ROOT = BASE_DIR / 'uploads'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication',],
-    # 'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',),
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication',
+                                       'boards.tokens.CachedJWTAuthentication',],
+    'DEFAULT_RENDERER_CLASSES': ['boards.renderers.FastJSONRenderer',
+                                 'rest_framework.renderers.BrowsableAPIRenderer',],
+    'DEFAULT_PARSER_CLASSES': ['boards.renderers.FastJSONParser',
+                               'rest_framework.parsers.FormParser',
+                               'rest_framework.parsers.MultiPartParser',],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
@@ -142,7 +195,40 @@ REST_FRAMEWORK = {
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=2),}
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=2),
+    "TOKEN_OBTAIN_SERIALIZER": "boards.tokens.ProjectTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "boards.tokens.ProjectTokenRefreshSerializer",}
+
+# Shared by the server's worker processes: token revocations (see boards.tokens) must reach all of them. Use a
+# Redis or Memcached backend when the workers run on more than one host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / '.cache'),
+    }
+}
+# Tests keep the file cache, which claims need, but in a temporary directory.
+TEST_RUNNER = 'Trello.test_runner.TemporaryCacheRunner'
+
+# Access tokens embed the user's {project id: access level} (up to JWT_PROJECT_CLAIMS_MAX
+# projects) so token-authenticated requests skip membership queries; users are cached
+# per process for JWT_PRINCIPAL_CACHE_TTL seconds.
+JWT_PROJECT_CLAIMS = True
+JWT_PROJECT_CLAIMS_MAX = 200
+JWT_PRINCIPAL_CACHE_TTL = 60
+
+# Serve GET on the board, task and member views with async handlers. Trello.asgi turns this on; under WSGI
+# every async view would need an event loop of its own.
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+
+# Encode and parse API JSON with orjson when it is installed.
+FAST_JSON = True
+
+# Responses of at least COMPRESSION_MIN_SIZE bytes are sent with gzip, or with brotli when the brotli package
+# is installed and the client accepts it.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
 
 
 SPECTACULAR_SETTINGS = {
@@ -151,4 +237,34 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     # OTHER SETTINGS
-}
\ No newline at end of file
+}
+
+# How long change-feed entries are kept before compact_changes may drop them.
+CHANGE_LOG_RETENTION = timedelta(days=7)
+
+# Pub/sub backend behind the project event stream; swap for a broker-backed class to fan out across processes.
+REALTIME_BROKER = 'boards.realtime.InProcessBroker'
+
+# Task/board ranks longer than this are rewritten by a background rebalance.
+RANK_REBALANCE_LENGTH = 24
+
+# Square WebP thumbnails rendered from profile images, keyed by size name (edge in pixels).
+PROFILE_THUMBNAIL_SIZES = {'small': 48, 'medium': 128, 'large': 256}
+PROFILE_IMAGE_WORKERS = 2
+
+# Per-route request metrics served at /metrics. Point METRICS_MULTIPROCESS_DIR at a directory shared by the
+# worker processes of one server to aggregate across them; files not flushed for METRICS_STALE_AFTER seconds
+# belong to exited workers and are removed. Outside DEBUG, /metrics is only served with METRICS_TOKEN set and
+# sent as a bearer token.
+METRICS_MULTIPROCESS_DIR = None
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_STALE_AFTER = 60
+METRICS_TOKEN = None
+
+# Reminders for open tasks: due soon when due within REMINDER_DUE_SOON_WINDOW, overdue when the due date passed
+# within REMINDER_OVERDUE_LOOKBACK. Run manage.py scan_reminders periodically, or set REMINDER_SCAN_INTERVAL
+# (seconds) to scan from a background thread in every server process.
+REMINDER_DUE_SOON_WINDOW = timedelta(days=1)
+REMINDER_OVERDUE_LOOKBACK = timedelta(days=7)
+REMINDER_SCAN_BATCH_SIZE = 500
+REMINDER_SCAN_INTERVAL = None
@@ -0,0 +1,27 @@
+import tempfile
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TemporaryCacheRunner(DiscoverRunner):
+    """
+    Runs the suite against the configured cache backend with its files in a
+    temporary directory, so tests neither read nor leave entries in the
+    working tree's .cache.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        self.cache_dir = tempfile.TemporaryDirectory(prefix='trello-test-cache-')
+        self.cache_settings = override_settings(CACHES={
+            alias: {**config, 'LOCATION': self.cache_dir.name} if config['BACKEND'].endswith('FileBasedCache')
+            else config
+            for alias, config in settings.CACHES.items()
+        })
+        self.cache_settings.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self.cache_settings.disable()
+        self.cache_dir.cleanup()
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from boards.metrics import metrics_view
 
 
 urlpatterns = [
@@ -28,6 +29,7 @@ urlpatterns = [
     path('', include('boards.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', metrics_view, name='metrics'),
     
     # YOUR PATTERNS
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -0,0 +1,111 @@
+import time
+from threading import Lock
+from asgiref.sync import sync_to_async
+from .models import Profile, ProjectMembership
+from .sharding import project_db, joins_global
+from .tokens import token_project_claims
+
+
+ACCESS_CACHE_TTL = 30
+ACCESS_CACHE_MAX_PROJECTS = 10000
+
+# {project_id: {user_id: (access_level, expires_at)}}, so a membership change
+# only has to drop one project's entries.
+_process_cache = {}
+_process_cache_lock = Lock()
+
+
+def _fetch_access_level(user_id, project_id):
+    memberships = ProjectMembership.objects.using(project_db(project_id)).filter(project_id=project_id)
+    if joins_global(project_id):
+        memberships = memberships.filter(member__user_id=user_id)
+    else:
+        # The project's shard holds no profiles to join.
+        memberships = memberships.filter(member_id__in=list(Profile.objects.filter(user_id=user_id)
+                                                             .values_list('id', flat=True)))
+    access_levels = list(memberships.values_list('access_level', flat=True)[:1])
+    return access_levels[0] if access_levels else None
+
+
+def _from_process_cache(user_id, project_id):
+    entry = _process_cache.get(project_id, {}).get(user_id)
+    if entry is None or entry[1] < time.monotonic():
+        return False, None
+    return True, entry[0]
+
+
+def _store_in_process_cache(user_id, project_id, access_level):
+    with _process_cache_lock:
+        if project_id not in _process_cache and len(_process_cache) >= ACCESS_CACHE_MAX_PROJECTS:
+            _process_cache.clear()
+        project_entries = _process_cache.setdefault(project_id, {})
+        project_entries[user_id] = (access_level, time.monotonic() + ACCESS_CACHE_TTL)
+
+
+def _known_access_level(request, project_id):
+    """(True, access level) when the token's claims or the caches answer without a query, else (False, None)."""
+    user_id = request.user.id
+    if user_id is None:
+        return True, None
+    claims = token_project_claims(request)
+    if claims is not None:
+        return True, claims.get(str(project_id))
+    request_cache = request.__dict__.setdefault('_project_access_cache', {})
+    if project_id in request_cache:
+        return True, request_cache[project_id]
+    found, access_level = _from_process_cache(user_id, project_id)
+    if found:
+        request_cache[project_id] = access_level
+    return found, access_level
+
+
+def _remember(request, project_id, access_level):
+    _store_in_process_cache(request.user.id, project_id, access_level)
+    request.__dict__['_project_access_cache'][project_id] = access_level
+
+
+def get_access_level(request, project_id):
+    """Return the ProjectMembership.Access level of request.user on the project, or None."""
+    project_id = int(project_id)
+    found, access_level = _known_access_level(request, project_id)
+    if not found:
+        access_level = _fetch_access_level(request.user.id, project_id)
+        _remember(request, project_id, access_level)
+    return access_level
+
+
+async def astill_member(user_id, project_id):
+    """Membership read past every cache, for streams that outlive the cached answer."""
+    return await sync_to_async(_fetch_access_level)(user_id, int(project_id)) is not None
+
+
+async def aget_access_level(request, project_id):
+    project_id = int(project_id)
+    found, access_level = _known_access_level(request, project_id)
+    if not found:
+        # The shard lookup may query the directory too, so the whole fetch runs in the ORM's sync thread.
+        access_level = await sync_to_async(_fetch_access_level)(request.user.id, project_id)
+        _remember(request, project_id, access_level)
+    return access_level
+
+
+def is_member(request, project_id):
+    return get_access_level(request, project_id) is not None
+
+
+async def ais_member(request, project_id):
+    return await aget_access_level(request, project_id) is not None
+
+
+def is_admin(request, project_id):
+    return get_access_level(request, project_id) == ProjectMembership.Access.ADMIN
+
+
+def invalidate_project(project_id):
+    with _process_cache_lock:
+        _process_cache.pop(project_id, None)
+
+
+def clear_access_cache():
+    with _process_cache_lock:
+        _process_cache.clear()
@@ -0,0 +1,48 @@
+"""
+Async GET handlers for DRF views, used under the ASGI entry point.
+
+A view with AsyncGetMixin built with async_get=True (the default is
+settings.ASYNC_READ_VIEWS) answers GET with its `aget` coroutine, so the
+request holds no thread while it waits on the database; its other methods keep
+their sync handlers and run in a thread as before.
+"""
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+class AsyncGetMixin:
+    async_get = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault('async_get', getattr(settings, 'ASYNC_READ_VIEWS', False))
+        view = super().as_view(**initkwargs)
+        if initkwargs['async_get']:
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.async_get:
+            return super().dispatch(request, *args, **kwargs)
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+        # APIView.dispatch with the handler awaited; authentication and permissions stay sync.
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
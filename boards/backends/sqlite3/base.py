@@ -0,0 +1,52 @@
+"""
+SQLite backend with connection-level tuning for serving concurrent requests.
+
+OPTIONS['pragmas'] is applied to every new connection, in order. OPTIONS
+['transaction_mode'] ('DEFERRED', 'IMMEDIATE' or 'EXCLUSIVE') is used to begin
+atomic blocks. IMMEDIATE takes the write lock up front, so a transaction waits
+on busy_timeout instead of failing with "database is locked" when it tries to
+upgrade a read lock that another writer invalidated.
+
+A 'foreign_keys': 'OFF' pragma stays in force: migrations neither re-enable
+nor check the constraints. Project shards need this because their rows point
+at profiles kept in another database.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = dict(options.get('pragmas', {}))
+        self.transaction_mode = (options.get('transaction_mode') or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'transaction_mode must be one of {", ".join(TRANSACTION_MODES)}.')
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
+
+    def enforces_foreign_keys(self):
+        value = self.settings_dict['OPTIONS'].get('pragmas', {}).get('foreign_keys', 'ON')
+        return str(value).upper() not in ('OFF', '0', 'FALSE', 'NO')
+
+    def enable_constraint_checking(self):
+        if self.enforces_foreign_keys():
+            super().enable_constraint_checking()
+
+    def check_constraints(self, table_names=None):
+        if self.enforces_foreign_keys():
+            super().check_constraints(table_names)
@@ -0,0 +1,421 @@
+"""
+Synthetic datasets and an in-process load benchmark for the boards API.
+
+generate_dataset() builds projects through the Trello importer, so generated
+data gets ranks, counters and memberships exactly like imported data.
+run_benchmark() drives the routes of boards/urls.py with the Django test
+client from a pool of threads, so every request goes through the full
+middleware and view stack against the configured database. With
+server='asgi' the requests instead run as concurrent tasks on one event loop
+through the ASGI request handler, each with its own thread for sync code the
+way Django's ASGI handler gives it; compare the two at the same concurrency
+(set ASYNC_READ_VIEWS=1 to serve the read views asynchronously).
+run_serialization_benchmark() compares the CPU time of TaskSerializer with
+the values() fast path the list endpoints use, and run_encoding_benchmark()
+the JSON renderers and the response compression on a task list payload.
+"""
+import asyncio
+import json
+import platform
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import django
+from asgiref.sync import ThreadSensitiveContext, async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .importer import ImportStats, MemberResolver, import_board, IMPORT_BATCH_SIZE
+from rest_framework.renderers import JSONRenderer
+from .models import Profile, Project, ProjectMembership, Board, Task
+from .compression import available_encodings, compress
+from .renderers import FastJSONRenderer, fast_json_available
+from .serializers import TaskSerializer, TASK_ROWS
+
+
+DATASET_USER_PREFIX = 'bench-'
+WORDS = ('alpha', 'release', 'deploy', 'review', 'design', 'migrate', 'report', 'invoice', 'customer', 'backlog',
+         'sprint', 'roadmap', 'metrics', 'search', 'export', 'import', 'cache', 'latency', 'mobile', 'billing')
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _due_date(rng, now):
+    if rng.random() < 1 / 3:
+        return (now + timedelta(hours=rng.uniform(-720, 720))).isoformat()
+    return None
+
+
+def generate_dataset(users, projects, members, boards, tasks, seed=0, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Create `users` users and `projects` projects, each shared by `members`
+    of those users and holding `boards` boards of `tasks` tasks. The same seed
+    always produces the same dataset, except that the due dates a third of the
+    tasks get are spread over the 30 days either side of now. Returns ImportStats.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    usernames = [f'{DATASET_USER_PREFIX}{i}' for i in range(users)]
+    stats = ImportStats()
+    resolver = MemberResolver(create_users=True, batch_size=batch_size)
+    resolver.resolve([{'id': username, 'username': username} for username in usernames], stats)
+    owners = Profile.objects.in_bulk(list(resolver.profiles.values()))
+    for number in range(projects):
+        team = rng.sample(usernames, min(members, users))
+        data = {
+            'name': f'Project {number}',
+            'desc': _sentence(rng, 8),
+            'members': [{'id': username, 'username': username} for username in team],
+            'lists': [{'id': f'l{b}', 'name': f'Board {b}', 'pos': b} for b in range(boards)],
+            'cards': [{'id': f'c{b}-{t}', 'name': _sentence(rng, 3), 'desc': _sentence(rng, 12), 'idList': f'l{b}',
+                       'pos': t, 'dueComplete': rng.random() < 0.3, 'idMembers': [rng.choice(team)],
+                       'due': _due_date(rng, now)}
+                      for b in range(boards) for t in range(tasks)],
+        }
+        import_board(data, owners[resolver.profiles[team[0]]], resolver, stats, batch_size=batch_size)
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+class BenchmarkContext:
+    """Objects the benchmark user can reach, sampled once so every run addresses the same rows."""
+
+    def __init__(self, profile, seed=0, sample_size=20):
+        rng = random.Random(seed)
+        self.profile = profile
+        project_ids = list(Project.objects.filter(owner=profile).order_by('id').values_list('id', flat=True))
+        project_ids = rng.sample(project_ids, min(sample_size, len(project_ids)))
+        boards = list(Board.objects.filter(project_id__in=project_ids).order_by('id').values('id', 'project_id'))
+        self.boards = rng.sample(boards, min(sample_size, len(boards)))
+        self.tasks = []
+        for board in self.boards:
+            task = (Task.objects.filter(board_id=board['id'], status_task=Task.Status.TODO)
+                    .order_by('position').values('id', 'board_id', 'project_id').first())
+            if task is not None:
+                self.tasks.append(task)
+        self.memberships = list(ProjectMembership.objects.filter(project_id__in=project_ids)
+                                .order_by('id').values('id', 'project_id')[:sample_size])
+        if not self.boards or not self.tasks:
+            raise ValueError('The benchmark user needs projects with boards and tasks; run generate_dataset first.')
+
+
+def _project_kwargs(rng, context):
+    return {'pk': rng.choice(context.boards)['project_id']}
+
+
+def _proj_id_kwargs(rng, context):
+    return {'proj_id': rng.choice(context.boards)['project_id']}
+
+
+def _profile_kwargs(rng, context):
+    return {'pk': context.profile.id}
+
+
+def _membership_kwargs(rng, context):
+    membership = rng.choice(context.memberships)
+    return {'proj_id': membership['project_id'], 'mem_id': membership['id']}
+
+
+def _board_kwargs(rng, context):
+    board = rng.choice(context.boards)
+    return {'proj_id': board['project_id'], 'board_id': board['id']}
+
+
+def _task_kwargs(rng, context):
+    task = rng.choice(context.tasks)
+    return {'proj_id': task['project_id'], 'board_id': task['board_id'], 'task_id': task['id']}
+
+
+def _search_query(rng, context, kwargs):
+    return {'q': rng.choice(WORDS)}
+
+
+def _empty_body(rng, context, kwargs):
+    return {}
+
+
+def _board_body(rng, context, kwargs):
+    return {'title': 'benchmark', 'description': '', 'project': kwargs['proj_id']}
+
+
+def _task_body(rng, context, kwargs):
+    return {'title': _sentence(rng, 3), 'description': 'benchmark', 'board': kwargs['board_id'],
+            'project': kwargs['proj_id'], 'status_task': Task.Status.TODO}
+
+
+def _due_query(rng, context, kwargs):
+    return {'within': rng.choice(('1', '7', '30'))}
+
+
+def _bulk_body(rng, context, kwargs):
+    return [{'op': 'create', 'data': {'title': _sentence(rng, 3), 'description': 'benchmark'}} for _ in range(10)]
+
+
+# name: (method, url name, url kwargs, query or body, writes)
+ROUTES = {
+    'users': ('get', 'users', None, None, False),
+    'profiles': ('get', 'profiles', None, None, False),
+    'profile_detail': ('get', 'profile_detail', _profile_kwargs, None, False),
+    'task_search': ('get', 'task_search', None, _search_query, False),
+    'user_due_tasks': ('get', 'user_due_tasks', None, _due_query, False),
+    'reminders': ('get', 'reminders', None, None, False),
+    'project_list': ('get', 'project_list', None, None, False),
+    'project_detail': ('get', 'project_detail', _project_kwargs, None, False),
+    'members_list': ('get', 'members_list', _project_kwargs, None, False),
+    'members_detail': ('get', 'members_detail', _membership_kwargs, None, False),
+    'project_changes': ('get', 'project_changes', _project_kwargs, None, False),
+    'project_export': ('get', 'project_export', _project_kwargs, None, False),
+    'project_due_tasks': ('get', 'project_due_tasks', _project_kwargs, _due_query, False),
+    'board_list': ('get', 'board_list', _proj_id_kwargs, None, False),
+    'board_detail': ('get', 'board_detail', _board_kwargs, None, False),
+    'board_snapshot': ('get', 'board_snapshot', _board_kwargs, None, False),
+    'task_list': ('get', 'task_list', _board_kwargs, None, False),
+    'task_edit': ('get', 'task_edit', _task_kwargs, None, False),
+    'board_create': ('post', 'board_list', _proj_id_kwargs, _board_body, True),
+    'board_move': ('post', 'board_move', _board_kwargs, _empty_body, True),
+    'task_create': ('post', 'task_list', _board_kwargs, _task_body, True),
+    'task_update': ('put', 'task_edit', _task_kwargs, _task_body, True),
+    'task_move': ('post', 'task_move', _task_kwargs, _empty_body, True),
+    'task_bulk': ('post', 'task_bulk', _board_kwargs, _bulk_body, True),
+}
+# Not benchmarked: the SSE stream never completes, deletes would consume the
+# dataset, and user/project/membership creation grows unrelated tables.
+SKIPPED_ROUTES = ('project_events', 'project_import')
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+SERVERS = ('wsgi', 'asgi')
+
+
+def _host():
+    allowed = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    return allowed[0] if allowed else 'localhost'
+
+
+def _client(context):
+    # View exceptions (e.g. SQLite lock timeouts under concurrent writes) count as 500s instead of aborting the run.
+    client = Client(HTTP_HOST=_host(), raise_request_exception=False)
+    client.force_login(context.profile.user)
+    return client
+
+
+def _async_client(context):
+    client = AsyncClient(raise_request_exception=False)
+    client.force_login(context.profile.user)
+    return client
+
+
+def _drain(response):
+    for _ in response.streaming_content:
+        pass
+
+
+def _measure(client, method, url, payload):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        if method == 'get':
+            response = client.get(url, payload or {})
+        else:
+            response = getattr(client, method)(url, json.dumps(payload), content_type='application/json')
+        if response.streaming:
+            _drain(response)
+        elapsed = time.perf_counter() - started
+    return elapsed, response.status_code, len(queries)
+
+
+async def _ameasure(client, method, url, payload):
+    # Like the ASGI handler: the request's sync code runs in a thread of its own. Its queries run in
+    # that thread too, out of reach of CaptureQueriesContext, so they are not counted.
+    async with ThreadSensitiveContext():
+        started = time.perf_counter()
+        if method == 'get':
+            response = await client.get(url, payload or {})
+        else:
+            response = await getattr(client, method)(url, json.dumps(payload), content_type='application/json')
+        if response.streaming:
+            await sync_to_async(_drain)(response)
+        elapsed = time.perf_counter() - started
+        await sync_to_async(connections.close_all)()
+    return elapsed, response.status_code, None
+
+
+def _requests(names, context, requests, concurrency, seed, number):
+    rng = random.Random(f'{seed}-{"+".join(names)}-{number}')
+    for _ in range(number, requests, concurrency):
+        method, url_name, url_kwargs, payload, _ = ROUTES[rng.choice(names)]
+        kwargs = url_kwargs(rng, context) if url_kwargs else {}
+        yield method, reverse(url_name, kwargs=kwargs), payload(rng, context, kwargs) if payload else None
+
+
+def run_routes(names, context, requests, concurrency, seed=0, server='wsgi'):
+    """Send `requests` requests spread over `names`, picking the route of each request at random."""
+    def worker(number):
+        client = _client(context)
+        try:
+            return [_measure(client, *request) for request in _requests(names, context, requests, concurrency, seed,
+                                                                         number)]
+        finally:
+            if concurrency > 1:
+                connection.close()
+
+    async def async_worker(number, client):
+        return [await _ameasure(client, *request) for request in _requests(names, context, requests, concurrency,
+                                                                            seed, number)]
+
+    async def serve(clients):
+        return await asyncio.gather(*(async_worker(number, client) for number, client in enumerate(clients)))
+
+    # Logging in is sync, so the async clients are ready before the clock starts.
+    clients = [_async_client(context) for _ in range(concurrency)] if server == 'asgi' else None
+    started = time.perf_counter()
+    if server == 'asgi':
+        # The async test client always sends Host: testserver.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            samples = [sample for result in async_to_sync(serve)(clients) for sample in result]
+    elif concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = [sample for result in executor.map(worker, range(concurrency)) for sample in result]
+    else:
+        samples = worker(0)
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    query_counts = [count for _, _, count in samples if count is not None]
+    return {
+        'routes': list(names),
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status >= 400),
+        'statuses': sorted({status for _, status, _ in samples}),
+        'p50_ms': _percentile(latencies, 50),
+        'p95_ms': _percentile(latencies, 95),
+        'p99_ms': _percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'queries_mean': round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+        'queries_max': max(query_counts, default=None),
+    }
+
+
+def run_benchmark(profile, requests=200, concurrency=4, routes=None, writes=False, seed=0, progress=None,
+                  mixed=False, server='wsgi'):
+    """
+    Benchmark each route in turn, or with `mixed` all selected routes interleaved
+    as one workload, and return a JSON-serialisable report.
+    """
+    if server not in SERVERS:
+        raise ValueError(f'Unknown server {server!r}; expected one of {", ".join(SERVERS)}.')
+    context = BenchmarkContext(profile, seed)
+    names = [name for name, route in ROUTES.items()
+             if (routes is None or name in routes) and (writes or not route[4])]
+    runs = [('mixed', names)] if mixed else [(name, [name]) for name in names]
+    results = {}
+    for name, run_names in runs:
+        results[name] = run_routes(run_names, context, requests, concurrency, seed, server)
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connections['default'].vendor,
+        'requests': requests,
+        'concurrency': concurrency,
+        'server': server,
+        'async_read_views': getattr(settings, 'ASYNC_READ_VIEWS', False),
+        'mixed': mixed,
+        'seed': seed,
+        'user': profile.user.username,
+        'results': results,
+    }
+
+
+def _cpu_seconds(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = function()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_serialization_benchmark(tasks=10000, repeat=5):
+    """
+    Fetch and serialize the first `tasks` tasks with TaskSerializer and with
+    TASK_ROWS, and report the best CPU time of each over `repeat` runs.
+    """
+    queryset = Task.objects.order_by('id')
+    count = queryset[:tasks].count()
+    if count < tasks:
+        raise ValueError(f'Only {count} tasks in the database; run generate_dataset with more tasks.')
+    serializer_seconds, serializer_data = _cpu_seconds(
+        lambda: TaskSerializer(instance=list(queryset[:tasks]), many=True).data, repeat)
+    rows_seconds, rows_data = _cpu_seconds(
+        lambda: TASK_ROWS.to_representation(TASK_ROWS.values(queryset)[:tasks]), repeat)
+    renderer = JSONRenderer()
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'tasks': count,
+        'repeat': repeat,
+        'serializer_cpu_ms': round(serializer_seconds * 1000, 2),
+        'rows_cpu_ms': round(rows_seconds * 1000, 2),
+        'speedup': round(serializer_seconds / rows_seconds, 2) if rows_seconds else None,
+        'identical_output': renderer.render(serializer_data) == renderer.render(rows_data),
+    }
+
+
+def _seconds(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_encoding_benchmark(tasks=1000, repeat=20):
+    """
+    Render a TaskListView-shaped page of `tasks` tasks with DRF's JSONRenderer
+    and FastJSONRenderer, then compress it with each available encoding; report
+    the best time of `repeat` runs and the bytes each would send.
+    """
+    rows = TASK_ROWS.to_representation(TASK_ROWS.values(Task.objects.order_by('position', 'id'))[:tasks])
+    if len(rows) < tasks:
+        raise ValueError(f'Only {len(rows)} tasks in the database; run generate_dataset with more tasks.')
+    page = {'next': 'http://localhost/project-list/1/boards/1/tasks?cursor=cD0x', 'previous': None, 'results': rows}
+    stdlib_seconds, body = _seconds(lambda: JSONRenderer().render(page), repeat)
+    fast_seconds, fast_body = _seconds(lambda: FastJSONRenderer().render(page), repeat)
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'tasks': tasks,
+        'repeat': repeat,
+        'orjson': fast_json_available(),
+        'stdlib_encode_ms': round(stdlib_seconds * 1000, 3),
+        'fast_encode_ms': round(fast_seconds * 1000, 3),
+        'encode_speedup': round(stdlib_seconds / fast_seconds, 2) if fast_seconds else None,
+        'identical_output': body == fast_body,
+        'bytes': {'identity': len(body)},
+        'compress_ms': {},
+    }
+    for encoding in available_encodings():
+        seconds, compressed = _seconds(lambda: compress(body, encoding), repeat)
+        report['bytes'][encoding] = len(compressed)
+        report['compress_ms'][encoding] = round(seconds * 1000, 3)
+    return report
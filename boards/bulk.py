@@ -0,0 +1,138 @@
+from django.db import router, transaction
+from django.utils import timezone
+from .models import Board, Profile, Project, ProjectChange, Task
+from .serializers import TaskBulkSerializer
+from .changes import record_changes
+from .ranking import last_rank, ranks_between
+from .counters import tasks_bulk_changed
+
+
+OPERATIONS = ('create', 'update', 'status', 'move')
+TASK_FIELDS = ['title', 'description', 'board', 'project', 'profile',
+               'start_date', 'finish_date', 'delivery_date', 'status_task']
+BULK_BATCH_SIZE = 500
+
+
+def _task_data(task):
+    return {field: getattr(task, Task._meta.get_field(field).attname) for field in TASK_FIELDS}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalise(operation, tasks, project, board_id, user_id, can_create):
+    """Turn one bulk operation into (task, full task data, changed fields) or raise ValueError."""
+    if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+        raise ValueError({'op': [f'Expected one of {", ".join(OPERATIONS)}.']})
+    op = operation['op']
+    if op == 'status':
+        changes = {'status_task': operation.get('status_task')}
+    elif op == 'move':
+        changes = {'board': operation.get('board')}
+    else:
+        changes = operation.get('data', {})
+        if not isinstance(changes, dict):
+            raise ValueError({'data': ['Expected an object.']})
+    changes = {field: value for field, value in changes.items() if field in TASK_FIELDS and field != 'project'}
+
+    if op == 'create':
+        if not can_create:
+            raise ValueError({'non_field_errors': ['Only project admins can create tasks.']})
+        return None, {'board': board_id, **changes, 'project': project.id}, list(changes)
+
+    task = tasks.get(_as_int(operation.get('id')))
+    if task is None:
+        raise ValueError({'id': ['Task not found on this board.']})
+    if task.status_task != Task.Status.TODO and user_id != task.profile_id:
+        raise ValueError({'non_field_errors': ['Only the assignee can change a task that is not todo.']})
+    return task, {**_task_data(task), **changes, 'project': project.id}, list(changes)
+
+
+def _preload(project, items):
+    board_ids = {_as_int(data['board']) for _, data, _ in items}
+    profile_ids = {_as_int(data.get('profile')) for _, data, _ in items} - {None}
+    return {
+        'board': Board.objects.filter(project_id=project.id).in_bulk(board_ids - {None}),
+        'project': {project.id: project},
+        'profile': Profile.objects.in_bulk(profile_ids) if profile_ids else {},
+    }
+
+
+def _assign_positions(tasks):
+    # bulk_create skips the pre_save receiver that ranks new tasks, so append them here.
+    by_board = {}
+    for task in tasks:
+        by_board.setdefault(task.board_id, []).append(task)
+    for board_id, board_tasks in by_board.items():
+        ranks = ranks_between(last_rank(Task.objects.filter(board_id=board_id)), None, len(board_tasks))
+        for task, rank in zip(board_tasks, ranks):
+            task.position = rank
+
+
+def apply_task_operations(operations, project, board_id, user_id, can_create):
+    """
+    Validate and apply a list of bulk task operations in one transaction.
+    Returns (ok, results) where results holds one entry per operation; nothing
+    is written unless every operation is valid. A task may appear only once.
+    """
+    task_ids = {_as_int(operation.get('id')) for operation in operations
+                if isinstance(operation, dict) and operation.get('op') != 'create'} - {None}
+    tasks = Task.objects.filter(project_id=project.id, board_id=board_id).in_bulk(task_ids) if task_ids else {}
+
+    results = [{'index': index, 'op': operation.get('op') if isinstance(operation, dict) else None}
+               for index, operation in enumerate(operations)]
+    items, seen = [], set()
+    for result, operation in zip(results, operations):
+        try:
+            task, data, changed = _normalise(operation, tasks, project, board_id, user_id, can_create)
+        except ValueError as error:
+            result['errors'] = error.args[0]
+            continue
+        if task is not None:
+            # One operation per task, so the counters and the change log see each task once.
+            if task.pk in seen:
+                result['errors'] = {'id': ['Task appears more than once in this batch.']}
+                continue
+            seen.add(task.pk)
+        items.append((result, task, data, changed))
+
+    serializer = TaskBulkSerializer(data=[data for _, _, data, _ in items], many=True,
+                                    context={'preloaded': _preload(project, [item[1:] for item in items])})
+    if not serializer.is_valid():
+        for (result, _, _, _), errors in zip(items, serializer.errors):
+            if errors:
+                result['errors'] = errors
+    if any('errors' in result for result in results):
+        return False, results
+
+    now = timezone.now()
+    created, updated, updated_fields = [], [], set()
+    for (result, task, _, changed), attrs in zip(items, serializer.validated_data):
+        if task is None:
+            created.append((result, Task(**attrs)))
+            continue
+        for field in changed:
+            setattr(task, field, attrs[field])
+        task.updated_at = now
+        updated.append(task)
+        updated_fields.update(changed)
+        result['id'] = task.pk
+
+    with transaction.atomic(using=router.db_for_write(Task)):
+        _assign_positions([task for _, task in created])
+        Task.objects.bulk_create([task for _, task in created], batch_size=BULK_BATCH_SIZE)
+        if updated_fields:
+            Task.objects.bulk_update(updated, list(updated_fields) + ['updated_at'], batch_size=BULK_BATCH_SIZE)
+        # bulk_create/bulk_update skip post_save, so do the signal receivers' work here.
+        if created or updated_fields:
+            Project.bump_version(project.id)
+            record_changes([task for _, task in created], ProjectChange.Action.CREATE)
+            record_changes(updated, ProjectChange.Action.UPDATE)
+            tasks_bulk_changed(project.id, [task for _, task in created], updated)
+    for result, task in created:
+        result['id'] = task.pk
+    return True, results
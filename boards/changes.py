@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import Project, ProjectChange
+from .serializers import BoardSerializer, TaskSerializer, ProjectMembershipSerializer, ProjectChangeSerializer
+from .realtime import get_broker
+
+
+CHANGE_SERIALIZERS = {
+    'board': BoardSerializer,
+    'task': TaskSerializer,
+    'projectmembership': ProjectMembershipSerializer,
+}
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 1000
+CHANGE_LOG_BATCH_SIZE = 500
+# Log ids are 64-bit integers; larger cursors cannot be compared in the database.
+CHANGE_SEQ_MAX = 2 ** 63 - 1
+
+
+def get_retention():
+    return getattr(settings, 'CHANGE_LOG_RETENTION', timedelta(days=7))
+
+
+def _build_change(instance, action):
+    model = instance._meta.model_name
+    data = None if action == ProjectChange.Action.DELETE else CHANGE_SERIALIZERS[model](instance).data
+    return ProjectChange(project_id=instance.project_id, model=model, object_id=instance.pk,
+                         action=action, data=data)
+
+
+def publish_changes(changes):
+    events = [(change.project_id, ProjectChangeSerializer(instance=change).data) for change in changes]
+
+    def publish():
+        broker = get_broker()
+        for project_id, event in events:
+            broker.publish(project_id, event)
+    transaction.on_commit(publish, using=changes[0]._state.db)
+
+
+def record_change(instance, action):
+    change = _build_change(instance, action)
+    change.save()
+    publish_changes([change])
+
+
+def record_changes(instances, action):
+    changes = ProjectChange.objects.bulk_create([_build_change(instance, action) for instance in instances],
+                                                batch_size=CHANGE_LOG_BATCH_SIZE)
+    if changes:
+        publish_changes(changes)
+
+
+def changes_since(project, since, limit=CHANGES_PAGE_SIZE):
+    """
+    Return (reset, changes, last_seq, has_more) for a client that has applied
+    every change up to `since`. `reset` means entries the client has not seen
+    were compacted away, so it must reload the project and resume from last_seq.
+    """
+    if since < project.change_log_floor:
+        head = project.changes.aggregate(head=Max('id'))['head']
+        return True, [], max(head or 0, project.change_log_floor), False
+    # Through the related manager, so the query goes to the project's shard.
+    changes = list(project.changes.filter(id__gt=since).order_by('id')[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return False, changes, changes[-1].id if changes else since, has_more
+
+
+def compact_changes(retention=None):
+    """
+    Drop log entries older than the retention window that a newer entry for the
+    same object supersedes, then drop expired delete tombstones and raise each
+    affected project's change_log_floor past them. Returns (superseded, expired).
+    """
+    cutoff = timezone.now() - (retention if retention is not None else get_retention())
+    newer = ProjectChange.objects.filter(project_id=OuterRef('project_id'), model=OuterRef('model'),
+                                         object_id=OuterRef('object_id'), id__gt=OuterRef('id'))
+    with transaction.atomic(using=router.db_for_write(ProjectChange)):
+        superseded, _ = ProjectChange.objects.filter(created_at__lt=cutoff).filter(Exists(newer)).delete()
+        tombstones = ProjectChange.objects.filter(created_at__lt=cutoff, action=ProjectChange.Action.DELETE)
+        floors = tombstones.values('project_id').annotate(floor=Max('id')).values_list('project_id', 'floor')
+        for project_id, floor in floors:
+            Project.objects.filter(pk=project_id).update(change_log_floor=Greatest('change_log_floor', floor))
+        expired, _ = tombstones.delete()
+    return superseded, expired
@@ -0,0 +1,141 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli when the brotli
+package is installed and the client prefers it or ranks it equal, gzip
+otherwise. Bodies under COMPRESSION_MIN_SIZE bytes, types that are already
+compressed and Server-Sent Events streams are sent as they are.
+
+HTML is never compressed: the browsable API's pages carry a CSRF token next to
+text the client controls, which compression would expose to BREACH. The API's
+JSON carries no such secret.
+"""
+import gzip
+import zlib
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript',
+                      'application/xml', 'application/vnd.oai.openapi')
+UNCOMPRESSED_STREAMS = ('text/event-stream',)
+UNCOMPRESSED_TYPES = ('text/html',)
+
+
+def get_min_size():
+    return getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+
+def get_gzip_level():
+    return getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+
+
+def get_brotli_quality():
+    return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding, encodings=None):
+    """The coding in `encodings` (in server preference order) the client ranks highest, or None."""
+    encodings = encodings or available_encodings()
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in encodings:
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=get_brotli_quality())
+    return gzip.compress(body, compresslevel=get_gzip_level(), mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=get_brotli_quality())
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(get_gzip_level(), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if (response.has_header('Content-Encoding') or not content_type.startswith(COMPRESSIBLE_TYPES)
+            or content_type in UNCOMPRESSED_TYPES):
+        return False
+    if response.streaming:
+        return content_type not in UNCOMPRESSED_STREAMS and not response.is_async
+    return len(response.content) >= get_min_size()
+
+
+def compress_response(request, response):
+    if not _compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+    if response.streaming:
+        response.streaming_content = compress_stream(response.streaming_content, encoding)
+        del response.headers['Content-Length']
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+    response.headers['Content-Encoding'] = encoding
+    # The body differs from the uncompressed one, so only a weak ETag still holds.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
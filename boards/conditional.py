@@ -0,0 +1,49 @@
+import hashlib
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from .models import Project
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def instance_validators(instance, *parts):
+    """Return (etag, last_modified) for a model instance with an updated_at field."""
+    etag = make_etag(instance._meta.model_name, instance.pk, getattr(instance, 'version', ''),
+                     instance.updated_at.isoformat(), *parts)
+    return etag, instance.updated_at
+
+
+def _versions(project_id):
+    return Project.objects.filter(pk=project_id).only('id', 'version', 'updated_at')
+
+
+def project_validators(project_id, *parts):
+    """Like instance_validators for a project, reading only its version columns."""
+    project = _versions(project_id).first()
+    if project is None:
+        return None, None
+    return instance_validators(project, *parts)
+
+
+async def aproject_validators(project_id, *parts):
+    project = await _versions(project_id).afirst()
+    if project is None:
+        return None, None
+    return instance_validators(project, *parts)
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response when the request's If-None-Match/If-Modified-Since match, else None."""
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+
+
+def set_validators(response, etag, last_modified):
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,106 @@
+from collections import Counter
+from django.db import router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from .models import Board, BoardTaskCount, Task
+
+
+def create_board_counters(board):
+    BoardTaskCount.objects.bulk_create(
+        [BoardTaskCount(board_id=board.id, project_id=board.project_id, status_task=status_task)
+         for status_task in Task.Status.values],
+        ignore_conflicts=True)
+
+
+def apply_deltas(project_id, deltas):
+    """Apply {(board_id, status_task): delta} to the counters with one UPDATE per non-zero delta."""
+    for (board_id, status_task), delta in deltas.items():
+        if not delta:
+            continue
+        counters = BoardTaskCount.objects.filter(board_id=board_id, status_task=status_task)
+        # Clamped so a drifted counter cannot break writes; rebuild_task_counts repairs it.
+        if not counters.update(count=Greatest(F('count') + delta, 0)) and delta > 0:
+            BoardTaskCount.objects.create(board_id=board_id, project_id=project_id,
+                                          status_task=status_task, count=delta)
+
+
+def task_saved(task, created):
+    deltas = Counter()
+    if not created:
+        counter_key = getattr(task, 'counter_key', None)
+        if counter_key is None:
+            return
+        deltas[counter_key] -= 1
+    deltas[(task.board_id, task.status_task)] += 1
+    apply_deltas(task.project_id, deltas)
+    task.remember_counter_key()
+
+
+def task_deleted(task):
+    key = getattr(task, 'counter_key', None) or (task.board_id, task.status_task)
+    apply_deltas(task.project_id, {key: -1})
+
+
+def tasks_bulk_changed(project_id, created, updated):
+    deltas = Counter((task.board_id, task.status_task) for task in created)
+    # A task listed twice moves once, from the key it was first counted under to its final state.
+    moves = {}
+    for task in updated:
+        counter_key = getattr(task, 'counter_key', None)
+        if counter_key is not None:
+            moves[task.pk] = (moves[task.pk][0] if task.pk in moves else counter_key, task)
+    for counter_key, task in moves.values():
+        deltas[counter_key] -= 1
+        deltas[(task.board_id, task.status_task)] += 1
+    apply_deltas(project_id, deltas)
+    for task in list(created) + list(updated):
+        task.remember_counter_key()
+
+
+def board_counts(board):
+    counts = dict.fromkeys(Task.Status.values, 0)
+    counts.update((counter.status_task, counter.count) for counter in board.task_counts.all())
+    return counts
+
+
+def counts_by_board(board_ids):
+    """board_counts for many boards in one query, {board_id: counts}."""
+    counts = {board_id: dict.fromkeys(Task.Status.values, 0) for board_id in board_ids}
+    for board_id, status_task, count in (BoardTaskCount.objects.filter(board_id__in=board_ids)
+                                         .values_list('board_id', 'status_task', 'count')):
+        counts[board_id][status_task] = count
+    return counts
+
+
+def project_counts(project_id):
+    counts = dict.fromkeys(Task.Status.values, 0)
+    counts.update(BoardTaskCount.objects.filter(project_id=project_id)
+                  .values_list('status_task').annotate(total=Sum('count')))
+    return counts
+
+
+def find_drift():
+    """Return [(board_id, status_task, stored, actual)] for every counter that disagrees with the tasks."""
+    actual = {(row['board_id'], row['status_task']): row['count']
+              for row in Task.objects.values('board_id', 'status_task').annotate(count=Count('id'))}
+    stored = {(row['board_id'], row['status_task']): row['count']
+              for row in BoardTaskCount.objects.values('board_id', 'status_task', 'count')}
+    expected = {(board_id, status_task): 0
+                for board_id in Board.objects.values_list('id', flat=True) for status_task in Task.Status.values}
+    expected.update(actual)
+    return [(board_id, status_task, stored.get((board_id, status_task)), count)
+            for (board_id, status_task), count in sorted(expected.items())
+            if stored.get((board_id, status_task)) != count]
+
+
+def rebuild_counters():
+    """Rewrite every drifted counter from the tasks table; returns the drift that was fixed."""
+    with transaction.atomic(using=router.db_for_write(BoardTaskCount)):
+        drift = find_drift()
+        project_ids = dict(Board.objects.filter(pk__in={board_id for board_id, *_ in drift})
+                           .values_list('id', 'project_id'))
+        for board_id, status_task, _, count in drift:
+            BoardTaskCount.objects.update_or_create(
+                board_id=board_id, status_task=status_task,
+                defaults={'count': count, 'project_id': project_ids[board_id]})
+    return drift
@@ -0,0 +1,64 @@
+import csv
+from io import StringIO
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Board, Task, ProjectMembership
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = {
+    'board': (Board, ['id', 'title', 'description', 'position', 'updated_at']),
+    'task': (Task, ['id', 'board_id', 'title', 'description', 'profile_id', 'start_date', 'finish_date',
+                    'delivery_date', 'status_task', 'position', 'updated_at']),
+    'projectmembership': (ProjectMembership, ['id', 'member_id', 'access_level', 'created_at']),
+}
+
+
+def export_rows(project_id, model, using=None):
+    # values() tuples read through a server-side chunked iterator; no model instances are built.
+    model_class, fields = EXPORT_FIELDS[model]
+    return (model_class.objects.using(using).filter(project_id=project_id).order_by('id')
+            .values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def stream_ndjson(project, models):
+    """Yield the project and then every row of `models` as one JSON object per line."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    yield encoder.encode({'type': 'project', 'id': project.id, 'title': project.title,
+                          'description': project.description, 'version': project.version}) + '\n'
+    for model in models:
+        fields = EXPORT_FIELDS[model][1]
+        yield from _chunked(encoder.encode({'type': model, **dict(zip(fields, row))}) + '\n'
+                            for row in export_rows(project.id, model, project._state.db))
+
+
+def stream_csv(project, model):
+    """Yield a header row and then every row of one model as CSV."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    fields = EXPORT_FIELDS[model][1]
+    yield line(fields)
+    yield from _chunked(line(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+                        for row in export_rows(project.id, model, project._state.db))
@@ -0,0 +1,90 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import Profile
+
+
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 80
+
+
+def get_thumbnail_sizes():
+    return getattr(settings, 'PROFILE_THUMBNAIL_SIZES', {'small': 48, 'medium': 128, 'large': 256})
+
+
+def thumbnail_name(profile_id, source, size):
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return f'thumbnails/profiles/{profile_id}/{digest}-{size}.webp'
+
+
+def _render(image, edge):
+    thumbnail = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def render_thumbnails(profile):
+    """
+    Write square WebP thumbnails of the profile image in every configured size
+    and record them on the profile. Returns the new thumbnail map.
+    """
+    source = profile.image_profile.name if profile.image_profile else ''
+    thumbnails = {}
+    if source:
+        try:
+            with default_storage.open(source) as f, Image.open(f) as image:
+                image = ImageOps.exif_transpose(image)
+                # Palette and RGB images carry transparency as info rather than an alpha band.
+                transparent = 'A' in image.getbands() or 'transparency' in image.info
+                image = image.convert('RGBA' if transparent else 'RGB')
+                sizes = {}
+                for size, edge in get_thumbnail_sizes().items():
+                    name = thumbnail_name(profile.id, source, size)
+                    default_storage.delete(name)
+                    sizes[size] = default_storage.save(name, _render(image, edge))
+                thumbnails = {'source': source, 'sizes': sizes}
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            # Unreadable or oversized uploads keep serving the original file.
+            thumbnails = {'source': source, 'sizes': {}}
+    stale = set((profile.image_thumbnails or {}).get('sizes', {}).values()) - set(thumbnails.get('sizes', {}).values())
+    # Only record the result if the image was not replaced while we worked.
+    current = Profile.objects.filter(pk=profile.pk)
+    current = current.filter(image_profile=source) if source else current.filter(Q(image_profile='') | Q(image_profile__isnull=True))
+    if current.update(image_thumbnails=thumbnails):
+        profile.image_thumbnails = thumbnails
+        for name in stale:
+            default_storage.delete(name)
+    return thumbnails
+
+
+def needs_thumbnails(profile):
+    source = profile.image_profile.name if profile.image_profile else ''
+    current = profile.image_thumbnails or {}
+    if current.get('source', '') != source:
+        return True
+    # An empty size map marks an unreadable upload; only re-render when the configured sizes changed.
+    return bool(current.get('sizes')) and set(current['sizes']) != set(get_thumbnail_sizes())
+
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'PROFILE_IMAGE_WORKERS', 2), thread_name_prefix='profile-images')
+
+
+def _run_render(profile_id):
+    try:
+        profile = Profile.objects.filter(pk=profile_id).first()
+        if profile is not None and needs_thumbnails(profile):
+            render_thumbnails(profile)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(profile_id):
+    """Render a profile's thumbnails on the image worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run_render, profile_id))
@@ -0,0 +1,215 @@
+"""
+Bulk import of Trello board exports. A Trello board becomes a Project, its
+lists become Boards and its cards become Tasks. Rows are written with
+bulk_create, so the receivers that rank, count and log single saves are
+replaced by explicit work here; a freshly imported project has no clients to
+sync, so no change-log entries are written.
+"""
+import json
+import time
+from collections import Counter
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils.dateparse import parse_datetime
+from .models import Profile, ProjectShard, Project, ProjectMembership, Board, Task, BoardTaskCount
+from .ranking import ranks_between
+from .access import invalidate_project
+from .tokens import revoke_project_claims
+from .sharding import use_project
+
+
+IMPORT_BATCH_SIZE = 1000
+READ_SIZE = 1 << 16
+
+
+def iter_json_documents(fp, read_size=READ_SIZE):
+    """
+    Yield the boards of a Trello export file one at a time: the file may hold a
+    single board object, a JSON array of boards or one board per line.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, in_array, eof = '', 0, None, False
+    while True:
+        while position < len(buffer) and (buffer[position].isspace() or (in_array and buffer[position] == ',')):
+            position += 1
+        if position == len(buffer):
+            if eof:
+                break
+            buffer, position = fp.read(read_size), 0
+            eof = not buffer
+            continue
+        if in_array is None:
+            in_array = buffer[position] == '['
+            position += in_array
+            continue
+        if in_array and buffer[position] == ']':
+            break
+        try:
+            document, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Grow the read geometrically so one huge board is not re-parsed once per small chunk.
+            chunk = fp.read(max(read_size, len(buffer) - position))
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield document
+        position = end
+        if position > read_size:
+            buffer, position = buffer[position:], 0
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.projects = []
+        self.boards = 0
+        self.tasks = 0
+        self.memberships = 0
+        self.users_created = 0
+
+    @property
+    def seconds(self):
+        return time.monotonic() - self.started
+
+    @property
+    def tasks_per_minute(self):
+        return int(self.tasks * 60 / self.seconds) if self.seconds else 0
+
+    def as_dict(self):
+        return {'projects': self.projects, 'boards': self.boards, 'tasks': self.tasks,
+                'memberships': self.memberships, 'users_created': self.users_created,
+                'seconds': round(self.seconds, 3), 'tasks_per_minute': self.tasks_per_minute}
+
+
+class MemberResolver:
+    """Map Trello usernames to profile ids with a few bulk queries per board, cached across boards."""
+
+    def __init__(self, create_users=False, batch_size=IMPORT_BATCH_SIZE):
+        self.create_users = create_users
+        self.batch_size = batch_size
+        self.profiles = {}
+
+    def _load(self, usernames):
+        rows = User.objects.filter(username__in=usernames).values_list('id', 'username', 'user_profile__id')
+        without_profile = {}
+        for user_id, username, profile_id in rows:
+            if profile_id is None:
+                without_profile[user_id] = username
+            else:
+                self.profiles[username] = profile_id
+        if without_profile:
+            # Users created by bulk paths never went through the create_profile receiver.
+            Profile.objects.bulk_create([Profile(user_id=user_id, profile_name=username)
+                                         for user_id, username in without_profile.items()],
+                                        batch_size=self.batch_size)
+            self.profiles.update(Profile.objects.filter(user_id__in=without_profile)
+                                 .values_list('user__username', 'id'))
+
+    def resolve(self, members, stats):
+        """Return {trello member id: profile id} for the board's members."""
+        usernames = {member['id']: member['username'] for member in members
+                     if isinstance(member, dict) and member.get('id') and member.get('username')}
+        missing = set(usernames.values()) - set(self.profiles)
+        if missing:
+            self._load(missing)
+            missing -= set(self.profiles)
+        if missing and self.create_users:
+            unusable = make_password(None)
+            User.objects.bulk_create([User(username=username, password=unusable) for username in missing],
+                                     batch_size=self.batch_size)
+            stats.users_created += len(missing)
+            self._load(missing)
+        return {member_id: self.profiles[username] for member_id, username in usernames.items()
+                if username in self.profiles}
+
+
+def _position(item):
+    try:
+        return float(item.get('pos', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _date(value):
+    try:
+        return parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def import_board(data, owner, resolver, stats, include_archived=False, batch_size=IMPORT_BATCH_SIZE):
+    """Import one Trello board export as a new project owned by `owner`, in one transaction."""
+    if not isinstance(data, dict) or not isinstance(data.get('lists', []), list) \
+            or not isinstance(data.get('cards', []), list):
+        raise ValueError('Expected a Trello board export object.')
+    visible = (lambda item: isinstance(item, dict)) if include_archived else \
+        (lambda item: isinstance(item, dict) and not item.get('closed'))
+
+    members = resolver.resolve(data.get('members', []), stats)
+    # The id places the project on its shard, so it is taken before the shard's transaction starts.
+    project_id = ProjectShard.allocate()
+    with use_project(project_id), transaction.atomic(using=router.db_for_write(Project)):
+        project = Project.objects.create(id=project_id, title=(data.get('name') or 'Imported board')[:255],
+                                         description=data.get('desc') or '', owner=owner)
+
+        lists = sorted(filter(visible, data.get('lists', [])), key=_position)
+        boards = [Board(project=project, title=(item.get('name') or 'Untitled')[:255], description='', position=rank)
+                  for item, rank in zip(lists, ranks_between(None, None, len(lists)))]
+        Board.objects.bulk_create(boards, batch_size=batch_size)
+        board_ids = {item.get('id'): board.id for item, board in zip(lists, boards)}
+
+        cards_by_board = {}
+        for card in filter(visible, data.get('cards', [])):
+            board_id = board_ids.get(card.get('idList'))
+            if board_id is not None:
+                cards_by_board.setdefault(board_id, []).append(card)
+        tasks = []
+        for board_id, cards in cards_by_board.items():
+            cards.sort(key=_position)
+            for card, rank in zip(cards, ranks_between(None, None, len(cards))):
+                assignee = next((members[m] for m in card.get('idMembers') or () if m in members), None)
+                tasks.append(Task(
+                    title=(card.get('name') or 'Untitled')[:255], description=card.get('desc') or '',
+                    board_id=board_id, project_id=project.id, profile_id=assignee, position=rank,
+                    start_date=_date(card.get('start')), delivery_date=_date(card.get('due')),
+                    status_task=Task.Status.DONE if card.get('dueComplete') else Task.Status.TODO,
+                ))
+        Task.objects.bulk_create(tasks, batch_size=batch_size)
+
+        # The counters a Board save would create, already holding the imported totals.
+        counts = Counter((task.board_id, task.status_task) for task in tasks)
+        BoardTaskCount.objects.bulk_create(
+            [BoardTaskCount(board_id=board.id, project_id=project.id, status_task=status_task,
+                            count=counts[(board.id, status_task)])
+             for board in boards for status_task in Task.Status.values],
+            batch_size=batch_size)
+
+        memberships = [ProjectMembership(project=project, member_id=profile_id)
+                       for profile_id in set(members.values()) - {owner.id}]
+        ProjectMembership.objects.bulk_create(memberships, batch_size=batch_size, ignore_conflicts=True)
+        if memberships:
+            Project.bump_version(project.id)
+            invalidate_project(project.id)
+            revoke_project_claims(Profile.objects.filter(pk__in=[m.member_id for m in memberships])
+                                  .values_list('user_id', flat=True))
+
+    stats.projects.append(project.id)
+    stats.boards += len(boards)
+    stats.tasks += len(tasks)
+    stats.memberships += len(memberships)
+    return project
+
+
+def import_boards(documents, owner, create_users=False, include_archived=False, batch_size=IMPORT_BATCH_SIZE,
+                  progress=None):
+    """Import every board in `documents`, one transaction per board. Returns ImportStats."""
+    stats = ImportStats()
+    resolver = MemberResolver(create_users, batch_size)
+    for data in documents:
+        import_board(data, owner, resolver, stats, include_archived, batch_size)
+        if progress is not None:
+            progress(stats)
+    return stats
@@ -0,0 +1,69 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from boards.models import Profile, Project
+from boards.benchmark import (run_benchmark, run_serialization_benchmark, run_encoding_benchmark, ROUTES, SERVERS,
+                              DATASET_USER_PREFIX)
+
+
+class Command(BaseCommand):
+    help = 'Load-test the API routes in process and write latency, throughput and query counts as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--route', action='append', choices=sorted(ROUTES), dest='routes',
+                            help='Only benchmark this route; may be repeated.')
+        parser.add_argument('--writes', action='store_true', help='Also benchmark routes that modify data.')
+        parser.add_argument('--mixed', action='store_true',
+                            help='Interleave the selected routes as one workload instead of running them in turn.')
+        parser.add_argument('--server', choices=SERVERS, default='wsgi',
+                            help='Serve requests from a thread pool (wsgi) or as tasks on one event loop (asgi).')
+        parser.add_argument('--serialization', type=int, metavar='TASKS',
+                            help='Instead of the routes, compare the CPU time of serializing this many tasks '
+                                 'with TaskSerializer and with the values() fast path.')
+        parser.add_argument('--encoding', type=int, metavar='TASKS',
+                            help='Instead of the routes, time rendering and compressing a task list of this many '
+                                 'tasks and report the bytes sent.')
+        parser.add_argument('--user', help='Username to send requests as (defaults to the first generated owner).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of standard output.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['serialization']:
+                return self.write(run_serialization_benchmark(options['serialization']), options['output'])
+            if options['encoding']:
+                return self.write(run_encoding_benchmark(options['encoding']), options['output'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['user']:
+            profile = Profile.objects.filter(user__username=options['user']).select_related('user').first()
+        else:
+            project = (Project.objects.filter(owner__user__username__startswith=DATASET_USER_PREFIX)
+                       .select_related('owner__user').order_by('id').first())
+            profile = project.owner if project is not None else None
+        if profile is None:
+            raise CommandError('No benchmark user found; pass --user or run generate_dataset first.')
+
+        def progress(name, result):
+            # ASGI runs cannot count queries.
+            queries = '-' if result['queries_mean'] is None else f'{result["queries_mean"]:.1f}'
+            self.stderr.write(f'{name:16} p50 {result["p50_ms"]:8.2f}ms  p95 {result["p95_ms"]:8.2f}ms  '
+                              f'p99 {result["p99_ms"]:8.2f}ms  {result["throughput_rps"]:8.1f} req/s  '
+                              f'{queries:>5} queries  {result["errors"]} errors')
+
+        try:
+            report = run_benchmark(profile, options['requests'], options['concurrency'], options['routes'],
+                                   options['writes'], options['seed'], progress, options['mixed'], options['server'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.write(report, options['output'])
+
+    def write(self, report, path):
+        output = json.dumps(report, indent=2)
+        if path:
+            with open(path, 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Report written to {path}.'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,22 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from boards.changes import compact_changes, get_retention
+from boards.sharding import get_shards, use_shard
+
+
+class Command(BaseCommand):
+    help = 'Compact the project change log: drop superseded entries and expired delete tombstones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=None,
+                            help='Retention window in days (defaults to settings.CHANGE_LOG_RETENTION).')
+
+    def handle(self, *args, **options):
+        retention = timedelta(days=options['days']) if options['days'] is not None else get_retention()
+        superseded = expired = 0
+        for alias in get_shards():
+            with use_shard(alias):
+                counts = compact_changes(retention)
+            superseded, expired = superseded + counts[0], expired + counts[1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {superseded} superseded entries and {expired} expired tombstones.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from boards.benchmark import generate_dataset, DATASET_USER_PREFIX
+
+
+class Command(BaseCommand):
+    help = f'Generate a synthetic dataset of {DATASET_USER_PREFIX}* users, projects, boards and tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--members', type=int, default=5, help='Members per project, owner included.')
+        parser.add_argument('--boards', type=int, default=5, help='Boards per project.')
+        parser.add_argument('--tasks', type=int, default=100, help='Tasks per board.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        def progress(stats):
+            if len(stats.projects) % 10 == 0:
+                self.stdout.write(f'{len(stats.projects)} projects, {stats.tasks} tasks')
+
+        stats = generate_dataset(options['users'], options['projects'], options['members'], options['boards'],
+                                 options['tasks'], options['seed'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(stats.projects)} projects, {stats.boards} boards, {stats.tasks} tasks and '
+            f'{stats.users_created} users in {stats.seconds:.1f}s.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from boards.models import Profile
+from boards.images import needs_thumbnails, render_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Render missing or outdated profile image thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render thumbnails of every profile image.')
+
+    def handle(self, *args, **options):
+        rendered = 0
+        for profile in Profile.objects.exclude(image_profile='').exclude(image_profile__isnull=True).iterator():
+            if options['force'] or needs_thumbnails(profile):
+                thumbnails = render_thumbnails(profile)
+                if not thumbnails.get('sizes'):
+                    self.stderr.write(f'profile {profile.pk}: could not read {profile.image_profile.name}')
+                rendered += 1
+        self.stdout.write(self.style.SUCCESS(f'Rendered thumbnails for {rendered} profiles.'))
@@ -0,0 +1,45 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from boards.models import Profile
+from boards.importer import iter_json_documents, import_boards, IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Import Trello board export JSON files as projects, one transaction per board.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Export files holding a board, an array of boards or '
+                                                     'one board per line; "-" reads standard input.')
+        parser.add_argument('--owner', required=True, help='Username that will own the imported projects.')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create users (without a usable password) for unknown Trello members.')
+        parser.add_argument('--include-archived', action='store_true', help='Also import closed lists and cards.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        owner = Profile.objects.filter(user__username=options['owner']).first()
+        if owner is None:
+            raise CommandError(f'No profile for user {options["owner"]!r}.')
+
+        def documents():
+            for path in options['paths']:
+                if path == '-':
+                    yield from iter_json_documents(sys.stdin)
+                    continue
+                with open(path, encoding='utf-8') as fp:
+                    yield from iter_json_documents(fp)
+
+        def progress(stats):
+            if len(stats.projects) % 100 == 0:
+                self.stdout.write(f'{len(stats.projects)} boards, {stats.tasks} tasks, '
+                                  f'{stats.tasks_per_minute} tasks/min')
+
+        try:
+            stats = import_boards(documents(), owner, options['create_users'], options['include_archived'],
+                                  options['batch_size'], progress)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(stats.projects)} projects, {stats.boards} boards, {stats.tasks} tasks and '
+            f'{stats.memberships} memberships ({stats.users_created} users created) in {stats.seconds:.1f}s, '
+            f'{stats.tasks_per_minute} tasks/min.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from boards.sharding import move_project
+
+
+class Command(BaseCommand):
+    help = 'Move a project and all its rows to another shard; writes to it pause only for the final switch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('shard', help='Target alias from settings.PROJECT_SHARDS.')
+        parser.add_argument('--wait', type=float, default=None,
+                            help='Seconds to hold writes before switching (defaults to settings.PROJECT_SHARD_DIRECTORY_TTL).')
+
+    def handle(self, *args, **options):
+        try:
+            move_project(options['project_id'], options['shard'], options['wait'], log=self.stdout.write)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Project {options["project_id"]} is now on {options["shard"]!r}.'))
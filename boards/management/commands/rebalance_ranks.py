@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+from boards.models import Board, Task
+from boards.ranking import rebalance, get_rebalance_length
+from boards.sharding import get_shards, use_shard
+
+
+class Command(BaseCommand):
+    help = 'Rewrite task and board ranks that have grown longer than the rebalance threshold.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-length', type=int, default=None,
+                            help='Rebalance siblings of any rank longer than this (defaults to settings.RANK_REBALANCE_LENGTH).')
+
+    def handle(self, *args, **options):
+        max_length = options['max_length'] if options['max_length'] is not None else get_rebalance_length()
+        for alias in get_shards():
+            with use_shard(alias):
+                self.rebalance_shard(max_length)
+        self.stdout.write(self.style.SUCCESS('Rebalance finished.'))
+
+    def rebalance_shard(self, max_length):
+        for model, parent_field in ((Board, 'project_id'), (Task, 'board_id')):
+            parent_ids = list(model.objects.annotate(rank_length=Length('position'))
+                              .filter(rank_length__gt=max_length)
+                              .values_list(parent_field, flat=True).distinct())
+            for parent_id in parent_ids:
+                changed = rebalance(model.objects.filter(**{parent_field: parent_id}))
+                self.stdout.write(f'{model._meta.model_name} {parent_field}={parent_id}: {changed} ranks rewritten')
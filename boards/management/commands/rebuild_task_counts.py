@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from boards.counters import find_drift, rebuild_counters
+from boards.sharding import get_shards, use_shard
+
+
+class Command(BaseCommand):
+    help = 'Check the per-board task counters against the tasks table and rebuild any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; exit with an error if any counter is wrong.')
+
+    def handle(self, *args, **options):
+        drift = []
+        for alias in get_shards():
+            with use_shard(alias):
+                drift += find_drift() if options['check'] else rebuild_counters()
+        for board_id, status_task, stored, actual in drift:
+            self.stdout.write(f'board {board_id} {status_task}: stored {stored}, actual {actual}')
+        if options['check'] and drift:
+            raise CommandError(f'{len(drift)} task counters drifted.')
+        verb = 'drifted' if options['check'] else 'rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'{len(drift)} task counters {verb}.'))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from boards.reminders import scan_all_shards
+
+
+class Command(BaseCommand):
+    help = 'Write reminders for open tasks that are due soon or overdue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Tasks read per keyset batch (defaults to settings.REMINDER_SCAN_BATCH_SIZE).')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running and scan again every this many seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            written = scan_all_shards(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {written["due_soon"]} due-soon and {written["overdue"]} overdue reminders.'))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,267 @@
+"""
+Per-route request metrics exposed in the Prometheus text format.
+
+Each process aggregates into plain dicts under one lock. With several worker
+processes, set METRICS_MULTIPROCESS_DIR: every process then writes its
+aggregates to its own file there in the background, and /metrics sums the
+files of all processes, so any worker can answer a scrape. A file that stopped
+being flushed belongs to a process that exited and is deleted on the next scrape.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency by route.', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Size of non-streaming response bodies by route.', SIZE_BUCKETS),
+    'db_queries_per_request': ('Database queries run while handling a request, by route.', QUERY_BUCKETS),
+}
+COUNTERS = {
+    'http_requests_total': 'Requests by route, method and status code.',
+    'db_query_duration_seconds_total': 'Time spent in database queries, by route.',
+}
+
+
+class QueryTimer:
+    """Execute wrapper counting the queries of one request and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def _observe(self, name, labels, value, buckets):
+        series = self._histograms.get((name, labels))
+        if series is None:
+            # One slot per bucket plus +Inf, then sum and count.
+            series = self._histograms[(name, labels)] = [0] * (len(buckets) + 1) + [0.0, 0]
+        series[bisect_left(buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def record_request(self, route, method, status, seconds, size=None, queries=None):
+        labels = (route, method)
+        with self._lock:
+            key = ('http_requests_total', (route, method, str(status)))
+            self._counters[key] = self._counters.get(key, 0) + 1
+            self._observe('http_request_duration_seconds', labels, seconds, LATENCY_BUCKETS)
+            if size is not None:
+                self._observe('http_response_size_bytes', labels, size, SIZE_BUCKETS)
+            if queries is not None:
+                self._observe('db_queries_per_request', labels, queries.count, QUERY_BUCKETS)
+                key = ('db_query_duration_seconds_total', labels)
+                self._counters[key] = self._counters.get(key, 0) + queries.seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def merge_snapshots(snapshots):
+    histograms, counters = {}, {}
+    for snapshot in snapshots:
+        for name, labels, series in snapshot.get('histograms', ()):
+            key = (name, tuple(labels))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], series)]
+            else:
+                histograms[key] = list(series)
+        for name, labels, value in snapshot.get('counters', ()):
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def render(snapshots):
+    """Render merged snapshots in the Prometheus text exposition format."""
+    histograms, counters = merge_snapshots(snapshots)
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        label_names = ('route', 'method', 'status') if name == 'http_requests_total' else ('route', 'method')
+        for (series_name, labels), value in sorted(counters.items()):
+            if series_name == name:
+                lines.append(f'{name}{_labels(label_names, labels)} {value:g}')
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            label_names = ('route', 'method')
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], series):
+                cumulative += count
+                bucket = 'le="%s"' % bound
+                lines.append(f'{name}_bucket{_labels(label_names, labels, bucket)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {series[-2]:g}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {series[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_multiprocess_dir():
+    return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+
+def get_flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+
+
+def get_stale_after():
+    return getattr(settings, 'METRICS_STALE_AFTER', 60)
+
+
+def flush(directory):
+    path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+def collect():
+    """Snapshots of every process sharing the metrics directory, or just this one's."""
+    directory = get_multiprocess_dir()
+    if not directory:
+        return [registry.snapshot()]
+    flush(directory)
+    stale_before = time.time() - get_stale_after()
+    snapshots = []
+    for name in os.listdir(directory):
+        if name.startswith('metrics-') and name.endswith('.json'):
+            path = os.path.join(directory, name)
+            try:
+                # Live processes rewrite their file every flush interval.
+                if os.path.getmtime(path) < stale_before:
+                    os.unlink(path)
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return snapshots
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _run_flusher(directory, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush(directory)
+        except OSError:
+            pass
+
+
+def ensure_flusher():
+    # Started lazily so that each forked worker gets its own thread.
+    global _flusher_pid
+    directory = get_multiprocess_dir()
+    if not directory or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():
+            if _flusher_pid is not None:
+                # Aggregates inherited across a fork belong to the parent's file.
+                registry.reset()
+            os.makedirs(directory, exist_ok=True)
+            threading.Thread(target=_run_flusher, args=(directory, get_flush_interval()),
+                             name='metrics-flush', daemon=True).start()
+            _flusher_pid = os.getpid()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name or match.view_name if match is not None else 'unmatched'
+
+
+def _size(response):
+    return None if response.streaming else len(response.content)
+
+
+class RequestMetricsMiddleware:
+    """Records latency, response size and database usage for every request, keyed by URL name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        ensure_flusher()
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        registry.record_request(_route(request), request.method, response.status_code,
+                                time.perf_counter() - started, _size(response), queries)
+        return response
+
+    async def __acall__(self, request):
+        # Async views reach the database from other threads, so only latency and size are recorded.
+        ensure_flusher()
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        registry.record_request(_route(request), request.method, response.status_code,
+                                time.perf_counter() - started, _size(response))
+        return response
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=403)
+    if not token and not settings.DEBUG:
+        # Route names and traffic are not for anonymous clients of a deployed server.
+        return HttpResponse(status=403)
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+def remove_duplicate_memberships(apps, schema_editor):
+    ProjectMembership = apps.get_model('boards', 'ProjectMembership')
+    seen = set()
+    duplicates = []
+    for pk, project_id, member_id in (ProjectMembership.objects
+                                      .order_by('project_id', 'member_id', '-access_level', 'id')
+                                      .values_list('id', 'project_id', 'member_id')):
+        if (project_id, member_id) in seen:
+            duplicates.append(pk)
+        else:
+            seen.add((project_id, member_id))
+    ProjectMembership.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0002_alter_task_finish_date_alter_task_start_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_memberships, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='projectmembership',
+            index=models.Index(fields=['project', 'access_level'], name='membership_project_access_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'board', 'id'], name='task_project_board_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectmembership',
+            constraint=models.UniqueConstraint(fields=('project', 'member'), name='unique_project_member'),
+        ),
+    ]
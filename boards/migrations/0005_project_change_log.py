@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0004_updated_at_and_project_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='change_log_floor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProjectChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=64)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'create'), ('update', 'update'), ('delete', 'delete')], max_length=16)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='boards.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='change_project_seq_idx'), models.Index(fields=['project', 'model', 'object_id'], name='change_project_object_idx')],
+            },
+        ),
+    ]
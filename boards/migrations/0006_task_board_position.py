@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:14
+
+from django.db import migrations, models
+from boards.ranking import ranks_between
+
+
+def backfill_positions(apps, schema_editor):
+    Board = apps.get_model('boards', 'Board')
+    Task = apps.get_model('boards', 'Task')
+    for model, parent_field in ((Board, 'project_id'), (Task, 'board_id')):
+        parent_ids = model.objects.values_list(parent_field, flat=True).distinct()
+        for parent_id in parent_ids:
+            items = list(model.objects.filter(**{parent_field: parent_id}).order_by('id').only('id'))
+            for item, rank in zip(items, ranks_between(None, None, len(items))):
+                item.position = rank
+            model.objects.bulk_update(items, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0005_project_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['project', 'position'], name='board_project_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'position'], name='task_board_position_idx'),
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
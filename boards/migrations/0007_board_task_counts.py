@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_task_counts(apps, schema_editor):
+    Board = apps.get_model('boards', 'Board')
+    Task = apps.get_model('boards', 'Task')
+    BoardTaskCount = apps.get_model('boards', 'BoardTaskCount')
+    counts = {(row['board_id'], row['status_task']): row['count']
+              for row in Task.objects.values('board_id', 'status_task').annotate(count=models.Count('id'))}
+    BoardTaskCount.objects.bulk_create([
+        BoardTaskCount(board_id=board_id, project_id=project_id, status_task=status_task,
+                       count=counts.get((board_id, status_task), 0))
+        for board_id, project_id in Board.objects.values_list('id', 'project_id')
+        for status_task in ('todo', 'doing', 'suspend', 'done')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0006_task_board_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status_task', models.CharField(choices=[('todo', 'todo'), ('doing', 'doing'), ('suspend', 'suspend'), ('done', 'done')], max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counts', to='boards.board')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counts', to='boards.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'status_task'], name='count_project_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='boardtaskcount',
+            constraint=models.UniqueConstraint(fields=('board', 'status_task'), name='unique_board_status_count'),
+        ),
+        migrations.RunPython(backfill_task_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:20
+
+from django.db import migrations
+
+
+# External-content FTS5 index over boards_task, kept in sync by triggers so that
+# bulk_create/bulk_update and raw updates are indexed as well.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE boards_task_fts USING fts5(
+        title, description, content='boards_task', content_rowid='id', prefix='2 3', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_insert AFTER INSERT ON boards_task BEGIN
+        INSERT INTO boards_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_delete AFTER DELETE ON boards_task BEGIN
+        INSERT INTO boards_task_fts(boards_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_update AFTER UPDATE OF title, description ON boards_task BEGIN
+        INSERT INTO boards_task_fts(boards_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO boards_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    # Title matches weigh ten times as much as description matches.
+    "INSERT INTO boards_task_fts(boards_task_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "INSERT INTO boards_task_fts(boards_task_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS boards_task_fts_update',
+    'DROP TRIGGER IF EXISTS boards_task_fts_delete',
+    'DROP TRIGGER IF EXISTS boards_task_fts_insert',
+    'DROP TABLE IF EXISTS boards_task_fts',
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0007_board_task_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
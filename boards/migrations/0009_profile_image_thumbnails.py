@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0008_task_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+def backfill_directory(apps, schema_editor):
+    # Existing projects stay where they are; new ids are allocated after theirs.
+    db = schema_editor.connection.alias
+    Project = apps.get_model('boards', 'Project')
+    ProjectShard = apps.get_model('boards', 'ProjectShard')
+    ProjectShard.objects.using(db).bulk_create(
+        [ProjectShard(id=project_id, alias=db) for project_id in Project.objects.using(db).values_list('id', flat=True)],
+        batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0009_profile_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=64)),
+                ('frozen', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunPython(backfill_directory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0010_project_shard_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_field', models.CharField(max_length=32)),
+                ('kind', models.CharField(choices=[('due_soon', 'due soon'), ('overdue', 'overdue')], max_length=16)),
+                ('due_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('delivery_date__isnull', False)), fields=['delivery_date', 'id'], name='task_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('delivery_date__isnull', False)), fields=['project', 'delivery_date', 'id'], name='task_project_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('delivery_date__isnull', False)), fields=['profile', 'delivery_date', 'id'], name='task_profile_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('finish_date__isnull', False)), fields=['finish_date', 'id'], name='task_finish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('finish_date__isnull', False)), fields=['project', 'finish_date', 'id'], name='task_project_finish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('finish_date__isnull', False)), fields=['profile', 'finish_date', 'id'], name='task_profile_finish_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_reminders', to='boards.profile'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_reminders', to='boards.project'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='boards.task'),
+        ),
+        migrations.AddIndex(
+            model_name='taskreminder',
+            index=models.Index(fields=['profile', 'id'], name='reminder_profile_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskreminder',
+            index=models.Index(fields=['project', 'id'], name='reminder_project_seq_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskreminder',
+            constraint=models.UniqueConstraint(fields=('task', 'date_field', 'kind', 'due_at'), name='unique_task_reminder'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.utils import timezone
-from django.db import models
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 from django.contrib.auth.models import User
 
 
@@ -9,21 +10,66 @@ class Profile(models.Model):
     profile_name = models.CharField(max_length=255, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
     image_profile = models.ImageField(blank=True, null=True)
+    image_thumbnails = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return str(self.user)
     
     
+class ProjectShard(models.Model):
+    # Global directory, kept in the default database: allocates project ids and records each project's shard.
+    alias = models.CharField(max_length=64)
+    frozen = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.id} | {self.alias}'
+
+    @classmethod
+    def allocate(cls):
+        shards = getattr(settings, 'PROJECT_SHARDS', [DEFAULT_DB_ALIAS])
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            entry = cls.objects.using(DEFAULT_DB_ALIAS).create(alias=shards[0])
+            if shards[entry.id % len(shards)] != entry.alias:
+                entry.alias = shards[entry.id % len(shards)]
+                entry.save(using=DEFAULT_DB_ALIAS, update_fields=['alias'])
+        return entry.id
+
+
+class ProjectScopedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        # Leave the database to save(), which routes by the new row's project (see boards.sharding).
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+
 class Project(models.Model):
     title = models.CharField(max_length=255, blank=False, null=False)
     description = models.TextField(blank=True, null=False)
     owner = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='owned_projects', blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveBigIntegerField(default=0)
+    change_log_floor = models.PositiveBigIntegerField(default=0)
     members = models.ManyToManyField(Profile, through='ProjectMembership', through_fields=('project', 'member'))
 
+    objects = ProjectScopedQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.pk is None:
+            self.pk = ProjectShard.allocate()
+            kwargs['force_insert'] = True
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_version(cls, project_id):
+        # Called whenever a board, task or membership of the project changes.
+        cls.objects.filter(pk=project_id).update(version=models.F('version') + 1, updated_at=timezone.now())
+
 
 class ProjectMembership(models.Model):
     class Access(models.IntegerChoices):
@@ -35,6 +81,16 @@ class ProjectMembership(models.Model):
     access_level = models.IntegerField(choices=Access.choices, default=1)
     created_at = models.DateTimeField(default=timezone.now)
 
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'member'], name='unique_project_member'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'access_level'], name='membership_project_access_idx'),
+        ]
+
     def __str__(self):
         return f'{self.member.user.username} | {self.project.title}'
 
@@ -43,6 +99,15 @@ class Board(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     title = models.CharField(max_length=255, blank=False, null=False)
     description = models.TextField(blank=True, null=False)
+    position = models.CharField(max_length=255, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'position'], name='board_project_position_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -64,8 +129,115 @@ class Task(models.Model):
     finish_date = models.DateTimeField(null=True, blank=True)
     delivery_date = models.DateTimeField(null=True, blank=True)
     status_task = models.CharField(max_length=255, choices=Status.choices, default=Status.TODO)
+    position = models.CharField(max_length=255, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'board', 'id'], name='task_project_board_idx'),
+            models.Index(fields=['board', 'position'], name='task_board_position_idx'),
+            # Due dates are sparse, so these only hold the tasks that have one.
+            models.Index(fields=['delivery_date', 'id'], name='task_delivery_idx',
+                         condition=models.Q(delivery_date__isnull=False)),
+            models.Index(fields=['project', 'delivery_date', 'id'], name='task_project_delivery_idx',
+                         condition=models.Q(delivery_date__isnull=False)),
+            models.Index(fields=['profile', 'delivery_date', 'id'], name='task_profile_delivery_idx',
+                         condition=models.Q(delivery_date__isnull=False)),
+            models.Index(fields=['finish_date', 'id'], name='task_finish_idx',
+                         condition=models.Q(finish_date__isnull=False)),
+            models.Index(fields=['project', 'finish_date', 'id'], name='task_project_finish_idx',
+                         condition=models.Q(finish_date__isnull=False)),
+            models.Index(fields=['profile', 'finish_date', 'id'], name='task_profile_finish_idx',
+                         condition=models.Q(finish_date__isnull=False)),
+        ]
 
     def __str__(self):
         return self.title
-    
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counter_key()
+        return instance
+
+    def remember_counter_key(self):
+        # The (board, status) the task is counted under, so saves can move the count.
+        board_id, status_task = self.__dict__.get('board_id'), self.__dict__.get('status_task')
+        self.counter_key = (board_id, status_task) if board_id is not None and status_task is not None else None
+
+
+class BoardTaskCount(models.Model):
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='task_counts')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_counts')
+    status_task = models.CharField(max_length=255, choices=Task.Status.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'status_task'], name='unique_board_status_count'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'status_task'], name='count_project_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.board_id} | {self.status_task} | {self.count}'
+
+
+class ProjectChange(models.Model):
+    class Action(models.TextChoices):
+        CREATE = 'create', 'create'
+        UPDATE = 'update', 'update'
+        DELETE = 'delete', 'delete'
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='changes')
+    model = models.CharField(max_length=64)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=16, choices=Action.choices)
+    data = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'id'], name='change_project_seq_idx'),
+            models.Index(fields=['project', 'model', 'object_id'], name='change_project_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} | {self.id} | {self.action} {self.model} {self.object_id}'
+
+
+class TaskReminder(models.Model):
+    class Kind(models.TextChoices):
+        DUE_SOON = 'due_soon', 'due soon'
+        OVERDUE = 'overdue', 'overdue'
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_reminders')
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='task_reminders',
+                                blank=True, null=True)
+    date_field = models.CharField(max_length=32)
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    due_at = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = ProjectScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # A rescan writes nothing new; a changed due date gets reminders of its own.
+            models.UniqueConstraint(fields=['task', 'date_field', 'kind', 'due_at'], name='unique_task_reminder'),
+        ]
+        indexes = [
+            models.Index(fields=['profile', 'id'], name='reminder_profile_seq_idx'),
+            models.Index(fields=['project', 'id'], name='reminder_project_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} | {self.kind} {self.date_field} {self.due_at}'
@@ -0,0 +1,267 @@
+"""
+Lexicographic ranks for ordering tasks within a board and boards within a project.
+
+Keys follow the fractional-indexing scheme: an integer part whose first character
+encodes its length, followed by an optional base-62 fraction without trailing
+zeros. Any two keys have another key between them, so moving an item rewrites
+only that item's rank; appends only grow the integer part, which keeps keys short.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from .models import Project, ProjectChange
+from .changes import record_changes
+from .sharding import use_shard
+
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+SMALLEST_INTEGER = 'A' + DIGITS[0] * 26
+REBALANCE_BATCH_SIZE = 500
+
+
+def _integer_length(head):
+    if 'a' <= head <= 'z':
+        return ord(head) - ord('a') + 2
+    if 'A' <= head <= 'Z':
+        return ord('Z') - ord(head) + 2
+    raise ValueError(f'invalid rank head: {head!r}')
+
+
+def _integer_part(key):
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f'invalid rank: {key!r}')
+    return key[:length]
+
+
+def validate_rank(key):
+    if not key or key == SMALLEST_INTEGER:
+        raise ValueError(f'invalid rank: {key!r}')
+    integer = _integer_part(key)
+    if key[len(integer):].endswith(DIGITS[0]):
+        raise ValueError(f'invalid rank: {key!r}')
+
+
+def _midpoint(a, b):
+    # a < b are fractions without trailing zeros; b is None for the upper bound.
+    if b is not None:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[round((digit_a + digit_b) / 2)]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _increment_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[0]
+    if head == 'Z':
+        return 'a' + DIGITS[0]
+    if head == 'z':
+        return None
+    head = chr(ord(head) + 1)
+    if head > 'a':
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def _decrement_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[-1]
+    if head == 'a':
+        return 'Z' + DIGITS[-1]
+    if head == 'A':
+        return None
+    head = chr(ord(head) - 1)
+    if head < 'Z':
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def rank_between(a, b):
+    """Return a rank strictly between a and b; either bound may be None (open)."""
+    if a is not None:
+        validate_rank(a)
+    if b is not None:
+        validate_rank(b)
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f'{a!r} >= {b!r}')
+    if a is None:
+        if b is None:
+            return 'a' + DIGITS[0]
+        integer_b = _integer_part(b)
+        if integer_b == SMALLEST_INTEGER:
+            return integer_b + _midpoint('', b[len(integer_b):])
+        if integer_b < b:
+            return integer_b
+        rank = _decrement_integer(integer_b)
+        if rank is None:
+            raise ValueError('cannot rank below the smallest key')
+        return rank
+    integer_a = _integer_part(a)
+    fraction_a = a[len(integer_a):]
+    if b is None:
+        rank = _increment_integer(integer_a)
+        return rank if rank is not None else integer_a + _midpoint(fraction_a, None)
+    integer_b = _integer_part(b)
+    if integer_a == integer_b:
+        return integer_a + _midpoint(fraction_a, b[len(integer_b):])
+    rank = _increment_integer(integer_a)
+    if rank is not None and rank < b:
+        return rank
+    return integer_a + _midpoint(fraction_a, None)
+
+
+def ranks_between(a, b, n):
+    """Return n ascending ranks strictly between a and b."""
+    if n == 0:
+        return []
+    if n == 1:
+        return [rank_between(a, b)]
+    if b is None:
+        ranks = [rank_between(a, None)]
+        for _ in range(n - 1):
+            ranks.append(rank_between(ranks[-1], None))
+        return ranks
+    if a is None:
+        ranks = [rank_between(None, b)]
+        for _ in range(n - 1):
+            ranks.append(rank_between(None, ranks[-1]))
+        return ranks[::-1]
+    middle = n // 2
+    c = rank_between(a, b)
+    return ranks_between(a, c, middle) + [c] + ranks_between(c, b, n - middle - 1)
+
+
+def last_rank(siblings):
+    return siblings.order_by('-position').values_list('position', flat=True).first() or None
+
+
+def parse_id(value):
+    """A row id from request data: an integer, a string of digits or None. Raises ValueError otherwise."""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value < 2 ** 63:
+        raise ValueError(f'invalid id: {value!r}')
+    return value
+
+
+def rank_among(siblings, after_id=None, before_id=None):
+    """
+    Rank that places an item right after `after_id` and/or right before
+    `before_id` among `siblings`, or at the end when neither is given.
+    Raises ValueError when a neighbour is unknown or the neighbours are not adjacent in order.
+    """
+    after_id, before_id = parse_id(after_id), parse_id(before_id)
+    neighbour_ids = [pk for pk in (after_id, before_id) if pk is not None]
+    positions = dict(siblings.filter(pk__in=neighbour_ids).values_list('pk', 'position')) if neighbour_ids else {}
+    if len(positions) != len(neighbour_ids):
+        raise ValueError('unknown neighbour')
+    after, before = positions.get(after_id) or None, positions.get(before_id) or None
+    if after_id is None and before_id is None:
+        after = last_rank(siblings)
+    elif before_id is None:
+        before = (siblings.filter(position__gt=after).order_by('position')
+                  .values_list('position', flat=True).first())
+    elif after_id is None:
+        after = (siblings.filter(position__lt=before).order_by('-position')
+                 .values_list('position', flat=True).first())
+    return rank_between(after, before)
+
+
+def _write_ranks(model, items, read_positions, now):
+    """Store the items' new ranks where the rank is still the one read; returns the items written."""
+    unmoved = {item.pk: Q(pk=item.pk, position=read_positions[item.pk]) for item in items}
+    model.objects.filter(pk__in=unmoved).update(
+        position=Case(*[When(unmoved[item.pk], then=Value(item.position)) for item in items], default=F('position')),
+        updated_at=Case(*[When(condition, then=Value(now)) for condition in unmoved.values()],
+                        default=F('updated_at')))
+    written = dict(model.objects.filter(pk__in=unmoved).values_list('pk', 'position'))
+    return [item for item in items if written.get(item.pk) == item.position]
+
+
+def rebalance(siblings):
+    """
+    Rewrite the siblings' ranks as short, evenly spread keys, keeping their order.
+    The moved rows are logged and their project's version bumped, so cached pages
+    and clients following the change feed pick up the new positions.
+
+    A row moved by a request between the read and the write keeps the rank that
+    request gave it; the update only applies to positions that are still the ones read.
+    """
+    with transaction.atomic(using=router.db_for_write(siblings.model)):
+        items = list(siblings.order_by('position', 'id'))
+        read_positions = {item.pk: item.position for item in items}
+        now = timezone.now()
+        moved = []
+        for item, rank in zip(items, ranks_between(None, None, len(items))):
+            if item.position != rank:
+                item.position = rank
+                item.updated_at = now
+                moved.append(item)
+        changed = []
+        for start in range(0, len(moved), REBALANCE_BATCH_SIZE):
+            changed += _write_ranks(siblings.model, moved[start:start + REBALANCE_BATCH_SIZE], read_positions, now)
+        if changed:
+            for project_id in {item.project_id for item in changed}:
+                Project.bump_version(project_id)
+            record_changes(changed, ProjectChange.Action.UPDATE)
+    return len(changed)
+
+
+def get_rebalance_length():
+    return getattr(settings, 'RANK_REBALANCE_LENGTH', 24)
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rank-rebalance')
+_pending = set()
+_pending_lock = Lock()
+
+
+def _run_rebalance(model, parent_field, parent_id, using):
+    try:
+        with use_shard(using):
+            rebalance(model.objects.filter(**{parent_field: parent_id}))
+    finally:
+        with _pending_lock:
+            _pending.discard((model, parent_id))
+        connection.close()
+        connections[using].close()
+
+
+def schedule_rebalance(model, parent_field, parent_id):
+    """Rebalance one board's tasks or one project's boards on the background worker, once per parent."""
+    with _pending_lock:
+        if (model, parent_id) in _pending:
+            return
+        _pending.add((model, parent_id))
+    # The worker has no request to route by, so hand it the database the parent's rows are in.
+    using = router.db_for_write(model)
+    transaction.on_commit(lambda: _executor.submit(_run_rebalance, model, parent_field, parent_id, using),
+                          using=using)
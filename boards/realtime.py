@@ -0,0 +1,84 @@
+import asyncio
+from threading import Lock
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+SUBSCRIPTION_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """One listener on a project's events, bound to the event loop that created it."""
+
+    def __init__(self, broker, project_id, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        self.broker = broker
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # May be called from any thread, e.g. a sync view running a post_save receiver.
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan project events out to subscribers in this process. Replace it through
+    settings.REALTIME_BROKER with a class exposing the same subscribe/unsubscribe/
+    publish methods to go through an external broker.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = Lock()
+
+    def subscribe(self, project_id):
+        subscription = Subscription(self, project_id)
+        with self._lock:
+            self._subscriptions.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.project_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.project_id]
+
+    def subscriber_count(self, project_id):
+        return len(self._subscriptions.get(project_id, ()))
+
+    def publish(self, project_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(project_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+        return len(subscriptions)
+
+
+_broker = None
+_broker_lock = Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, 'REALTIME_BROKER', 'boards.realtime.InProcessBroker')
+                _broker = import_string(broker_path)()
+    return _broker
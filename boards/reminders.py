@@ -0,0 +1,248 @@
+"""
+Due and overdue tasks, and the reminders written for them.
+
+A task is due by its delivery_date or its finish_date; tasks that are done are
+never due. The queries read the partial due-date indexes in (due date, id)
+order, so they only touch tasks that have a due date in the requested range.
+
+scan_reminders walks the tasks that fell due within the overdue lookback and
+those coming due within the due-soon window in keyset batches, and bulk-writes
+a TaskReminder for each one not reminded yet. It runs from the scan_reminders
+command, or every REMINDER_SCAN_INTERVAL seconds in each server process; the
+unique reminder constraint makes overlapping or repeated scans harmless.
+"""
+import base64
+import binascii
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.utils import timezone
+from .models import Profile, ProjectMembership, Task, TaskReminder
+from .ranking import parse_id
+from .sharding import get_shards, sharding_enabled, project_db, use_shard, ProjectMoving
+
+
+logger = logging.getLogger(__name__)
+
+DUE_DATE_FIELDS = ('delivery_date', 'finish_date')
+DUE_PAGE_SIZE = 50
+DUE_MAX_PAGE_SIZE = 200
+DUE_MAX_WITHIN_DAYS = 3660
+
+
+def get_due_soon_window():
+    return getattr(settings, 'REMINDER_DUE_SOON_WINDOW', timedelta(days=1))
+
+
+def get_overdue_lookback():
+    return getattr(settings, 'REMINDER_OVERDUE_LOOKBACK', timedelta(days=7))
+
+
+def get_scan_batch_size():
+    return getattr(settings, 'REMINDER_SCAN_BATCH_SIZE', 500)
+
+
+def get_scan_interval():
+    return getattr(settings, 'REMINDER_SCAN_INTERVAL', None)
+
+
+def open_tasks(field, start=None, end=None):
+    """Tasks not done whose `field` is set and falls in [start, end)."""
+    lookups = {f'{field}__isnull': False}
+    if start is not None:
+        lookups[f'{field}__gte'] = start
+    if end is not None:
+        lookups[f'{field}__lt'] = end
+    return Task.objects.filter(**lookups).exclude(status_task=Task.Status.DONE)
+
+
+def _after(field, position):
+    due, task_id = position
+    return Q(**{f'{field}__gt': due}) | Q(**{field: due, 'id__gt': task_id})
+
+
+def _page(tasks, field, after, limit):
+    if after is not None:
+        tasks = tasks.filter(_after(field, after))
+    return list(tasks.order_by(field, 'id')[:limit])
+
+
+def encode_cursor(position):
+    due, task_id = position
+    return base64.urlsafe_b64encode(json.dumps([due.isoformat(), task_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        due, task_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(due), parse_id(task_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('invalid cursor')
+
+
+def _next_position(tasks, field, limit):
+    if len(tasks) <= limit:
+        return tasks, None
+    last = tasks[limit - 1]
+    return tasks[:limit], (getattr(last, field), last.id)
+
+
+def due_query(params, now=None):
+    """
+    Read the date, within (days), overdue, cursor and limit query parameters into
+    keyword arguments for project_due_tasks/user_due_tasks. Raises ValueError.
+    """
+    field = params.get('date', 'delivery_date')
+    if field not in DUE_DATE_FIELDS:
+        raise ValueError('unknown date field')
+    now = now or timezone.now()
+    if params.get('overdue') in ('1', 'true'):
+        until = now
+    elif 'within' in params:
+        within = float(params['within'])
+        # Also rejects nan and inf, which timedelta cannot hold.
+        if not -DUE_MAX_WITHIN_DAYS <= within <= DUE_MAX_WITHIN_DAYS:
+            raise ValueError('within out of range')
+        until = now + timedelta(days=within)
+    else:
+        until = now + get_due_soon_window()
+    limit = min(int(params.get('limit', DUE_PAGE_SIZE)), DUE_MAX_PAGE_SIZE)
+    after = decode_cursor(params['cursor']) if params.get('cursor') else None
+    return {'field': field, 'until': until, 'after': after, 'limit': max(limit, 1)}
+
+
+def project_due_tasks(project, field='delivery_date', until=None, after=None, limit=DUE_PAGE_SIZE):
+    """
+    Return (tasks, next_position) for the project's open tasks due before `until`,
+    overdue ones first, continuing after the (due date, id) position `after`.
+    """
+    tasks = open_tasks(field, end=until).filter(project_id=project.id)
+    return _next_position(_page(tasks, field, after, limit + 1), field, limit)
+
+
+def user_due_tasks(user_id, field='delivery_date', until=None, after=None, limit=DUE_PAGE_SIZE):
+    """project_due_tasks for the open tasks assigned to the user in the projects they belong to."""
+    profile_id = Profile.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+    if profile_id is None:
+        return [], None
+    # Like search_tasks: every shard is read and the earliest tasks of all of them are merged.
+    aliases = get_shards() if sharding_enabled() else [router.db_for_read(Task)]
+    tasks = []
+    for alias in aliases:
+        project_ids = ProjectMembership.objects.using(alias).filter(member_id=profile_id).values('project_id')
+        found = _page(open_tasks(field, end=until).using(alias).filter(profile_id=profile_id,
+                                                                         project_id__in=project_ids),
+                      field, after, limit + 1)
+        tasks += [task for task in found if len(aliases) == 1 or project_db(task.project_id) == alias]
+    tasks.sort(key=lambda task: (getattr(task, field), task.id))
+    return _next_position(tasks, field, limit)
+
+
+def user_reminders(user_id, before=None, limit=DUE_PAGE_SIZE):
+    """Return (reminders, next_before) for the user's reminders, newest first."""
+    profile_id = Profile.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+    if profile_id is None:
+        return [], None
+    aliases = get_shards() if sharding_enabled() else [router.db_for_read(TaskReminder)]
+    reminders = []
+    for alias in aliases:
+        found = TaskReminder.objects.using(alias).filter(profile_id=profile_id)
+        if before is not None:
+            found = found.filter(id__lt=before)
+        reminders += [reminder for reminder in found.order_by('-id')[:limit + 1]
+                      if len(aliases) == 1 or project_db(reminder.project_id) == alias]
+    reminders.sort(key=lambda reminder: reminder.id, reverse=True)
+    if len(reminders) <= limit:
+        return reminders, None
+    return reminders[:limit], reminders[limit - 1].id
+
+
+def _writable(project_id, alias):
+    if not sharding_enabled():
+        return True
+    try:
+        return project_db(project_id, for_write=True) == alias
+    except ProjectMoving:
+        # Left for the scan after the move; the scanned ranges overlap.
+        return False
+
+
+def _write_reminders(alias, field, kind, rows):
+    sent = set(TaskReminder.objects.filter(task_id__in=[row[0] for row in rows], date_field=field, kind=kind)
+               .values_list('task_id', 'due_at'))
+    reminders = [TaskReminder(task_id=task_id, project_id=project_id, profile_id=profile_id, date_field=field,
+                              kind=kind, due_at=due_at)
+                 for task_id, project_id, profile_id, due_at in rows
+                 if (task_id, due_at) not in sent and _writable(project_id, alias)]
+    TaskReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+    return len(reminders)
+
+
+def _scan_range(alias, field, kind, start, end, batch_size):
+    tasks = open_tasks(field, start, end).order_by(field, 'id').values_list('id', 'project_id', 'profile_id', field)
+    written = 0
+    after = None
+    while True:
+        rows = list((tasks.filter(_after(field, after)) if after is not None else tasks)[:batch_size])
+        if rows:
+            written += _write_reminders(alias, field, kind, rows)
+        if len(rows) < batch_size:
+            return written
+        after = rows[-1][3], rows[-1][0]
+
+
+def scan_reminders(alias, now=None, batch_size=None):
+    """Write the reminders due on one shard; returns {kind: reminders written}."""
+    now = now or timezone.now()
+    batch_size = batch_size or get_scan_batch_size()
+    ranges = ((TaskReminder.Kind.OVERDUE, now - get_overdue_lookback(), now),
+              (TaskReminder.Kind.DUE_SOON, now, now + get_due_soon_window()))
+    written = dict.fromkeys(TaskReminder.Kind.values, 0)
+    with use_shard(alias):
+        for field in DUE_DATE_FIELDS:
+            for kind, start, end in ranges:
+                written[kind] += _scan_range(alias, field, kind, start, end, batch_size)
+    return written
+
+
+def scan_all_shards(now=None, batch_size=None):
+    written = dict.fromkeys(TaskReminder.Kind.values, 0)
+    for alias in get_shards():
+        for kind, count in scan_reminders(alias, now, batch_size).items():
+            written[kind] += count
+    return written
+
+
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def _run_scheduler(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            scan_all_shards()
+        except Exception:
+            # The next scan covers the same ranges, so the thread keeps going.
+            logger.exception('Reminder scan failed')
+        finally:
+            for connection in connections.all(initialized_only=True):
+                connection.close()
+
+
+def ensure_scheduler():
+    # Started lazily, like the metrics flusher, so that each forked worker gets its own thread.
+    global _scheduler_pid
+    interval = get_scan_interval()
+    if not interval or _scheduler_pid == os.getpid():
+        return
+    with _scheduler_lock:
+        if _scheduler_pid != os.getpid():
+            threading.Thread(target=_run_scheduler, args=(interval,), name='reminder-scan', daemon=True).start()
+            _scheduler_pid = os.getpid()
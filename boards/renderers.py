@@ -0,0 +1,58 @@
+"""
+JSON renderer and parser backed by orjson when it is installed, with the
+stdlib doing the work otherwise. Output matches DRF's JSONRenderer with the
+default compact, UTF-8 settings: values orjson has no rule for (datetimes,
+Decimals, lazy strings, ...) go through DRF's own encoder, and anything orjson
+rejects (e.g. integers beyond 64 bits) or an indented rendering falls back to
+the stdlib. Unlike the stdlib, orjson writes NaN and infinities as null and
+spells some floats differently (1e16, not 1e+16).
+"""
+import codecs
+import io
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def fast_json_available():
+    return orjson is not None and getattr(settings, 'FAST_JSON', True)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (not fast_json_available() or self.encoder_class is not JSONEncoder or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer: these are valid JSON but not valid JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json_available() or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # The stdlib decides, with JSONParser's error messages.
+            return super().parse(io.BytesIO(body), media_type, parser_context)
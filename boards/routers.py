@@ -0,0 +1,112 @@
+"""
+Read/write splitting across the primary ('default') and the replica aliases
+listed in settings.DATABASE_REPLICAS.
+
+Reads go to a random replica until something writes: from then on the rest
+of the request reads from the primary, and ReplicaPinningMiddleware sets a
+short-lived cookie so the client's next requests do too and see their own
+writes despite replication lag. Reads inside a transaction on the primary
+also stay on the primary.
+"""
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_COOKIE = 'primary_pin'
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('database_routing_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def get_pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def _current_state():
+    state = _state.get()
+    if state is None:
+        state = RoutingState()
+        _state.set(state)
+    return state
+
+
+def pin_to_primary():
+    """Send the reads that follow in this context to the primary."""
+    _current_state().pinned = True
+
+
+class ReadWriteRouter:
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas:
+            return None
+        state = _state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _current_state()
+        state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=request.COOKIES.get(PIN_COOKIE) == '1')
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        # The ORM's sync threads run in copies of this context and share the state object.
+        state = RoutingState(pinned=request.COOKIES.get(PIN_COOKIE) == '1')
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(state, response)
+
+    def pin(self, state, response):
+        if state.wrote and get_replicas():
+            response.set_cookie(PIN_COOKIE, '1', max_age=get_pin_seconds(), httponly=True, samesite='Lax')
+        return response
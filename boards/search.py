@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+import math
+import re
+from django.db import connections, router
+from django.db.models import Q
+from .models import Profile, ProjectMembership, Task
+from .ranking import parse_id
+from .sharding import get_shards, sharding_enabled, project_db
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+FTS_SEARCH_SQL = """
+    SELECT task.id, fts.rank, task.project_id
+    FROM boards_task_fts AS fts
+    JOIN boards_task AS task ON task.id = fts.rowid
+    WHERE boards_task_fts MATCH %s
+      AND task.project_id IN (
+          SELECT membership.project_id
+          FROM boards_projectmembership AS membership
+          {member}
+      )
+      {after}
+    ORDER BY fts.rank, task.id
+    LIMIT %s
+"""
+FTS_MEMBER_SQL = {
+    'user': 'JOIN boards_profile AS profile ON profile.id = membership.member_id WHERE profile.user_id = %s',
+    # Shards hold no profiles, so the caller resolves the profile id first.
+    'profile': 'WHERE membership.member_id = %s',
+}
+FTS_AFTER_SQL = 'AND (fts.rank > %s OR (fts.rank = %s AND task.id > %s))'
+
+
+def match_expression(text):
+    """Quote every word of the user's text as an FTS5 prefix query; None if there is nothing to search."""
+    tokens = re.findall(r'\w+', text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+# (rank, id) of the last result: a snapshot position, see search_tasks.
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        rank, task_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        rank = float(rank)
+        if not math.isfinite(rank):
+            raise ValueError('rank out of range')
+        return rank, parse_id(task_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('invalid cursor')
+
+
+def _fts_search(connection, member, expression, after, limit):
+    params = [expression, member[1]]
+    if after is not None:
+        params += [after[0], after[0], after[1]]
+    params.append(limit)
+    sql = FTS_SEARCH_SQL.format(member=FTS_MEMBER_SQL[member[0]], after=FTS_AFTER_SQL if after is not None else '')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _fallback_search(alias, member, text, after, limit):
+    # Without FTS5 (non-SQLite databases) fall back to a scoped substring scan ordered by id.
+    lookup = 'member__user_id' if member[0] == 'user' else 'member_id'
+    project_ids = ProjectMembership.objects.using(alias).filter(**{lookup: member[1]}).values('project_id')
+    tasks = (Task.objects.using(alias).filter(project_id__in=project_ids)
+             .filter(Q(title__icontains=text) | Q(description__icontains=text)))
+    if after is not None:
+        tasks = tasks.filter(id__gt=after[1])
+    return [(task_id, 0.0, project_id)
+            for task_id, project_id in tasks.order_by('id').values_list('id', 'project_id')[:limit]]
+
+
+def search_tasks(user_id, text, cursor=None, limit=SEARCH_PAGE_SIZE):
+    """
+    Return (tasks, next_cursor) for the best matches of `text` among tasks in the
+    user's projects, ordered by relevance. Raises ValueError on an empty query or bad cursor.
+
+    The cursor is the last result's (bm25 rank, id). Ranks depend on corpus-wide
+    statistics, so any task insert, update or delete shifts them: the cursor is
+    only exact while the searched tasks are unchanged, and a page fetched after a
+    change may repeat or skip results. Clients that need a stable listing should
+    page by id or updated_at (e.g. the task list or the change feed) instead.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        raise ValueError('empty query')
+    after = decode_cursor(cursor) if cursor else None
+    if sharding_enabled():
+        # Every shard is searched and the best matches of all of them are merged.
+        aliases = get_shards()
+        member = ('profile', Profile.objects.filter(user_id=user_id).values_list('id', flat=True).first())
+    else:
+        aliases = [router.db_for_read(Task)]
+        member = ('user', user_id)
+    rows = []
+    for alias in aliases:
+        connection = connections[alias]
+        if connection.vendor == 'sqlite':
+            found = _fts_search(connection, member, expression, after, limit + 1)
+        else:
+            found = _fallback_search(alias, member, text, after, limit + 1)
+        # A project being copied to another shard is only found where the directory places it.
+        rows += [(task_id, rank, alias) for task_id, rank, project_id in found
+                 if len(aliases) == 1 or project_db(project_id) == alias]
+    rows.sort(key=lambda row: (row[1], row[0]))
+    next_cursor = None
+    if len(rows) > limit:
+        task_id, rank, _ = rows[limit - 1]
+        next_cursor = encode_cursor([rank, task_id])
+    rows = rows[:limit]
+    tasks = {}
+    for alias in {alias for _, _, alias in rows}:
+        tasks.update(Task.objects.using(alias).in_bulk([task_id for task_id, _, row_alias in rows if row_alias == alias]))
+    return [tasks[task_id] for task_id, _, _ in rows if task_id in tasks], next_cursor
@@ -1,13 +1,38 @@
-from rest_framework import serializers
-from .models import Profile, Project, Task, Board, ProjectMembership
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connections
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Profile, Project, Task, Board, ProjectMembership, ProjectChange, TaskReminder
 from django.contrib.auth.models import User
+from .counters import board_counts, project_counts
+from .images import get_thumbnail_sizes
+from django.core.files.storage import default_storage
 
 
 
 class ProfileSerializer(serializers.ModelSerializer):
+    image_thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['id', 'profile_name', 'bio', 'image_profile']
+        fields = ['id', 'profile_name', 'bio', 'image_profile', 'image_thumbnails']
+
+    def get_image_thumbnails(self, obj):
+        # Sizes still being rendered fall back to the original upload.
+        if not obj.image_profile:
+            return None
+        request = self.context.get('request')
+        names = (obj.image_thumbnails or {}).get('sizes', {})
+        urls = {}
+        for size in get_thumbnail_sizes():
+            url = default_storage.url(names[size]) if size in names else obj.image_profile.url
+            urls[size] = request.build_absolute_uri(url) if request is not None else url
+        return urls
     
 
 class UserSerializer(serializers.ModelSerializer):
@@ -32,22 +57,32 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ProjectListSerializer(serializers.ModelSerializer):
+    members = serializers.SerializerMethodField()
+
+    def get_members(self, obj):
+        # Read through the memberships, which are stored with the project, rather than joining profiles.
+        return [membership.member_id for membership in obj.projectmembership_set.all()]
+
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['updated_at', 'version', 'change_log_floor']
 
 
 class ProjectSerializer(serializers.ModelSerializer):
     owner = ProfileSerializer(read_only=True)
     members = serializers.SerializerMethodField()
+    task_counts = serializers.SerializerMethodField()
 
     def get_members(self, obj):
-        queryset = ProjectMembership.objects.filter(project=obj)
-        return ProjectMembershipSerializer(queryset, many=True).data
+        # Reads the prefetch cache when the view prefetched projectmembership_set.
+        return ProjectMembershipSerializer(obj.projectmembership_set.all(), many=True).data
+
+    def get_task_counts(self, obj):
+        return project_counts(obj.id)
 
     class Meta:
         model = Project
-        fields = ['id','owner','title','description','members']
+        fields = ['id','owner','title','description','members','task_counts']
         read_only_fields = ['owner']
 
 
@@ -62,12 +97,165 @@ class ProjectMembershipSerializer(serializers.ModelSerializer):
     
     
 class BoardSerializer(serializers.ModelSerializer):
+    task_counts = serializers.SerializerMethodField()
+
+    def get_task_counts(self, obj):
+        # Views that already counted the board's tasks pass the counts in the context.
+        if 'task_counts' in self.context:
+            return self.context['task_counts']
+        return board_counts(obj)
+
     class Meta:
         model = Board
-        fields = '__all__'
+        # Listed so that new model columns stay out of the API until added here. position orders boards
+        # and updated_at lets clients compare copies; both are read-only.
+        fields = ['id', 'task_counts', 'title', 'description', 'position', 'updated_at', 'project']
+        read_only_fields = ['position']
 
 
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = '__all__'
\ No newline at end of file
+        # Listed like BoardSerializer's; position orders tasks within a board.
+        fields = ['id', 'title', 'description', 'start_date', 'finish_date', 'delivery_date', 'status_task',
+                  'position', 'updated_at', 'board', 'project', 'profile']
+        read_only_fields = ['position']
+
+
+class ProjectChangeSerializer(serializers.ModelSerializer):
+    seq = serializers.IntegerField(source='id')
+
+    class Meta:
+        model = ProjectChange
+        fields = ['seq', 'model', 'object_id', 'action', 'data', 'created_at']
+
+
+class TaskReminderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskReminder
+        fields = ['id', 'task', 'project', 'date_field', 'kind', 'due_at', 'created_at']
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve pks from context['preloaded'][field_name] instead of one query per value."""
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return preloaded[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class TaskBulkSerializer(TaskSerializer):
+    board = PreloadedPrimaryKeyRelatedField(queryset=Board.objects.all())
+    project = PreloadedPrimaryKeyRelatedField(queryset=Project.objects.all())
+    profile = PreloadedPrimaryKeyRelatedField(queryset=Profile.objects.all(), allow_null=True, required=False)
+
+
+class RowSerializer:
+    """
+    Read-only fast path for a ModelSerializer on list endpoints. Rows fetched
+    with values() become the serializer's output dicts, fields in the same order
+    and values converted the same way, through converters compiled once from the
+    serializer's fields instead of model instances and field lookups per row.
+    Method fields are given per row by the caller.
+    """
+    # Serializer fields that return the values of these model columns unchanged.
+    UNCHANGED = (
+        (serializers.CharField, ('CharField', 'TextField')),
+        (serializers.ChoiceField, ('CharField',)),
+        (serializers.IntegerField, ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField',
+                                    'PositiveIntegerField', 'PositiveBigIntegerField')),
+    )
+    DATETIME = 'datetime'
+
+    def __init__(self, serializer_class, method_fields=()):
+        self.serializer_class = serializer_class
+        self.method_fields = tuple(method_fields)
+
+    @cached_property
+    def plan(self):
+        """[(output name, values() column, converter)]; no converter for unchanged values, DATETIME for datetimes."""
+        meta = self.serializer_class.Meta.model._meta
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in self.method_fields:
+                plan.append((name, None, None))
+            elif '.' in field.source or field.source == '*' or isinstance(field, serializers.BaseSerializer):
+                raise ValueError(f'{self.serializer_class.__name__}.{name} cannot be read from values() rows.')
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                plan.append((name, meta.get_field(field.source).attname, None))
+            elif (isinstance(field, serializers.DateTimeField) and settings.USE_TZ and not hasattr(field, 'timezone')
+                  and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601):
+                plan.append((name, field.source, self.DATETIME))
+            else:
+                column = meta.get_field(field.source).get_internal_type()
+                unchanged = any(isinstance(field, field_class) and column in columns
+                                for field_class, columns in self.UNCHANGED)
+                plan.append((name, field.source, None if unchanged else field.to_representation))
+        return plan
+
+    def values(self, queryset):
+        columns = [column for _, column, convert in self.plan if column is not None and convert != self.DATETIME]
+        datetimes = [column for _, column, convert in self.plan if convert == self.DATETIME]
+        connection = connections[queryset.db]
+        if connection.vendor == 'sqlite' and connection.timezone_name == 'UTC':
+            # SQLite stores datetimes as UTC text; reading the text skips parsing it only to format it again.
+            return queryset.values(*columns, **{_text_column(column): Cast(column, TextField())
+                                                for column in datetimes})
+        return queryset.values(*columns, *datetimes)
+
+    def to_representation(self, rows, **method_fields):
+        """`method_fields` maps each method field to a function of the row."""
+        rows = list(rows)
+        datetime_to_iso = _datetime_to_iso(timezone.get_current_timezone())
+        plan = []
+        for name, column, convert in self.plan:
+            if convert == self.DATETIME:
+                convert = datetime_to_iso
+                if rows and column not in rows[0]:
+                    column = _text_column(column)
+            plan.append((name, column, convert, method_fields.get(name)))
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert, method in plan:
+                if method is not None:
+                    item[name] = method(row)
+                else:
+                    value = row[column]
+                    # Like Serializer.to_representation, None is never converted.
+                    item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+
+def _text_column(column):
+    return f'{column}_text'
+
+
+def _datetime_to_iso(tz):
+    """DateTimeField.to_representation for ISO 8601 output, with the current timezone looked up once."""
+    utc = getattr(tz, 'key', None) == 'UTC' or tz is dt_timezone.utc
+
+    def convert(value):
+        if isinstance(value, str):
+            if utc and len(value) in (19, 26) and value[10] == ' ':
+                return f'{value[:10]}T{value[11:]}Z'
+            value = datetime.fromisoformat(value).replace(tzinfo=dt_timezone.utc)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+TASK_ROWS = RowSerializer(TaskSerializer)
+BOARD_ROWS = RowSerializer(BoardSerializer, method_fields=['task_counts'])
@@ -0,0 +1,376 @@
+"""
+Project-sharded storage. Every project lives, together with its boards,
+tasks, memberships, task counters, reminders and change log, on one of the database
+aliases listed in settings.PROJECT_SHARDS; users, profiles and the
+ProjectShard directory stay in 'default'.
+
+The directory allocates project ids and records each project's shard, so a
+project can move between shards (see move_project). ProjectShardRouter sends
+queries on project rows to the project's shard: by the project of the
+instance they concern, else by the project the request is about, which
+ProjectShardMiddleware takes from the URL, else by the shard activated with
+use_shard() for maintenance work over a whole shard.
+
+Shards carry the full schema with foreign key enforcement off, since their
+rows point at profiles in 'default', and each allocates ids from its own
+block so that rows keep their ids when their project moves.
+"""
+import time
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.db.models.functions import Greatest
+from django.http import JsonResponse
+from .models import ProjectShard, Project, ProjectMembership, Board, Task, BoardTaskCount, ProjectChange, TaskReminder
+
+
+SHARDED_MODELS = ('boards.project', 'boards.board', 'boards.task', 'boards.projectmembership',
+                  'boards.boardtaskcount', 'boards.projectchange', 'boards.taskreminder')
+SHARD_DIRECTORY_MAX_ENTRIES = 100000
+MOVE_RETRY_AFTER = 5
+# Parents first, so the rows satisfy foreign keys on a target that enforces them.
+MOVED_MODELS = (Project, Board, ProjectMembership, Task, BoardTaskCount, TaskReminder)
+MOVE_BATCH_SIZE = 1000
+MOVE_CATCH_UP_ROUNDS = 5
+# Catch-up rounds stop once a round replays no more changed rows than this; the rest is copied frozen.
+MOVE_FREEZE_THRESHOLD = 100
+
+
+class ProjectMoving(Exception):
+    """A write reached a project that is frozen while it moves to another shard."""
+
+
+_project = ContextVar('sharding_project', default=None)
+_shard = ContextVar('sharding_shard', default=None)
+
+# {project_id: (alias, frozen, expires_at)}
+_directory = {}
+_directory_lock = Lock()
+
+
+def get_shards():
+    return list(getattr(settings, 'PROJECT_SHARDS', [DEFAULT_DB_ALIAS]))
+
+
+def sharding_enabled():
+    return get_shards() != [DEFAULT_DB_ALIAS]
+
+
+def get_directory_ttl():
+    return getattr(settings, 'PROJECT_SHARD_DIRECTORY_TTL', 30)
+
+
+def get_id_block():
+    return getattr(settings, 'PROJECT_SHARD_ID_BLOCK', 10 ** 12)
+
+
+def is_sharded(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def _lookup(project_id):
+    entry = _directory.get(project_id)
+    if entry is None or entry[2] < time.monotonic():
+        row = (ProjectShard.objects.using(DEFAULT_DB_ALIAS).filter(pk=project_id)
+               .values_list('alias', 'frozen').first())
+        # Projects without an entry predate the directory and live in 'default'.
+        alias, frozen = row or (DEFAULT_DB_ALIAS, False)
+        entry = (alias, frozen, time.monotonic() + get_directory_ttl())
+        with _directory_lock:
+            if len(_directory) >= SHARD_DIRECTORY_MAX_ENTRIES:
+                _directory.clear()
+            _directory[project_id] = entry
+    return entry
+
+
+def forget_project(project_id):
+    with _directory_lock:
+        _directory.pop(int(project_id), None)
+
+
+def project_db(project_id, for_write=False):
+    """The alias holding the project's rows, or None when sharding is off and the other routers decide."""
+    if project_id is None or not sharding_enabled():
+        return None
+    alias, frozen, _ = _lookup(int(project_id))
+    if for_write and frozen:
+        raise ProjectMoving(project_id)
+    return alias
+
+
+def joins_global(project_id):
+    """Whether queries on the project's rows can join profiles and users in the same database."""
+    return project_db(project_id) in (None, DEFAULT_DB_ALIAS)
+
+
+def load_projects(queryset, project_ids):
+    """Fetch the projects from their shards, in the order of `project_ids`."""
+    by_shard = {}
+    for project_id in project_ids:
+        by_shard.setdefault(project_db(project_id), []).append(project_id)
+    projects = {}
+    for alias, ids in by_shard.items():
+        projects.update((project.id, project) for project in queryset.using(alias).filter(pk__in=ids))
+    return [projects[project_id] for project_id in project_ids if project_id in projects]
+
+
+@contextmanager
+def use_project(project_id):
+    token = _project.set(int(project_id) if project_id is not None else None)
+    try:
+        yield
+    finally:
+        _project.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    token = _shard.set(alias)
+    try:
+        yield
+    finally:
+        _shard.reset(token)
+
+
+@contextmanager
+def atomic_everywhere():
+    """One atomic block on 'default' and on every shard; they roll back together but commit one by one."""
+    with ExitStack() as stack:
+        for alias in dict.fromkeys([DEFAULT_DB_ALIAS, *get_shards()]):
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+class ProjectShardRouter:
+    def _route(self, model, hints, for_write):
+        if not sharding_enabled():
+            return None
+        instance = hints.get('instance')
+        if not is_sharded(model):
+            # Django would follow a relation from a shard row into the shard itself.
+            return DEFAULT_DB_ALIAS if instance is not None and is_sharded(instance) else None
+        project_id = None
+        if instance is not None and is_sharded(instance):
+            project_id = instance.pk if instance._meta.model_name == 'project' else instance.project_id
+        if project_id is None:
+            project_id = _project.get()
+        if project_id is not None:
+            return project_db(project_id, for_write)
+        return _shard.get()
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints, False)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints, True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Rows on a shard point at profiles in 'default'.
+        if sharding_enabled() and (is_sharded(obj1) or is_sharded(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ProjectShardMiddleware:
+    """Routes the request's queries to the shard of the project in its URL."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _project.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _project.reset(token)
+
+    async def __acall__(self, request):
+        token = _project.set(None)
+        try:
+            return await self.get_response(request)
+        finally:
+            _project.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        project_id = view_kwargs.get(getattr(view_class, 'project_url_kwarg', 'proj_id'))
+        if project_id is not None:
+            _project.set(int(project_id))
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, ProjectMoving):
+            response = JsonResponse({'detail': 'The project is moving to another shard; retry shortly.'},
+                                    status=503)
+            response['Retry-After'] = str(MOVE_RETRY_AFTER)
+            return response
+        return None
+
+
+def raise_sequence(alias, table, value):
+    """Make the table's id sequence on `alias` continue above `value`."""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        # Other backends: set the sequences by hand when adding a shard.
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s', [value, table, value])
+        cursor.execute('INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s '
+                       'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)', [table, value, table])
+
+
+def reserve_id_block(alias):
+    # Change-log ids are never copied between shards, so they need no block (see move_project).
+    shards = get_shards()
+    if alias not in shards or shards.index(alias) == 0:
+        return
+    for model in apps.get_app_config('boards').get_models():
+        if is_sharded(model) and model._meta.model_name not in ('project', 'projectchange'):
+            raise_sequence(alias, model._meta.db_table, shards.index(alias) * get_id_block())
+
+
+def _batches(values):
+    values = list(values)
+    for start in range(0, len(values), MOVE_BATCH_SIZE):
+        yield values[start:start + MOVE_BATCH_SIZE]
+
+
+def _copy_rows(model, source, target, column, values):
+    """
+    Replace the target's rows whose `column` is in `values` with the source's.
+    Rows travel as raw values, so no signal runs and auto_now fields keep their time.
+    """
+    quote = connections[target].ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    insert = f'INSERT INTO {table} ({columns}) VALUES ({", ".join(["%s"] * len(model._meta.concrete_fields))})'
+    copied = 0
+    for batch in _batches(values):
+        where = f'{quote(column)} IN ({", ".join(["%s"] * len(batch))})'
+        with transaction.atomic(using=target), connections[source].cursor() as reader, \
+                connections[target].cursor() as writer:
+            writer.execute(f'DELETE FROM {table} WHERE {where}', batch)
+            reader.execute(f'SELECT {columns} FROM {table} WHERE {where}', batch)
+            while rows := reader.fetchmany(MOVE_BATCH_SIZE):
+                writer.executemany(insert, rows)
+                copied += len(rows)
+    return copied
+
+
+def _copy_project(source, target, project_id, models):
+    return {model._meta.model_name: _copy_rows(model, source, target, 'id' if model is Project else 'project_id',
+                                               [project_id])
+            for model in models}
+
+
+def _delete_project(alias, project_id):
+    quote = connections[alias].ops.quote_name
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        for model in (ProjectChange, *reversed(MOVED_MODELS)):
+            column = 'id' if model is Project else 'project_id'
+            cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} = %s', [project_id])
+
+
+def _drop_board_rows(source, target, board_ids):
+    # A board delete is logged once, for the board: its tasks, their reminders and its counters go with it.
+    task_ids = list(Task.objects.using(target).filter(board_id__in=board_ids).values_list('id', flat=True))
+    _copy_rows(TaskReminder, source, target, 'task_id', task_ids)
+    for model in (Task, BoardTaskCount):
+        _copy_rows(model, source, target, 'board_id', board_ids)
+
+
+def _catch_up(source, target, project_id, since):
+    """Copy the rows the source's change log reports changed after `since`; returns (last seq, rows)."""
+    changed = {}
+    deleted_boards = set()
+    for since, model, object_id, action in (ProjectChange.objects.using(source)
+                                            .filter(project_id=project_id, id__gt=since).order_by('id')
+                                            .values_list('id', 'model', 'object_id', 'action').iterator()):
+        changed.setdefault(model, set()).add(object_id)
+        if model == 'board' and action == ProjectChange.Action.DELETE:
+            deleted_boards.add(object_id)
+    with transaction.atomic(using=target):
+        if deleted_boards:
+            _drop_board_rows(source, target, sorted(deleted_boards))
+        for model in MOVED_MODELS:
+            if model._meta.model_name in changed:
+                _copy_rows(model, source, target, 'id', sorted(changed[model._meta.model_name]))
+    return since, sum(len(ids) for ids in changed.values())
+
+
+def _set_directory(project_id, alias, frozen):
+    ProjectShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(pk=project_id,
+                                                                  defaults={'alias': alias, 'frozen': frozen})
+    forget_project(project_id)
+
+
+def move_project(project_id, target, wait=None, log=None):
+    """
+    Move a project with all its rows to the `target` shard while it stays in use.
+    The rows are copied and then caught up from the project's change log while
+    clients keep writing. Writes are then refused (ProjectMoving) for `wait`
+    seconds, by default PROJECT_SHARD_DIRECTORY_TTL, so that every process
+    notices; the last changes are copied together with every board, task,
+    counter and reminder row, the directory switches to the target and the
+    source rows are dropped. A move that fails leaves the project on the source
+    and removes its copy from the target. The change log is not moved: clients
+    that had not caught up are told to reload.
+    """
+    log = log or (lambda message: None)
+    forget_project(project_id)
+    source = project_db(project_id) or DEFAULT_DB_ALIAS
+    if target not in get_shards():
+        raise ValueError(f'{target!r} is not listed in PROJECT_SHARDS.')
+    if target == source:
+        raise ValueError(f'Project {project_id} is already on {target!r}.')
+    if not Project.objects.using(source).filter(pk=project_id).exists():
+        raise ValueError(f'Project {project_id} does not exist.')
+
+    # Rows left on the target by an interrupted move are replaced.
+    _delete_project(target, project_id)
+    try:
+        since = (ProjectChange.objects.using(source).filter(project_id=project_id).aggregate(head=Max('id'))['head']
+                 or 0)
+        for name, copied in _copy_project(source, target, project_id, MOVED_MODELS).items():
+            log(f'{name}: {copied} rows copied')
+        for _ in range(MOVE_CATCH_UP_ROUNDS):
+            since, replayed = _catch_up(source, target, project_id, since)
+            log(f'caught up to change {since}: {replayed} rows copied')
+            if replayed <= MOVE_FREEZE_THRESHOLD:
+                break
+
+        _set_directory(project_id, source, frozen=True)
+        try:
+            time.sleep(get_directory_ttl() if wait is None else wait)
+            with transaction.atomic(using=target):
+                since, replayed = _catch_up(source, target, project_id, since)
+                # Rows written without a log entry (rank rewrites, counters, reminders) are copied whole.
+                _copy_project(source, target, project_id, (Project, Board, Task, BoardTaskCount, TaskReminder))
+                # New log entries on the target continue after the source's, behind a floor that resets older clients.
+                raise_sequence(target, ProjectChange._meta.db_table, since)
+                Project.objects.using(target).filter(pk=project_id).update(
+                    change_log_floor=Greatest('change_log_floor', since))
+            log(f'caught up to change {since} while frozen: {replayed} rows copied')
+        except BaseException:
+            _set_directory(project_id, source, frozen=False)
+            raise
+    except BaseException:
+        # The project stays on the source; its partial copy would only be in the way of the next attempt.
+        _delete_project(target, project_id)
+        raise
+    _set_directory(project_id, target, frozen=False)
+    _delete_project(source, project_id)
+    log(f'project {project_id} moved from {source!r} to {target!r}')
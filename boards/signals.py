@@ -1,7 +1,27 @@
-from django.db.models.signals import post_save
+from functools import wraps
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile, Project, ProjectMembership
+from .models import Profile, ProjectShard, Project, ProjectMembership, Board, Task, ProjectChange
+from .access import invalidate_project
+from .changes import record_change
+from .ranking import last_rank, rank_between
+from .counters import create_board_counters, task_saved, task_deleted
+from .images import needs_thumbnails, schedule_thumbnails
+from .sharding import use_project, forget_project, reserve_id_block
+from .tokens import revoke_project_claims, forget_principal
+from .reminders import ensure_scheduler
+
+
+def in_project(handler):
+    # Queries the receiver makes without an instance to route by go to the instance's project shard.
+    @wraps(handler)
+    def wrapper(sender, instance, **kwargs):
+        with use_project(instance.pk if isinstance(instance, Project) else instance.project_id):
+            return handler(sender, instance, **kwargs)
+    return wrapper
 
 
 @receiver(post_save, sender=User)
@@ -11,7 +31,122 @@ def create_profile(sender, instance, created, **kwargs):
         user_profile.save()
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_principal(sender, instance, **kwargs):
+    forget_principal(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_image(sender, instance, **kwargs):
+    if needs_thumbnails(instance):
+        schedule_thumbnails(instance.pk)
+
+
 @receiver(post_save, sender=Project)
+@in_project
 def create_project(sender, instance, created, **kwargs):
     if created:
-        ProjectMembership.objects.create(member=instance.owner, project=instance, access_level=2)
\ No newline at end of file
+        ProjectMembership.objects.create(member=instance.owner, project=instance, access_level=2)
+
+
+@receiver(post_delete, sender=Project)
+def drop_project_shard(sender, instance, **kwargs):
+    ProjectShard.objects.using(DEFAULT_DB_ALIAS).filter(pk=instance.pk).delete()
+    forget_project(instance.pk)
+
+
+@receiver(request_started)
+def start_reminder_scheduler(sender, **kwargs):
+    ensure_scheduler()
+
+
+@receiver(post_migrate)
+def reserve_shard_ids(sender, using, **kwargs):
+    if sender.name == 'boards':
+        reserve_id_block(using)
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_project_access(sender, instance, **kwargs):
+    invalidate_project(instance.project_id)
+    revoke_project_claims(Profile.objects.filter(pk=instance.member_id).values_list('user_id', flat=True))
+
+
+def deleted_with(origin, *models):
+    # origin is the instance or queryset whose delete() cascaded to this row.
+    return isinstance(origin, models) or getattr(origin, 'model', None) in models
+
+
+def cascaded(sender, origin):
+    # Whether the row goes with a deleted project, or a task with its deleted board.
+    return deleted_with(origin, Project) or (sender is not Board and deleted_with(origin, Board))
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+@in_project
+def bump_project_version(sender, instance, origin=None, **kwargs):
+    # A cascade bumps once, for the board or project it started from, not once per row.
+    if not cascaded(sender, origin):
+        Project.bump_version(instance.project_id)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=ProjectMembership)
+@in_project
+def record_saved_change(sender, instance, created, **kwargs):
+    record_change(instance, ProjectChange.Action.CREATE if created else ProjectChange.Action.UPDATE)
+
+
+@receiver(post_delete, sender=Board)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=ProjectMembership)
+@in_project
+def record_deleted_change(sender, instance, origin=None, **kwargs):
+    # The project's own log is deleted with it, so there is no one left to sync. A deleted board is
+    # logged once: clients drop its tasks along with it.
+    if not cascaded(sender, origin):
+        record_change(instance, ProjectChange.Action.DELETE)
+
+
+RANK_PARENT_FIELDS = {Board: 'project_id', Task: 'board_id'}
+
+
+@receiver(pre_save, sender=Board)
+@receiver(pre_save, sender=Task)
+@in_project
+def assign_position(sender, instance, **kwargs):
+    if not instance.position:
+        parent_field = RANK_PARENT_FIELDS[sender]
+        siblings = sender.objects.filter(**{parent_field: getattr(instance, parent_field)})
+        instance.position = rank_between(last_rank(siblings), None)
+
+
+@receiver(post_save, sender=Board)
+@in_project
+def create_task_counters(sender, instance, created, **kwargs):
+    if created:
+        create_board_counters(instance)
+
+
+@receiver(post_save, sender=Task)
+@in_project
+def count_saved_task(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or {'board', 'status_task'} & set(update_fields):
+        task_saved(instance, created)
+
+
+@receiver(post_delete, sender=Task)
+@in_project
+def count_deleted_task(sender, instance, origin=None, **kwargs):
+    # Counters of a deleted board or project go away with it.
+    if not deleted_with(origin, Board, Project):
+        task_deleted(instance)
+
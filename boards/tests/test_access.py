@@ -0,0 +1,65 @@
+from rest_framework.test import APIClient
+from django.test import TestCase, RequestFactory
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, ProjectMembership, Board
+from boards.access import get_access_level, is_member, is_admin, clear_access_cache
+
+
+class AccessResolverTests(TestCase):
+    def setUp(self):
+        clear_access_cache()
+        self.owner = User.objects.create_user(username='owner', password='testpassword')
+        self.member = User.objects.create_user(username='member', password='testpassword')
+        self.outsider = User.objects.create_user(username='outsider', password='testpassword')
+        self.project = Project.objects.create(title='Test Project', description='desc',
+                                              owner=Profile.objects.get(user=self.owner))
+        self.membership = ProjectMembership.objects.create(project=self.project,
+                                                           member=Profile.objects.get(user=self.member))
+
+    def make_request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_access_levels(self):
+        self.assertTrue(is_admin(self.make_request(self.owner), self.project.id))
+        self.assertTrue(is_member(self.make_request(self.member), self.project.id))
+        self.assertFalse(is_admin(self.make_request(self.member), self.project.id))
+        self.assertIsNone(get_access_level(self.make_request(self.outsider), self.project.id))
+
+    def test_single_query_then_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_access_level(self.make_request(self.member), self.project.id), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_access_level(self.make_request(self.member), self.project.id), 1)
+
+    def test_membership_change_invalidates_cache(self):
+        self.assertTrue(is_member(self.make_request(self.member), self.project.id))
+        self.membership.access_level = ProjectMembership.Access.ADMIN
+        self.membership.save()
+        self.assertTrue(is_admin(self.make_request(self.member), self.project.id))
+        self.membership.delete()
+        self.assertFalse(is_member(self.make_request(self.member), self.project.id))
+
+
+class BoardAccessViewTests(TestCase):
+    def setUp(self):
+        clear_access_cache()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='desc', owner=self.profile)
+        self.board = Board.objects.create(project=self.project, title='Board', description='')
+        self.url = reverse('board_list', kwargs={'proj_id': self.project.pk})
+
+    def test_member_can_list_boards(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_non_member_cannot_list_boards(self):
+        outsider = User.objects.create_user(username='outsider', password='testpassword')
+        self.client.force_authenticate(user=outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
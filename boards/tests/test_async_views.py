@@ -0,0 +1,74 @@
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from boards import views
+from boards.access import clear_access_cache
+from boards.models import User, Profile, Project, Board, Task
+
+
+ROUTES = [
+    ('members_list', 'project-list/<int:pk>/members/', views.ProjectMemberListView),
+    ('board_list', 'project-list/<int:proj_id>/boards', views.BoardListView),
+    ('board_detail', 'project-list/<int:proj_id>/boards/<int:board_id>/', views.BoardDetailsView),
+    ('task_list', 'project-list/<int:proj_id>/boards/<int:board_id>/tasks', views.TaskListView),
+    ('task_edit', 'project-list/<int:proj_id>/boards/<int:board_id>/tasks/<int:task_id>', views.TaskEditView),
+]
+
+urlpatterns = [
+    path('async/', include(([path(route, view.as_view(async_get=True), name=name) for name, route, view in ROUTES],
+                            'async'))),
+    path('', include('Trello.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF='boards.tests.test_async_views')
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        clear_access_cache()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='desc', owner=self.profile)
+        self.board = Board.objects.create(title='Board', description='desc', project=self.project)
+        self.task = Task.objects.create(title='Task', description='desc', board=self.board, project=self.project)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.async_client.force_login(self.user)
+        board = {'proj_id': self.project.pk, 'board_id': self.board.pk}
+        self.kwargs = {'members_list': {'pk': self.project.pk}, 'board_list': {'proj_id': self.project.pk},
+                       'board_detail': board, 'task_list': board, 'task_edit': {**board, 'task_id': self.task.pk}}
+
+    def test_async_views_answer_like_the_sync_views(self):
+        for name, _, _ in ROUTES:
+            sync_response = self.client.get(reverse(name, kwargs=self.kwargs[name]))
+            async_url = reverse(f'async:{name}', kwargs=self.kwargs[name])
+            self.assertTrue(iscoroutinefunction(resolve(async_url).func))
+            self.assertFalse(iscoroutinefunction(resolve(reverse(name, kwargs=self.kwargs[name])).func))
+            async_response = self.client.get(async_url)
+            self.assertEqual((name, async_response.status_code), (name, status.HTTP_200_OK))
+            self.assertEqual(async_response.json(), sync_response.json())
+            self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+
+    def test_not_modified_missing_and_forbidden(self):
+        url = reverse('async:board_detail', kwargs=self.kwargs['board_detail'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        missing = reverse('async:board_list', kwargs={'proj_id': self.project.pk + 1})
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='testpassword'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_other_methods_keep_their_sync_handlers(self):
+        url = reverse('async:task_list', kwargs=self.kwargs['task_list'])
+        data = {'title': 'write plan', 'description': 'desc', 'board': self.board.pk, 'project': self.project.pk,
+                'profile': self.profile.pk}
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+    async def test_served_through_the_asgi_handler(self):
+        for name, _, _ in ROUTES:
+            response = await self.async_client.get(reverse(f'async:{name}', kwargs=self.kwargs[name]))
+            self.assertEqual((name, response.status_code), (name, status.HTTP_200_OK))
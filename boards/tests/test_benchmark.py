@@ -0,0 +1,85 @@
+from io import StringIO
+import json
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import URLPattern, get_resolver
+from boards.benchmark import (generate_dataset, run_benchmark, run_serialization_benchmark, run_encoding_benchmark, ROUTES,
+                             SKIPPED_ROUTES)
+from boards.models import Project, ProjectMembership, Board, Task
+from boards.counters import find_drift
+
+
+class BenchmarkTests(TestCase):
+    def test_generate_dataset(self):
+        stats = generate_dataset(users=10, projects=3, members=4, boards=2, tasks=5, seed=1)
+        self.assertEqual((stats.users_created, len(stats.projects), stats.tasks), (10, 3, 30))
+        self.assertEqual(Board.objects.count(), 6)
+        self.assertEqual(ProjectMembership.objects.count(), 12)
+        self.assertEqual(find_drift(), [])
+
+    def test_dataset_is_reproducible(self):
+        generate_dataset(users=5, projects=2, members=3, boards=1, tasks=3, seed=7)
+        first = list(Task.objects.order_by('id').values_list('title', 'description', 'status_task'))
+        Project.objects.all().delete()
+        generate_dataset(users=5, projects=2, members=3, boards=1, tasks=3, seed=7)
+        self.assertEqual(list(Task.objects.order_by('id').values_list('title', 'description', 'status_task')), first)
+
+    def test_every_url_is_benchmarked_or_skipped(self):
+        names = {pattern.name for pattern in get_resolver('boards.urls').url_patterns if isinstance(pattern, URLPattern)}
+        self.assertEqual(names, {route[1] for route in ROUTES.values()} | set(SKIPPED_ROUTES))
+
+    def test_every_route_succeeds(self):
+        generate_dataset(users=5, projects=2, members=3, boards=2, tasks=5)
+        profile = Project.objects.order_by('id').first().owner
+        report = run_benchmark(profile, requests=2, concurrency=1, writes=True)
+        self.assertEqual(set(report['results']), set(ROUTES))
+        for name, result in report['results'].items():
+            self.assertEqual((name, result['errors']), (name, 0))
+            self.assertEqual(result['requests'], 2)
+            self.assertGreater(result['queries_mean'], 0)
+        json.dumps(report)
+
+    def test_mixed_workload(self):
+        generate_dataset(users=5, projects=1, members=3, boards=2, tasks=5)
+        profile = Project.objects.order_by('id').first().owner
+        report = run_benchmark(profile, requests=6, concurrency=1, routes=['task_list', 'task_create'],
+                               writes=True, mixed=True)
+        self.assertEqual(list(report['results']), ['mixed'])
+        self.assertEqual(report['results']['mixed']['routes'], ['task_list', 'task_create'])
+        self.assertEqual((report['results']['mixed']['requests'], report['results']['mixed']['errors']), (6, 0))
+
+    def test_command_writes_json(self):
+        generate_dataset(users=3, projects=1, members=2, boards=1, tasks=2)
+        out = StringIO()
+        call_command('benchmark', requests=1, concurrency=1, routes=['task_list'], stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(list(report['results']), ['task_list'])
+
+    def test_serialization_benchmark(self):
+        generate_dataset(users=3, projects=1, members=2, boards=2, tasks=10)
+        report = run_serialization_benchmark(tasks=20, repeat=1)
+        self.assertEqual(report['tasks'], 20)
+        self.assertTrue(report['identical_output'])
+        with self.assertRaises(ValueError):
+            run_serialization_benchmark(tasks=21, repeat=1)
+
+    def test_encoding_benchmark(self):
+        generate_dataset(users=3, projects=1, members=2, boards=2, tasks=10)
+        report = run_encoding_benchmark(tasks=20, repeat=1)
+        self.assertTrue(report['identical_output'])
+        self.assertLess(report['bytes']['gzip'], report['bytes']['identity'])
+        with self.assertRaises(ValueError):
+            run_encoding_benchmark(tasks=21, repeat=1)
+
+
+class AsgiBenchmarkTests(TransactionTestCase):
+    """Each ASGI request runs its sync code in a thread of its own, so the data has to be committed."""
+
+    def test_asgi_server(self):
+        generate_dataset(users=3, projects=1, members=2, boards=2, tasks=3)
+        profile = Project.objects.order_by('id').first().owner
+        report = run_benchmark(profile, requests=4, concurrency=2, routes=['board_detail', 'task_list', 'task_edit'],
+                               server='asgi')
+        self.assertEqual(report['server'], 'asgi')
+        for name, result in report['results'].items():
+            self.assertEqual((name, result['requests'], result['errors']), (name, 4, 0))
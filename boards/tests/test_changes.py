@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, ProjectChange, Task, Board
+from boards.changes import compact_changes
+
+
+class ProjectChangesViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.url = reverse('project_changes', kwargs={'pk': self.project.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_returns_only_changes_after_since(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(c['model'], c['action']) for c in response.data['changes']],
+                         [('projectmembership', 'create'), ('board', 'create')])
+        since = response.data['last_seq']
+
+        task = Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        task.status_task = 'doing'
+        task.save()
+        task.delete()
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual([(c['model'], c['action']) for c in response.data['changes']],
+                         [('task', 'create'), ('task', 'update'), ('task', 'delete')])
+        self.assertEqual(response.data['changes'][1]['data']['status_task'], 'doing')
+        self.assertIsNone(response.data['changes'][2]['data'])
+
+        response = self.client.get(self.url, {'since': response.data['last_seq']})
+        self.assertEqual(response.data['changes'], [])
+        self.assertFalse(response.data['has_more'])
+
+        for since in (-1, 2 ** 63, 'x'):
+            self.assertEqual(self.client.get(self.url, {'since': since}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_limit_pages_through_changes(self):
+        for i in range(5):
+            Task.objects.create(title=f'task{i}', description='desc', board=self.board, project=self.project)
+        response = self.client.get(self.url, {'limit': 3})
+        self.assertEqual(len(response.data['changes']), 3)
+        self.assertTrue(response.data['has_more'])
+
+    def test_compaction_keeps_latest_entry_and_floors_tombstones(self):
+        task = Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        task.title = 'renamed'
+        task.save()
+        gone = Task.objects.create(title='gone', description='desc', board=self.board, project=self.project)
+        gone.delete()
+        ProjectChange.objects.update(created_at=self.project.created_at - timedelta(days=30))
+
+        superseded, expired = compact_changes(timedelta(days=7))
+        self.assertEqual((superseded, expired), (2, 1))
+        task_changes = ProjectChange.objects.filter(model='task', object_id=task.pk)
+        self.assertEqual([change.action for change in task_changes], ['update'])
+
+        response = self.client.get(self.url, {'since': 0})
+        self.assertTrue(response.data['reset'])
+        head = response.data['last_seq']
+        response = self.client.get(self.url, {'since': head})
+        self.assertFalse(response.data['reset'])
+
+    def test_project_delete_does_not_log_children(self):
+        Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        self.project.delete()
+        self.assertEqual(ProjectChange.objects.count(), 0)
+
+    def test_board_delete_is_logged_once(self):
+        Task.objects.bulk_create([Task(title=f'task{i}', description='desc', board=self.board, project=self.project)
+                                  for i in range(300)])
+        version = Project.objects.get(pk=self.project.pk).version
+        ProjectChange.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.board.delete()
+        self.assertLess(len(queries), 30)
+        self.assertEqual(list(ProjectChange.objects.values_list('model', 'action')), [('board', 'delete')])
+        self.assertEqual(Project.objects.get(pk=self.project.pk).version, version + 1)
+
+    def test_queryset_deletes_do_not_log_children(self):
+        Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        ProjectChange.objects.all().delete()
+        Board.objects.filter(pk=self.board.pk).delete()
+        self.assertEqual(list(ProjectChange.objects.values_list('model', 'action')), [('board', 'delete')])
+        Project.objects.filter(pk=self.project.pk).delete()
+        self.assertEqual(ProjectChange.objects.count(), 0)
+
+    def test_compact_changes_command(self):
+        out = StringIO()
+        call_command('compact_changes', days=7, stdout=out)
+        self.assertIn('Removed 0 superseded entries and 0 expired tombstones.', out.getvalue())
@@ -0,0 +1,78 @@
+from io import StringIO
+from rest_framework.test import APIClient
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, Task, Board, BoardTaskCount
+from boards.counters import find_drift, tasks_bulk_changed
+
+
+class TaskCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.other_board = Board.objects.create(title='Other Board', description='', project=self.project)
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, **kwargs):
+        return Task.objects.create(title='task', description='desc', board=self.board, project=self.project, **kwargs)
+
+    def board_counts(self, board):
+        url = reverse('board_detail', kwargs={'proj_id': self.project.pk, 'board_id': board.pk})
+        return self.client.get(url).data['task_counts']
+
+    def test_counts_follow_create_update_move_and_delete(self):
+        task = self.create_task()
+        self.create_task(status_task='done')
+        self.assertEqual(self.board_counts(self.board), {'todo': 1, 'doing': 0, 'suspend': 0, 'done': 1})
+
+        url = reverse('task_edit', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk, 'task_id': task.pk})
+        data = {'title': 'task', 'description': 'desc', 'board': self.other_board.pk, 'project': self.project.pk,
+                'status_task': 'doing'}
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.board_counts(self.board), {'todo': 0, 'doing': 0, 'suspend': 0, 'done': 1})
+        self.assertEqual(self.board_counts(self.other_board), {'todo': 0, 'doing': 1, 'suspend': 0, 'done': 0})
+
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.board_counts(self.other_board), {'todo': 0, 'doing': 0, 'suspend': 0, 'done': 0})
+        self.assertEqual(find_drift(), [])
+
+    def test_project_detail_sums_board_counts(self):
+        self.create_task()
+        Task.objects.create(title='task', description='desc', board=self.other_board, project=self.project)
+        response = self.client.get(reverse('project_detail', kwargs={'pk': self.project.pk}))
+        self.assertEqual(response.data['task_counts'], {'todo': 2, 'doing': 0, 'suspend': 0, 'done': 0})
+
+    def test_bulk_operations_keep_counts(self):
+        url = reverse('task_bulk', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        operations = [{'op': 'create', 'data': {'title': f'task{i}', 'description': 'desc'}} for i in range(3)]
+        ids = [result['id'] for result in self.client.post(url, operations, format='json').data['results']]
+        self.client.post(url, [{'op': 'status', 'id': ids[0], 'status_task': 'suspend'},
+                               {'op': 'move', 'id': ids[1], 'board': self.other_board.pk}], format='json')
+        self.assertEqual(self.board_counts(self.board), {'todo': 1, 'doing': 0, 'suspend': 1, 'done': 0})
+        self.assertEqual(find_drift(), [])
+
+    def test_bulk_change_counts_a_repeated_task_once(self):
+        task = self.create_task()
+        task.status_task = 'doing'
+        moved = Task.objects.get(pk=task.pk)
+        moved.board, moved.status_task = self.other_board, 'doing'
+        tasks_bulk_changed(self.project.pk, [], [task, task, moved])
+        self.assertEqual(self.board_counts(self.board), {'todo': 0, 'doing': 0, 'suspend': 0, 'done': 0})
+        self.assertEqual(self.board_counts(self.other_board), {'todo': 0, 'doing': 1, 'suspend': 0, 'done': 0})
+
+    def test_rebuild_command_fixes_drift(self):
+        self.create_task()
+        BoardTaskCount.objects.filter(board=self.board, status_task='todo').update(count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_counts', check=True, stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_task_counts', stdout=out)
+        self.assertIn('stored 7, actual 1', out.getvalue())
+        self.assertEqual(find_drift(), [])
@@ -0,0 +1,55 @@
+import csv
+import json
+from io import StringIO
+from rest_framework.test import APIClient
+from django.test import TestCase
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, Task, Board
+
+
+class ProjectExportViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        Task.objects.bulk_create([Task(title=f'task {i}', description='desc, "quoted"', board=self.board,
+                                       project=self.project, position=f'a{i}') for i in range(5)])
+        self.url = reverse('project_export', kwargs={'pk': self.project.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r['type'] for r in records], ['project', 'board', 'task', 'task', 'task', 'task', 'task',
+                                                         'projectmembership'])
+        self.assertEqual(records[2]['title'], 'task 0')
+        self.assertEqual(records[2]['board_id'], self.board.id)
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'fmt': 'csv', 'model': 'task'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'board_id', 'title'])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'desc, "quoted"')
+
+    def test_first_chunk_is_sent_before_querying_rows(self):
+        response = self.client.get(self.url)
+        stream = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            self.assertEqual(json.loads(next(stream))['type'], 'project')
+        with self.assertNumQueries(1):
+            self.assertEqual(json.loads(next(stream))['type'], 'board')
+
+    def test_invalid_format_and_non_member(self):
+        self.assertEqual(self.client.get(self.url, {'fmt': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'model': 'user'}).status_code, status.HTTP_400_BAD_REQUEST)
+        outsider = User.objects.create_user(username='outsider', password='testpassword')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+from boards.images import render_thumbnails
+from boards.models import User, Profile
+
+
+def make_image(size=(640, 480), fmt='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, fmt)
+    return SimpleUploadedFile(f'avatar.{fmt.lower()}', buffer.getvalue())
+
+
+@override_settings(PROFILE_THUMBNAIL_SIZES={'small': 32, 'large': 96})
+class ProfileThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.profile.image_profile = make_image()
+            self.profile.save()
+        return callbacks
+
+    def test_upload_schedules_rendering(self):
+        self.assertEqual(len(self.upload()), 1)
+        render_thumbnails(self.profile)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.profile.bio = 'bio'
+            self.profile.save()
+        self.assertEqual(callbacks, [])
+
+    def test_thumbnails_are_square_webp(self):
+        self.upload()
+        thumbnails = render_thumbnails(self.profile)
+        self.assertEqual(set(thumbnails['sizes']), {'small', 'large'})
+        with default_storage.open(thumbnails['sizes']['small']) as f, Image.open(f) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (32, 32)))
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.image_thumbnails, thumbnails)
+
+    def test_palette_transparency_is_kept(self):
+        palette = Image.new('P', (64, 64), 0)
+        palette.putpalette([255, 0, 0, 0, 0, 255])
+        palette.paste(1, (0, 0, 32, 64))
+        buffer = BytesIO()
+        palette.save(buffer, 'PNG', transparency=0)
+        self.profile.image_profile = SimpleUploadedFile('avatar.png', buffer.getvalue())
+        self.profile.save()
+        thumbnails = render_thumbnails(self.profile)
+        with default_storage.open(thumbnails['sizes']['large']) as f, Image.open(f) as image:
+            image = image.convert('RGBA')
+            self.assertEqual(image.getpixel((95, 48))[3], 0)
+            self.assertEqual(image.getpixel((0, 48)), (0, 0, 255, 255))
+
+    def test_oversized_image_is_left_unrendered(self):
+        self.upload()
+        # 640x480 is more than twice the limit, which Pillow refuses to decode.
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            thumbnails = render_thumbnails(self.profile)
+        self.assertEqual(thumbnails['sizes'], {})
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.image_thumbnails, thumbnails)
+
+    def test_replaced_image_removes_old_thumbnails(self):
+        self.upload()
+        old = render_thumbnails(self.profile)['sizes']
+        self.upload()
+        render_thumbnails(self.profile)
+        self.assertFalse(any(default_storage.exists(name) for name in old.values()))
+
+    def test_serializer_returns_thumbnail_urls(self):
+        self.upload()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('profile_detail', kwargs={'pk': self.profile.pk})
+        # Until the worker finishes every size points at the original upload.
+        pending = client.get(url).data['image_thumbnails']
+        self.assertTrue(pending['small'].endswith(self.profile.image_profile.url))
+        render_thumbnails(self.profile)
+        ready = client.get(url).data['image_thumbnails']
+        self.assertTrue(ready['small'].endswith('-small.webp'))
+        self.assertTrue(ready['large'].endswith('-large.webp'))
+
+    def test_backfill_command(self):
+        self.upload()
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.profile.refresh_from_db()
+        self.assertEqual(set(self.profile.image_thumbnails['sizes']), {'small', 'large'})
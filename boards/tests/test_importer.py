@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import tempfile
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from boards.counters import find_drift
+from boards.importer import iter_json_documents, import_boards
+from boards.models import Profile, Project, ProjectMembership, Board, Task, BoardTaskCount
+
+
+def trello_board(name='Roadmap', lists=2, cards_per_list=3, members=()):
+    return {
+        'name': name,
+        'desc': 'imported',
+        'members': [{'id': f'm-{username}', 'username': username} for username in members],
+        'lists': [{'id': f'l{i}', 'name': f'List {i}', 'pos': 1000 - i, 'closed': False} for i in range(lists)]
+                 + [{'id': 'archived', 'name': 'Old', 'pos': 1, 'closed': True}],
+        'cards': [{'id': f'c{i}-{j}', 'name': f'Card {i}-{j}', 'desc': '', 'idList': f'l{i}', 'pos': j,
+                   'due': '2024-05-01T12:00:00.000Z', 'dueComplete': j == 0,
+                   'idMembers': [f'm-{members[0]}'] if members else []}
+                  for i in range(lists) for j in range(cards_per_list)],
+    }
+
+
+class IterJsonDocumentsTests(SimpleTestCase):
+    def test_single_object_array_and_lines(self):
+        boards = [{'name': f'board {i}', 'cards': [{'name': 'x' * 50}] * 20} for i in range(3)]
+        for text in (json.dumps(boards[0]), json.dumps(boards), '\n'.join(json.dumps(b) for b in boards)):
+            expected = boards if text.startswith('[') or '\n' in text else boards[:1]
+            self.assertEqual(list(iter_json_documents(io.StringIO(text), read_size=64)), expected)
+
+    def test_truncated_input_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_documents(io.StringIO('[{"name": "a"}, {"name": '), read_size=8))
+
+
+class ImportBoardsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='testpassword')
+        self.owner = Profile.objects.get(user=self.user)
+        User.objects.create_user(username='alice', password='testpassword')
+
+    def test_import_creates_ranked_boards_tasks_counters_and_members(self):
+        stats = import_boards([trello_board(members=['alice', 'bob'])], self.owner, create_users=True)
+        project = Project.objects.get(pk=stats.projects[0])
+        self.assertEqual((stats.boards, stats.tasks, stats.users_created), (2, 6, 1))
+        # Trello list order follows pos, and closed lists are skipped.
+        boards = list(Board.objects.filter(project=project).order_by('position'))
+        self.assertEqual([board.title for board in boards], ['List 1', 'List 0'])
+        titles = list(Task.objects.filter(board=boards[0]).order_by('position').values_list('title', flat=True))
+        self.assertEqual(titles, ['Card 1-0', 'Card 1-1', 'Card 1-2'])
+        self.assertEqual(BoardTaskCount.objects.get(board=boards[0], status_task='done').count, 1)
+        self.assertEqual(find_drift(), [])
+        members = set(ProjectMembership.objects.filter(project=project).values_list('member__user__username', flat=True))
+        self.assertEqual(members, {'owner', 'alice', 'bob'})
+        self.assertTrue(Profile.objects.filter(user__username='bob').exists())
+        self.assertEqual(Task.objects.filter(project=project).exclude(profile__user__username='alice').count(), 0)
+
+    def test_unknown_members_are_skipped_without_create_users(self):
+        stats = import_boards([trello_board(members=['bob'])], self.owner)
+        self.assertEqual(stats.users_created, 0)
+        self.assertFalse(User.objects.filter(username='bob').exists())
+
+    def import_queries(self, cards_per_list):
+        with CaptureQueriesContext(connection) as queries:
+            stats = import_boards([trello_board(lists=10, cards_per_list=cards_per_list)], self.owner)
+        self.assertEqual(stats.tasks, 10 * cards_per_list)
+        return len(queries)
+
+    def test_throughput(self):
+        # Tasks are inserted in batches (SQLite caps one at its variable limit), never one query per task.
+        small, large = self.import_queries(100), self.import_queries(1000)
+        self.assertLessEqual(large - small, 9000 // 50)
+
+    def test_management_command(self):
+        path = self.write_export([trello_board('A'), trello_board('B')])
+        out = io.StringIO()
+        call_command('import_trello', path, owner='owner', stdout=out)
+        self.assertIn('Imported 2 projects', out.getvalue())
+        self.assertEqual(Project.objects.filter(title__in=['A', 'B']).count(), 2)
+
+    def write_export(self, boards):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as handle:
+            json.dump(boards, handle)
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+
+class ProjectImportViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('project_import')
+
+    def test_json_body(self):
+        response = self.client.post(self.url, trello_board(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['tasks'], 6)
+        self.assertEqual(Project.objects.get(pk=response.data['projects'][0]).owner.user, self.user)
+
+    def test_uploaded_file_is_all_or_nothing(self):
+        payload = json.dumps([trello_board('A'), 'not a board']).encode()
+        upload = io.BytesIO(payload)
+        upload.name = 'export.json'
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Project.objects.filter(title='A').exists())
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from boards.metrics import MetricsRegistry, QueryTimer, registry, render, collect, flush
+from boards.models import User, Profile, Project, Board
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_render_prometheus_text(self):
+        metrics = MetricsRegistry()
+        queries = QueryTimer()
+        queries.count, queries.seconds = 3, 0.002
+        metrics.record_request('task_list', 'GET', 200, 0.02, 1500, queries)
+        metrics.record_request('task_list', 'GET', 200, 0.2, 100, queries)
+        text = render([metrics.snapshot()])
+        self.assertIn('http_requests_total{route="task_list",method="GET",status="200"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{route="task_list",method="GET",le="0.025"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{route="task_list",method="GET",le="+Inf"} 2', text)
+        self.assertIn('http_response_size_bytes_count{route="task_list",method="GET"} 2', text)
+        self.assertIn('db_queries_per_request_sum{route="task_list",method="GET"} 6', text)
+        self.assertIn('db_query_duration_seconds_total{route="task_list",method="GET"} 0.004', text)
+
+    def test_processes_are_summed(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.record_request('board_detail', 'GET', 200, 0.01)
+        second.record_request('board_detail', 'GET', 200, 0.01)
+        second.record_request('board_detail', 'GET', 404, 0.01)
+        text = render([first.snapshot(), second.snapshot()])
+        self.assertIn('http_requests_total{route="board_detail",method="GET",status="200"} 2', text)
+        self.assertIn('http_request_duration_seconds_count{route="board_detail",method="GET"} 3', text)
+
+    def test_multiprocess_directory(self):
+        registry.reset()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            with open(f'{directory}/metrics-999999.json', 'w') as f:
+                f.write('{"counters": [["http_requests_total", ["users", "GET", "200"], 5]], "histograms": []}')
+            flush(directory)
+            self.assertIn('http_requests_total{route="users",method="GET",status="200"} 5', render(collect()))
+
+    def test_stale_process_files_are_removed(self):
+        registry.reset()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            stale = f'{directory}/metrics-999999.json'
+            with open(stale, 'w') as f:
+                f.write('{"counters": [["http_requests_total", ["users", "GET", "200"], 5]], "histograms": []}')
+            an_hour_ago = time.time() - 3600
+            os.utime(stale, (an_hour_ago, an_hour_ago))
+            self.assertNotIn('route="users"', render(collect()))
+            self.assertFalse(os.path.exists(stale))
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='', owner=profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requests_are_recorded_by_url_name(self):
+        url = reverse('board_detail', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        self.client.get(url)
+        text = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertIn('http_requests_total{route="board_detail",method="GET",status="200"} 1', text)
+        self.assertIn('db_queries_per_request_count{route="board_detail",method="GET"} 1', text)
+        self.assertNotIn('db_queries_per_request_sum{route="board_detail",method="GET"} 0', text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_token_is_required_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,51 @@
+from django.db import connection
+from django.test import TestCase
+from boards.models import Board, ProjectMembership, Task
+
+
+class QueryPlanTests(TestCase):
+    """Run EXPLAIN QUERY PLAN on the hot filters and fail on any full table scan or sort."""
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, expected=None):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite specific')
+        plan = self.explain(queryset)
+        scans = [step for step in plan if step.startswith('SCAN') or 'TEMP B-TREE' in step]
+        self.assertEqual(scans, [], f'table scan in query plan: {plan}')
+        if expected:
+            self.assertTrue(any(expected in step for step in plan), f'{expected!r} not in query plan: {plan}')
+
+    def test_task_by_project_and_board(self):
+        self.assertUsesIndex(Task.objects.filter(project_id=1, board_id=1).order_by('id'),
+                             'USING INDEX task_project_board_idx')
+
+    def test_task_by_project_board_and_pk(self):
+        self.assertUsesIndex(Task.objects.filter(project_id=1, board_id=1, pk=1))
+
+    def test_membership_by_project_and_member(self):
+        self.assertUsesIndex(ProjectMembership.objects.filter(project_id=1, member_id=1),
+                             '(project_id=? AND member_id=?)')
+
+    def test_membership_by_project_and_user(self):
+        self.assertUsesIndex(ProjectMembership.objects.filter(project_id=1, member__user_id=1)
+                             .values_list('access_level', flat=True)[:1],
+                             '(project_id=? AND member_id=?)')
+
+    def test_project_admins(self):
+        self.assertUsesIndex(ProjectMembership.objects.filter(project_id=1, access_level=2),
+                             'USING INDEX membership_project_access_idx')
+
+    def test_tasks_in_rank_order(self):
+        self.assertUsesIndex(Task.objects.filter(project_id=1, board_id=1, position__gt='a0')
+                             .order_by('position', 'id')[:10],
+                             'USING INDEX task_board_position_idx')
+
+    def test_boards_in_rank_order(self):
+        self.assertUsesIndex(Board.objects.filter(project_id=1).order_by('position', 'id')[:10],
+                             'USING INDEX board_project_position_idx')
@@ -0,0 +1,127 @@
+import random
+from unittest import mock
+from rest_framework.test import APIClient
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, ProjectChange, Task, Board
+from boards import ranking
+from boards.ranking import rank_between, ranks_between, rebalance
+
+
+class RankTests(SimpleTestCase):
+    def test_ranks_between_are_ordered_and_short(self):
+        ranks = ranks_between(None, None, 10000)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), 10000)
+        self.assertLessEqual(max(len(rank) for rank in ranks), 4)
+
+    def test_random_inserts_stay_ordered(self):
+        rng = random.Random(0)
+        ranks = [rank_between(None, None)]
+        for _ in range(2000):
+            i = rng.randrange(len(ranks) + 1)
+            before = ranks[i - 1] if i > 0 else None
+            after = ranks[i] if i < len(ranks) else None
+            rank = rank_between(before, after)
+            self.assertTrue((before is None or before < rank) and (after is None or rank < after))
+            ranks.insert(i, rank)
+
+    def test_rejects_unordered_bounds(self):
+        with self.assertRaises(ValueError):
+            rank_between('a2', 'a1')
+
+
+class TaskMoveViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.other_board = Board.objects.create(title='Other Board', description='', project=self.project)
+        self.tasks = [Task.objects.create(title=f'task{i}', description='desc', board=self.board, project=self.project)
+                      for i in range(3)]
+        self.client.force_authenticate(user=self.user)
+
+    def move_url(self, task):
+        return reverse('task_move', kwargs={'proj_id': self.project.pk, 'board_id': task.board_id, 'task_id': task.pk})
+
+    def titles(self, board):
+        url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': board.pk})
+        return [task['title'] for task in self.client.get(url).data['results']]
+
+    def test_new_tasks_are_appended(self):
+        self.assertEqual(self.titles(self.board), ['task0', 'task1', 'task2'])
+
+    def test_move_within_board_updates_one_task(self):
+        response = self.client.post(self.move_url(self.tasks[2]), {'after': self.tasks[0].pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(self.board), ['task0', 'task2', 'task1'])
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).position, self.tasks[0].position)
+        self.assertEqual(Task.objects.get(pk=self.tasks[1].pk).position, self.tasks[1].position)
+
+    def test_move_to_other_board(self):
+        target = Task.objects.create(title='target', description='desc', board=self.other_board, project=self.project)
+        response = self.client.post(self.move_url(self.tasks[1]), {'board': self.other_board.pk, 'before': target.pk},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(self.other_board), ['task1', 'target'])
+        self.assertEqual(self.titles(self.board), ['task0', 'task2'])
+
+    def test_unknown_neighbour_is_rejected(self):
+        response = self.client.post(self.move_url(self.tasks[0]), {'after': 999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_ids_are_rejected(self):
+        board_url = reverse('board_move', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        for data in ({'board': 'x'}, {'board': [1]}, {'after': [1]}, {'before': 'x'}, {'after': True},
+                     {'after': 2 ** 63}):
+            self.assertEqual(self.client.post(self.move_url(self.tasks[0]), data, format='json').status_code,
+                             status.HTTP_400_BAD_REQUEST)
+            if 'board' not in data:
+                self.assertEqual(self.client.post(board_url, data, format='json').status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_move_board(self):
+        url = reverse('board_move', kwargs={'proj_id': self.project.pk, 'board_id': self.other_board.pk})
+        response = self.client.post(url, {'before': self.board.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('board_list', kwargs={'proj_id': self.project.pk}))
+        self.assertEqual([board['title'] for board in response.data['results']], ['Other Board', 'Test Board'])
+
+    def test_rebalance_keeps_order_and_shortens_ranks(self):
+        for _ in range(40):
+            self.client.post(self.move_url(self.tasks[2]), {'after': self.tasks[0].pk}, format='json')
+            self.client.post(self.move_url(self.tasks[1]), {'after': self.tasks[0].pk}, format='json')
+            self.tasks = [Task.objects.get(pk=task.pk) for task in self.tasks]
+        order = self.titles(self.board)
+        version = Project.objects.get(pk=self.project.pk).version
+        head = ProjectChange.objects.order_by('-id').values_list('id', flat=True).first()
+        changed = rebalance(Task.objects.filter(board=self.board))
+        self.assertEqual(self.titles(self.board), order)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).version, version + 1)
+        logged = ProjectChange.objects.filter(id__gt=head)
+        self.assertEqual(logged.count(), changed)
+        self.assertEqual({(change.model, change.action) for change in logged}, {('task', 'update')})
+        self.assertLessEqual(max(len(task.position) for task in Task.objects.filter(board=self.board)), 2)
+
+    def test_rebalance_keeps_a_concurrent_move(self):
+        for _ in range(20):
+            self.client.post(self.move_url(self.tasks[2]), {'after': self.tasks[0].pk}, format='json')
+            self.client.post(self.move_url(self.tasks[1]), {'after': self.tasks[0].pk}, format='json')
+            self.tasks = [Task.objects.get(pk=task.pk) for task in self.tasks]
+        moved = self.tasks[1]
+        first = min(Task.objects.filter(board=self.board).values_list('position', flat=True))
+        concurrent_rank = rank_between(None, first)
+        head = ProjectChange.objects.order_by('-id').values_list('id', flat=True).first()
+
+        def move_then_rank(a, b, n):
+            # Another request moves a task after rebalance read the ranks.
+            Task.objects.filter(pk=moved.pk).update(position=concurrent_rank)
+            return ranks_between(a, b, n)
+        with mock.patch.object(ranking, 'ranks_between', side_effect=move_then_rank):
+            rebalance(Task.objects.filter(board=self.board))
+        self.assertEqual(Task.objects.get(pk=moved.pk).position, concurrent_rank)
+        self.assertNotIn(concurrent_rank, ranks_between(None, None, len(self.tasks)))
+        self.assertFalse(ProjectChange.objects.filter(id__gt=head, model='task', object_id=moved.pk).exists())
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from boards.views import ProjectEventsView
+from boards.models import User, Profile, Project, ProjectMembership, Task, Board
+from boards.realtime import InProcessBroker
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    def test_fan_out_to_1000_subscribers(self):
+        async def run():
+            broker = InProcessBroker()
+            subscriptions = [broker.subscribe(1) for _ in range(1000)]
+            other_project = broker.subscribe(2)
+            loop = asyncio.get_running_loop()
+            # Publish from a worker thread, the way a sync view's post_save receiver would.
+            delivered = await loop.run_in_executor(None, broker.publish, 1, {'seq': 1})
+            events = await asyncio.wait_for(asyncio.gather(*(s.get() for s in subscriptions)), 5)
+            for subscription in subscriptions:
+                subscription.close()
+            return delivered, events, other_project.queue.qsize(), broker.subscriber_count(1)
+
+        delivered, events, other_queued, remaining = asyncio.run(run())
+        self.assertEqual(delivered, 1000)
+        self.assertEqual(events, [{'seq': 1}] * 1000)
+        self.assertEqual(other_queued, 0)
+        self.assertEqual(remaining, 0)
+
+    def test_slow_subscriber_is_marked_overflowed(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = broker.subscribe(1)
+            subscription.queue = asyncio.Queue(maxsize=1)
+            broker.publish(1, {'seq': 1})
+            broker.publish(1, {'seq': 2})
+            await asyncio.sleep(0)
+            return subscription.overflowed
+
+        self.assertTrue(asyncio.run(run()))
+
+
+class ProjectEventsViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.url = reverse('project_events', kwargs={'pk': self.project.pk})
+
+    async def test_task_change_is_pushed_to_subscriber(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        def create_task():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        task = await sync_to_async(create_task)()
+
+        chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+        event = json.loads(chunk.split('data: ', 1)[1])
+        self.assertEqual((event['model'], event['action'], event['object_id']), ('task', 'create', task.pk))
+
+    async def test_non_member_is_rejected(self):
+        outsider = await sync_to_async(User.objects.create_user)(username='outsider', password='testpassword')
+        await sync_to_async(self.async_client.force_login)(outsider)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_out_of_range_last_event_id_is_rejected(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': str(2 ** 64)})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stream_ends_when_membership_is_removed(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(self.url)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        def leave():
+            with self.captureOnCommitCallbacks(execute=True):
+                ProjectMembership.objects.filter(project=self.project, member=self.profile).delete()
+        await sync_to_async(leave)()
+
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(stream), 5)
+
+    def test_backlog_of_deleted_project_is_not_found(self):
+        project_id = self.project.pk
+        self.project.delete()
+        with self.assertRaises(Http404):
+            ProjectEventsView().backlog(project_id, 0)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from boards.access import clear_access_cache
+from boards.models import User, Profile, Project, ProjectMembership, Board, Task, TaskReminder
+from boards import reminders
+from boards.reminders import encode_cursor, open_tasks, scan_reminders
+
+
+class ReminderTests(TestCase):
+    def setUp(self):
+        clear_access_cache()
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='desc', owner=self.profile)
+        self.board = Board.objects.create(title='Board', description='desc', project=self.project)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def task(self, title, hours=None, profile=None, project=None, board=None, **kwargs):
+        delivery_date = self.now + timedelta(hours=hours) if hours is not None else None
+        return Task.objects.create(title=title, description='desc', board=board or self.board,
+                                   project=project or self.project, profile=profile or self.profile,
+                                   delivery_date=delivery_date, **kwargs)
+
+    def reminders(self):
+        return sorted(TaskReminder.objects.values_list('task__title', 'kind', 'date_field'))
+
+    def test_scan_writes_each_reminder_once(self):
+        self.task('overdue', -5)
+        self.task('soon', 5)
+        self.task('later', 48)
+        self.task('long overdue', -24 * 30)
+        self.task('done', -5, status_task=Task.Status.DONE)
+        self.task('undated')
+        self.task('finish soon', finish_date=self.now + timedelta(hours=1))
+        self.assertEqual(scan_reminders('default', now=self.now, batch_size=1), {'due_soon': 2, 'overdue': 1})
+        expected = [('finish soon', 'due_soon', 'finish_date'), ('overdue', 'overdue', 'delivery_date'),
+                    ('soon', 'due_soon', 'delivery_date')]
+        self.assertEqual(self.reminders(), expected)
+        self.assertEqual(scan_reminders('default', now=self.now), {'due_soon': 0, 'overdue': 0})
+
+        # A day later the task that was due soon is overdue, and a moved due date is reminded again.
+        Task.objects.filter(title='overdue').update(delivery_date=self.now + timedelta(hours=30))
+        self.assertEqual(scan_reminders('default', now=self.now + timedelta(days=1)), {'due_soon': 1, 'overdue': 2})
+        self.assertEqual(self.reminders(), sorted(expected + [('finish soon', 'overdue', 'finish_date'),
+                                                              ('overdue', 'due_soon', 'delivery_date'),
+                                                              ('soon', 'overdue', 'delivery_date')]))
+
+    def test_scans_and_queries_read_the_due_date_indexes(self):
+        queries = [
+            ('task_delivery_idx', 'delivery_date', open_tasks('delivery_date', self.now, self.now + timedelta(days=1))),
+            ('task_project_delivery_idx', 'delivery_date',
+             open_tasks('delivery_date', end=self.now).filter(project_id=1)),
+            ('task_profile_finish_idx', 'finish_date', open_tasks('finish_date', end=self.now).filter(profile_id=1)),
+        ]
+        if connection.vendor != 'sqlite':
+            self.skipTest('The plans are checked on SQLite.')
+        for index, field, tasks in queries:
+            self.assertIn(f'USING INDEX {index}', tasks.order_by(field, 'id').explain())
+
+    def test_project_due_tasks(self):
+        tasks = [self.task(f'task {hours}', hours) for hours in (-30, -2, 3, 10, 50)]
+        self.task('done', -1, status_task=Task.Status.DONE)
+        url = reverse('project_due_tasks', kwargs={'pk': self.project.pk})
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['title'] for task in response.data['results']], ['task -30', 'task -2'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([task['title'] for task in response.data['results']], ['task 3', 'task 10'])
+        self.assertIsNone(response.data['next'])
+        overdue = self.client.get(url, {'overdue': '1'})
+        self.assertEqual([task['id'] for task in overdue.data['results']], [tasks[0].id, tasks[1].id])
+        within = self.client.get(url, {'within': '3'})
+        self.assertEqual(len(within.data['results']), 5)
+        for params in ({'date': 'title'}, {'within': 'x'}, {'within': 'inf'}, {'within': 'nan'}, {'within': '1e10'},
+                       {'cursor': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='testpassword'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_due_tasks_and_reminders(self):
+        other = Profile.objects.get(user=User.objects.create_user(username='other', password='testpassword'))
+        other_project = Project.objects.create(title='Other', description='desc', owner=other)
+        other_board = Board.objects.create(title='Board', description='desc', project=other_project)
+        self.task('mine', 2)
+        self.task('mine, earlier', -2)
+        self.task('assigned to other', 2, profile=other)
+        # Assigned to the user in a project they do not belong to.
+        self.task('not a member', 2, project=other_project, board=other_board)
+        response = self.client.get(reverse('user_due_tasks'))
+        self.assertEqual([task['title'] for task in response.data['results']], ['mine, earlier', 'mine'])
+        self.assertEqual(self.client.get(reverse('user_due_tasks'), {'within': '-inf'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        ProjectMembership.objects.create(project=other_project, member=self.profile)
+        clear_access_cache()
+        response = self.client.get(reverse('user_due_tasks'), {'limit': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+        scan_reminders('default', now=self.now)
+        response = self.client.get(reverse('reminders'), {'limit': 2})
+        self.assertEqual([reminder['kind'] for reminder in response.data['results']], ['due_soon', 'due_soon'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([(reminder['kind'], reminder['date_field']) for reminder in response.data['results']],
+                         [('overdue', 'delivery_date')])
+
+    def test_scan_reminders_command(self):
+        self.task('overdue', -5)
+        out = StringIO()
+        call_command('scan_reminders', stdout=out)
+        self.assertIn('Wrote 0 due-soon and 1 overdue reminders.', out.getvalue())
+
+    def test_scheduler_survives_a_failed_scan(self):
+        class Stop(BaseException):
+            pass
+        scans = [RuntimeError('boom'), {'due_soon': 0, 'overdue': 0}]
+        with mock.patch.object(reminders, 'scan_all_shards', side_effect=scans) as scan, \
+                mock.patch.object(reminders.time, 'sleep', side_effect=[None, None, Stop]), \
+                mock.patch.object(reminders, 'connections'), \
+                self.assertLogs('boards.reminders', 'ERROR'), self.assertRaises(Stop):
+            reminders._run_scheduler(60)
+        self.assertEqual(scan.call_count, 2)
+
+    def test_out_of_range_ids_are_rejected(self):
+        cursor = encode_cursor((self.now, 2 ** 64))
+        for url, params in ((reverse('project_due_tasks', kwargs={'pk': self.project.pk}), {'cursor': cursor}),
+                            (reverse('user_due_tasks'), {'cursor': cursor}),
+                            (reverse('reminders'), {'before': str(10 ** 30)}),
+                            (reverse('reminders'), {'before': '-1'})):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
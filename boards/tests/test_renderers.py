@@ -0,0 +1,102 @@
+import gzip
+import io
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from boards.compression import CompressionMiddleware, negotiate_encoding
+from boards.models import User, Profile, Project, Board, Task
+from boards.renderers import FastJSONRenderer, FastJSONParser
+
+
+class FastJSONTests(SimpleTestCase):
+    def test_renders_like_drf(self):
+        data = {'when': datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=dt_timezone.utc), 'price': Decimal('1.50'),
+                'label': gettext_lazy('label'), 'text': 'line separator é', 'ids': (1, 2), 'nested': [None, True],
+                'big': 2 ** 70, 3: 'int key'}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=4'),
+                         JSONRenderer().render(data, 'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parses_like_drf(self):
+        body = '{"title": "é", "n": [1, 2.5, null]}'.encode()
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            FastJSONParser().parse(io.BytesIO(b'{"title": '))
+
+    @override_settings(FAST_JSON=False)
+    def test_stdlib_fallback(self):
+        self.assertEqual(FastJSONRenderer().render({'a': 1}), b'{"a":1}')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": 1}')), {'a': 1})
+
+
+class CompressionTests(SimpleTestCase):
+    def respond(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('*;q=0.1', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=0, identity', ('gzip',)), None)
+        self.assertEqual(negotiate_encoding('', ('gzip',)), None)
+
+    def test_compresses_large_json_with_weak_etag(self):
+        body = b'{"results":[' + b','.join(b'{"title":"task %d"}' % i for i in range(200)) + b']}'
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        response = self.respond(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_leaves_small_unaccepted_and_binary_responses(self):
+        small = self.respond(HttpResponse(b'{"a":1}' * 100, content_type='application/json'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        unaccepted = self.respond(HttpResponse(b'{"a":1}' * 1000, content_type='application/json'), 'identity')
+        self.assertFalse(unaccepted.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', unaccepted['Vary'])
+        image = self.respond(HttpResponse(b'\x89PNG' * 1000, content_type='image/png'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+        page = self.respond(HttpResponse(b'<input name="csrfmiddlewaretoken" value="secret">' * 100,
+                                         content_type='text/html; charset=utf-8'))
+        self.assertFalse(page.has_header('Content-Encoding'))
+        events = self.respond(StreamingHttpResponse(iter([b'data: 1\n\n']), content_type='text/event-stream'))
+        self.assertFalse(events.has_header('Content-Encoding'))
+
+    def test_compresses_streams(self):
+        chunks = [b'{"type":"task","id":%d}\n' % i for i in range(500)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/x-ndjson'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+
+class CompressedAPITests(TestCase):
+    def test_task_list_is_sent_compressed(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        project = Project.objects.create(title='Test Project', description='desc', owner=Profile.objects.get(user=user))
+        board = Board.objects.create(title='Board', description='desc', project=project)
+        for number in range(10):
+            Task.objects.create(title=f'task {number}', description='x' * 200, board=board, project=project)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse('task_list', kwargs={'proj_id': project.pk, 'board_id': board.pk})
+        plain = client.get(url)
+        compressed = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=compressed['ETag']).status_code, 304)
+        response = client.post(url, {'title': 'new', 'description': 'd', 'board': board.pk, 'project': project.pk},
+                               format='json')
+        self.assertEqual(response.status_code, 200)
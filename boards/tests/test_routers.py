@@ -0,0 +1,98 @@
+import os
+import tempfile
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from boards.models import User, Profile, Project, Task, Board
+from boards.routers import ReadWriteRouter, PIN_COOKIE, _state
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadWriteRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReadWriteRouter()
+        token = _state.set(None)
+        self.addCleanup(_state.reset, token)
+
+    def test_reads_go_to_replicas_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Task), 'replica')
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_the_default_routing_applies(self):
+        self.assertIsNone(self.router.db_for_read(Task))
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'boards'))
+        self.assertIsNone(self.router.allow_migrate('default', 'boards'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Uses a local SQLite file, filled by copying the primary, as a stand-in replica."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after the test runner set up its databases: the file is the whole replica.
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {**connections.settings['default'],
+                                           'NAME': os.path.join(cls.replica_dir.name, 'replica.sqlite3')}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.client = APIClient()
+        self.client.force_login(self.user)
+        self.replicate()
+        # Written after the last replication, so only the primary has it.
+        self.task = Task.objects.create(title='fresh', description='desc', board=self.board, project=self.project)
+        self.client.cookies.pop(PIN_COOKIE, None)
+        # Forget that setUp itself wrote, so reads in the test are routed afresh.
+        _state.set(None)
+
+    def replicate(self):
+        for alias in ('default', 'replica'):
+            connections[alias].ensure_connection()
+        connections['default'].connection.backup(connections['replica'].connection)
+
+    def task_titles(self):
+        url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['title'] for task in response.data['results']]
+
+    def test_reads_are_served_by_the_replica(self):
+        self.assertEqual(self.task_titles(), [])
+        self.assertTrue(Task.objects.using('default').filter(pk=self.task.pk).exists())
+
+    def test_client_reads_its_own_writes_after_writing(self):
+        url = reverse('task_edit', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk,
+                                           'task_id': self.task.pk})
+        data = {'title': 'edited', 'description': 'desc', 'board': self.board.pk, 'project': self.project.pk}
+        # The task exists only on the primary; the update is routed there and pins the client to it.
+        self.replicate()
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.cookies[PIN_COOKIE].value, '1')
+        self.assertEqual(self.task_titles(), ['edited'])
+        self.client.cookies.pop(PIN_COOKIE)
+        self.assertEqual(self.task_titles(), ['fresh'])
+
+    def test_reads_inside_a_primary_transaction_stay_on_the_primary(self):
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+        with transaction.atomic():
+            self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
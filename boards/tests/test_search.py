@@ -0,0 +1,72 @@
+from rest_framework.test import APIClient
+from django.test import TestCase
+from rest_framework import status
+from django.urls import reverse
+from boards.models import User, Profile, Project, Task, Board
+from boards.search import encode_cursor
+
+
+class TaskSearchViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.url = reverse('task_search')
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, title, description='desc', project=None, board=None):
+        return Task.objects.create(title=title, description=description, board=board or self.board,
+                                   project=project or self.project)
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['stable_paging'])
+        return [task['title'] for task in response.data['results']], response.data['next']
+
+    def test_ranked_prefix_search(self):
+        self.create_task('write release notes')
+        self.create_task('deploy', description='after the release notes are written')
+        self.create_task('unrelated')
+        titles, _ = self.search(q='releas')
+        self.assertEqual(titles, ['write release notes', 'deploy'])
+
+    def test_index_follows_updates_and_deletes(self):
+        task = self.create_task('draft')
+        task.title = 'final'
+        task.save()
+        self.assertEqual(self.search(q='draft')[0], [])
+        self.assertEqual(self.search(q='final')[0], ['final'])
+        task.delete()
+        self.assertEqual(self.search(q='final')[0], [])
+
+    def test_results_are_scoped_to_member_projects(self):
+        other_user = User.objects.create_user(username='other', password='testpassword')
+        other_project = Project.objects.create(title='Other', description='', owner=Profile.objects.get(user=other_user))
+        other_board = Board.objects.create(title='Board', description='', project=other_project)
+        self.create_task('secret plan', project=other_project, board=other_board)
+        self.create_task('public plan')
+        self.assertEqual(self.search(q='plan')[0], ['public plan'])
+
+    def test_keyset_paging(self):
+        for i in range(5):
+            self.create_task(f'report {i}')
+        titles, next_url = self.search(q='report', limit=2)
+        seen = list(titles)
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [task['title'] for task in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(sorted(seen), [f'report {i}' for i in range(5)])
+        self.assertEqual(len(seen), 5)
+
+    def test_out_of_range_cursor_is_rejected(self):
+        for position in ([0.0, 2 ** 63], [0.0, -1], ['nan', 1]):
+            response = self.client.get(self.url, {'q': 'report', 'cursor': encode_cursor(position)})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_query_is_rejected(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone as dt_timezone
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from boards.counters import board_counts
+from boards.models import User, Profile, Project, Board, Task
+from boards.serializers import BoardSerializer, TaskSerializer, TASK_ROWS, BOARD_ROWS
+
+
+class RowSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='desc', owner=self.profile)
+        self.board = Board.objects.create(title='Board', description='desc', project=self.project)
+        Task.objects.create(title='bare', description='', board=self.board, project=self.project)
+        Task.objects.create(title='dated', description='d', board=self.board, project=self.project,
+                            profile=self.profile, status_task=Task.Status.DOING,
+                            start_date=datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+                            delivery_date=datetime(2024, 6, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc))
+
+    def assertSameJSON(self, first, second):
+        self.assertEqual(JSONRenderer().render(first), JSONRenderer().render(second))
+
+    def test_tasks_render_exactly_like_task_serializer(self):
+        tasks = Task.objects.order_by('id')
+        for zone in ('UTC', 'Asia/Kolkata'):
+            with timezone.override(zone):
+                self.assertSameJSON(TASK_ROWS.to_representation(TASK_ROWS.values(tasks)),
+                                    TaskSerializer(instance=tasks, many=True).data)
+
+    def test_boards_render_exactly_like_board_serializer(self):
+        boards = Board.objects.order_by('id')
+        self.assertSameJSON(
+            BOARD_ROWS.to_representation(BOARD_ROWS.values(boards), task_counts=lambda row: board_counts(self.board)),
+            BoardSerializer(instance=boards, many=True).data)
+
+    def test_list_views_keep_their_wire_format(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk}))
+        tasks = Task.objects.order_by('position', 'id')
+        self.assertEqual(response.json()['results'], TaskSerializer(instance=tasks, many=True).data)
+        response = client.get(reverse('board_list', kwargs={'proj_id': self.project.pk}))
+        self.assertEqual(response.json()['results'], BoardSerializer(instance=Board.objects.all(), many=True).data)
+        self.assertEqual(response.json()['results'][0]['task_counts'], {'todo': 1, 'doing': 1, 'suspend': 0, 'done': 0})
+
+    def test_payload_fields_are_listed(self):
+        task = Task.objects.first()
+        self.assertEqual(list(TaskSerializer(task).data),
+                         ['id', 'title', 'description', 'start_date', 'finish_date', 'delivery_date', 'status_task',
+                          'position', 'updated_at', 'board', 'project', 'profile'])
+        self.assertEqual(list(BoardSerializer(self.board).data),
+                         ['id', 'task_counts', 'title', 'description', 'position', 'updated_at', 'project'])
+        read_only = {name for name, field in TaskSerializer().fields.items() if field.read_only}
+        self.assertEqual(read_only, {'id', 'position', 'updated_at'})
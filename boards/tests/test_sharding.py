@@ -0,0 +1,191 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command, CommandError
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from boards.access import clear_access_cache
+from boards.changes import changes_since
+from boards.models import (User, Profile, ProjectShard, Project, ProjectMembership, Board, Task, BoardTaskCount,
+                           TaskReminder)
+from boards.sharding import forget_project, move_project, _directory
+
+
+@override_settings(PROJECT_SHARDS=['default', 'shard1'])
+class ProjectShardingTests(TransactionTestCase):
+    """A local SQLite file serves as the second shard."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after the test runner set up its databases, like a shard added to a running deployment.
+        cls.shard_dir = tempfile.TemporaryDirectory()
+        default = connections.settings['default']
+        connections.settings['shard1'] = {
+            **default, 'NAME': os.path.join(cls.shard_dir.name, 'shard1.sqlite3'),
+            'OPTIONS': {**default['OPTIONS'], 'pragmas': {**default['OPTIONS'].get('pragmas', {}), 'foreign_keys': 'OFF'}},
+        }
+        call_command('migrate', database='shard1', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['shard1'].close()
+        del connections['shard1']
+        del connections.settings['shard1']
+        cls.shard_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        _directory.clear()
+        clear_access_cache()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        call_command('flush', database='shard1', interactive=False, verbosity=0)
+
+    def create_project(self, alias, title='Project'):
+        project_id = ProjectShard.allocate()
+        ProjectShard.objects.filter(pk=project_id).update(alias=alias)
+        forget_project(project_id)
+        return Project.objects.create(id=project_id, title=title, description='', owner=self.profile)
+
+    def test_new_projects_are_spread_over_the_shards_by_id(self):
+        ids = []
+        for title in ('first', 'second'):
+            response = self.client.post(reverse('project_list'), {'title': title, 'description': '',
+                                                                  'owner': self.profile.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            ids.append(response.data['id'])
+        for project_id in ids:
+            alias = ['default', 'shard1'][project_id % 2]
+            self.assertEqual(ProjectShard.objects.get(pk=project_id).alias, alias)
+            self.assertTrue(Project.objects.using(alias).filter(pk=project_id).exists())
+            self.assertTrue(ProjectMembership.objects.using(alias).filter(project_id=project_id,
+                                                                          member=self.profile).exists())
+        self.assertEqual(Project.objects.using('default').count() + Project.objects.using('shard1').count(), 2)
+
+    def test_views_use_the_shard_of_the_project_in_the_url(self):
+        project = self.create_project('shard1')
+        response = self.client.post(reverse('board_list', kwargs={'proj_id': project.pk}),
+                                    {'title': 'Board', 'description': '', 'project': project.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        board_id = response.data['id']
+        # Each shard allocates ids from its own block.
+        self.assertGreaterEqual(board_id, 10 ** 12)
+        url = reverse('task_list', kwargs={'proj_id': project.pk, 'board_id': board_id})
+        data = {'title': 'write plan', 'description': 'desc', 'board': board_id, 'project': project.pk,
+                'profile': self.profile.pk}
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_200_OK)
+
+        self.assertEqual([task['title'] for task in self.client.get(url).data['results']], ['write plan'])
+        self.assertEqual(BoardTaskCount.objects.using('shard1').get(board_id=board_id, status_task='todo').count, 1)
+        self.assertFalse(Task.objects.using('default').exists())
+        snapshot = self.client.get(reverse('board_snapshot', kwargs={'proj_id': project.pk, 'board_id': board_id}))
+        self.assertEqual([profile['id'] for profile in snapshot.data['profiles']], [self.profile.pk])
+        detail = self.client.get(reverse('project_detail', kwargs={'pk': project.pk}))
+        self.assertEqual(detail.data['owner']['id'], self.profile.pk)
+        self.assertEqual(detail.data['task_counts']['todo'], 1)
+
+        other = User.objects.create_user(username='other', password='testpassword')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_project_list_and_search_span_the_shards(self):
+        for alias in ('default', 'shard1'):
+            project = self.create_project(alias, title=alias)
+            board = Board.objects.create(title='Board', description='', project=project)
+            Task.objects.create(title=f'release on {alias}', description='', board=board, project=project)
+        response = self.client.get(reverse('project_list'))
+        self.assertEqual([project['title'] for project in response.data['results']], ['default', 'shard1'])
+        self.assertEqual(response.data['results'][1]['members'], [self.profile.pk])
+        response = self.client.get(reverse('task_search'), {'q': 'release'})
+        self.assertEqual(sorted(task['title'] for task in response.data['results']),
+                         ['release on default', 'release on shard1'])
+
+    def test_move_project_between_shards(self):
+        project = self.create_project('shard1')
+        board = Board.objects.create(title='Board', description='', project=project)
+        task = Task.objects.create(title='keep me', description='', board=board, project=project)
+        before = changes_since(project, 0)[2]
+
+        out = StringIO()
+        call_command('move_project', project.pk, 'default', wait=0, stdout=out)
+        self.assertIn('is now on', out.getvalue())
+
+        self.assertEqual(ProjectShard.objects.get(pk=project.pk).alias, 'default')
+        self.assertFalse(Task.objects.using('shard1').exists())
+        self.assertFalse(Project.objects.using('shard1').exists())
+        moved = Task.objects.using('default').get(pk=task.pk)
+        self.assertEqual((moved.title, moved.updated_at), ('keep me', task.updated_at))
+        url = reverse('task_list', kwargs={'proj_id': project.pk, 'board_id': board.pk})
+        self.assertEqual([item['title'] for item in self.client.get(url).data['results']], ['keep me'])
+
+        # The log stays behind: clients that were behind reload, clients that were current carry on.
+        project = Project.objects.using('default').get(pk=project.pk)
+        self.assertTrue(changes_since(project, 0)[0])
+        Task.objects.create(title='after', description='', board=board, project=project)
+        reset, changes, _, _ = changes_since(project, before)
+        self.assertFalse(reset)
+        self.assertEqual([change.data['title'] for change in changes], ['after'])
+
+    def test_board_deleted_during_a_move(self):
+        project = self.create_project('shard1')
+        doomed, kept = (Board.objects.create(title=title, description='', project=project) for title in ('a', 'b'))
+        for board in (doomed, kept):
+            task = Task.objects.create(title='task', description='', board=board, project=project)
+            TaskReminder.objects.create(task=task, project=project, date_field='delivery_date',
+                                        kind=TaskReminder.Kind.OVERDUE, due_at=timezone.now())
+        caught_up = []
+
+        def log(message):
+            if message.startswith('project:'):
+                # Deleted on the source after the rows were copied, before the log is replayed.
+                Board.objects.get(pk=doomed.pk).delete()
+            elif message.startswith('caught up') and not caught_up:
+                caught_up.append(Task.objects.using('default').filter(board_id=doomed.pk).count())
+        move_project(project.pk, 'default', wait=0, log=log)
+
+        self.assertEqual(caught_up, [0])
+        for model in (Task, BoardTaskCount):
+            self.assertFalse(model.objects.using('default').filter(board_id=doomed.pk).exists())
+            self.assertTrue(model.objects.using('default').filter(board_id=kept.pk).exists())
+        self.assertEqual(list(TaskReminder.objects.using('default').values_list('task__board_id', flat=True)),
+                         [kept.pk])
+
+    def test_failed_move_removes_its_copy(self):
+        project = self.create_project('shard1')
+        board = Board.objects.create(title='Board', description='', project=project)
+        Task.objects.create(title='task', description='', board=board, project=project)
+        with mock.patch('boards.sharding.raise_sequence', side_effect=RuntimeError('disk full')), \
+                self.assertRaises(RuntimeError):
+            move_project(project.pk, 'default', wait=0)
+        self.assertEqual(ProjectShard.objects.values_list('alias', 'frozen').get(pk=project.pk), ('shard1', False))
+        for model in (Project, Board, Task, BoardTaskCount):
+            self.assertFalse(model.objects.using('default').filter(**{'id' if model is Project else 'project_id':
+                                                                     project.pk}).exists())
+        self.assertTrue(Task.objects.using('shard1').filter(project_id=project.pk).exists())
+
+    def test_frozen_project_refuses_writes(self):
+        project = self.create_project('shard1')
+        board = Board.objects.create(title='Board', description='', project=project)
+        ProjectShard.objects.filter(pk=project.pk).update(frozen=True)
+        forget_project(project.pk)
+        url = reverse('board_detail', kwargs={'proj_id': project.pk, 'board_id': board.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        self.assertTrue(Board.objects.using('shard1').filter(pk=board.pk).exists())
+
+    def test_move_rejects_unknown_shards(self):
+        project = self.create_project('default')
+        with self.assertRaises(CommandError):
+            call_command('move_project', project.pk, 'nowhere', wait=0, stdout=StringIO())
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from django.db import connection, OperationalError
+from django.test import SimpleTestCase
+from boards.backends.sqlite3.base import DatabaseWrapper
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+
+    def wrapper(self, **options):
+        settings_dict = {**connection.settings_dict, 'NAME': self.path, 'OPTIONS': {'timeout': 0, **options}}
+        wrapper = DatabaseWrapper(settings_dict, alias='tuned')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        wrapper = self.wrapper(pragmas={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234})
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+
+    def test_immediate_transactions_take_the_write_lock_up_front(self):
+        for mode, blocks_writer in (('DEFERRED', False), ('IMMEDIATE', True)):
+            with self.subTest(mode=mode):
+                first = self.wrapper(transaction_mode=mode, pragmas={'journal_mode': 'WAL'})
+                second = self.wrapper(pragmas={'busy_timeout': 0})
+                with second.cursor() as cursor:
+                    cursor.execute('CREATE TABLE IF NOT EXISTS t (x)')
+                first.ensure_connection()
+                first._start_transaction_under_autocommit()
+                try:
+                    with second.cursor() as cursor:
+                        if blocks_writer:
+                            with self.assertRaises(OperationalError):
+                                cursor.execute('INSERT INTO t VALUES (1)')
+                        else:
+                            cursor.execute('INSERT INTO t VALUES (1)')
+                finally:
+                    first.connection.rollback()
@@ -0,0 +1,80 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from boards.access import clear_access_cache
+from boards.models import User, Profile, Project, ProjectMembership, Board
+from boards.tokens import _principals
+
+
+class ProjectClaimTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _principals.clear()
+        clear_access_cache()
+        self.owner = User.objects.create_user(username='owner', password='testpassword')
+        self.member = User.objects.create_user(username='member', password='testpassword')
+        self.project = Project.objects.create(title='Test Project', description='desc',
+                                              owner=Profile.objects.get(user=self.owner))
+        self.board = Board.objects.create(title='Board', description='desc', project=self.project)
+        self.membership = ProjectMembership.objects.create(project=self.project,
+                                                           member=Profile.objects.get(user=self.member))
+        self.client = APIClient()
+
+    def obtain(self, username):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': 'testpassword'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_access_token_embeds_project_access_levels(self):
+        tokens = self.obtain('owner')
+        self.assertEqual(AccessToken(tokens['access'])['projects'], {str(self.project.pk): 2})
+        self.assertNotIn('projects', RefreshToken(tokens['refresh']))
+
+    def test_token_requests_run_no_authentication_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.obtain("member")["access"]}')
+        url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        tables = ('auth_user', 'django_session', 'boards_projectmembership', 'boards_profile')
+        self.assertEqual([query['sql'] for query in queries if any(table in query['sql'] for table in tables)], [])
+
+    def test_membership_change_revokes_claims_until_refresh(self):
+        tokens = self.obtain('member')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        url = reverse('board_list', kwargs={'proj_id': self.project.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.membership.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        refreshed = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(AccessToken(refreshed.data['access'])['projects'], {})
+
+    def test_session_authentication_still_works(self):
+        self.client.login(username='member', password='testpassword')
+        url = reverse('board_list', kwargs={'proj_id': self.project.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_suite_cache_is_outside_the_working_tree(self):
+        location = Path(settings.CACHES['default']['LOCATION']).resolve()
+        self.assertNotIn(Path(settings.BASE_DIR).resolve(), location.parents)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_claims_are_not_trusted_without_a_shared_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.obtain("member")["access"]}')
+        url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertTrue(any('boards_projectmembership' in query['sql'] for query in queries))
+        # Revoked in another process: this one only sees the database.
+        self.membership.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,6 +2,8 @@ from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from django.test import TestCase, Client
 from rest_framework import status
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from boards.models import User, Profile, Project, ProjectMembership, Task, Board
 from boards.serializers import UserSerializer, ProfileSerializer, ProjectListSerializer, ProjectSerializer, ProjectMembershipSerializer
 from boards.permissions import CanViewProfile, CanEditProject
@@ -43,8 +45,8 @@ class UserViewTests(TestCase):
         
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # به خاطر صفحه بندی 4 شده، اگر صفحه بندی را کامنت کنید همان 1 نتیجه حاصل میشه
-        self.assertEqual(len(response.data), 4)
+        # به خاطر صفحه بندی 3 شده، اگر صفحه بندی را کامنت کنید همان 1 نتیجه حاصل میشه
+        self.assertEqual(len(response.data), 3)
         self.assertEqual(response.data['results'][0]['username'], 'testuser2')
 
 
@@ -61,7 +63,7 @@ class ProfileViewTests(TestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(response.data), 3)
         self.assertEqual(response.data['results'][0]['profile_name'], 'testprofile')
         self.assertEqual(response.data['results'][0]['bio'], 'test_profile_bio')
 
@@ -203,6 +205,24 @@ class ProjectMemberListViewTests(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_member_lists_all_members(self):
+        # Recreate a profile so that user and profile ids no longer line up.
+        ghost = User.objects.create_user(username='ghost', password='testpassword')
+        Profile.objects.filter(user=ghost).delete()
+        Profile.objects.create(user=ghost)
+        self.create_project_membership()
+        self.assertNotEqual(self.user2.pk, self.profile2.pk)
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({membership['member'] for membership in response.data}, {self.profile.pk, self.profile2.pk})
+
+    def test_outsider_cannot_list_members(self):
+        outsider = User.objects.create_user(username='outsider', password='testpassword')
+        self.client.force_authenticate(user=outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_list_project_members_invalid_project_id(self):
         invalid_url = reverse('project_detail', kwargs={'pk': 999})  # Assuming project ID 999 does not exist
         response = self.client.get(invalid_url)
@@ -218,3 +238,194 @@ class ProjectMemberListViewTests(TestCase):
         self.assertEqual(str(ProjectMembership.objects.get(access_level=1)), f'{self.profile2} | {self.project.title}')
 
 
+
+
+class TaskListViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='Board Description', project=self.project)
+        self.url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_tasks_cursor_pagination(self):
+        Task.objects.bulk_create([Task(title=f'task{i}', description='', board=self.board, project=self.project)
+                                  for i in range(25)])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNone(response.data['previous'])
+        seen = [task['title'] for task in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [task['title'] for task in response.data['results']]
+        self.assertEqual(seen, [f'task{i}' for i in range(25)])
+
+    def test_create_task(self):
+        data = {'title': 'New Task', 'description': 'Task Description', 'board': self.board.pk, 'project': self.project.pk}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.get().title, 'New Task')
+
+
+class ProjectQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def add_members(self, project, count):
+        for i in range(count):
+            user = User.objects.create(username=f'{project.pk}_member{i}')
+            ProjectMembership.objects.create(project=project, member=Profile.objects.get(user=user))
+
+    def test_project_detail_query_count_is_constant(self):
+        for member_count in (1, 8):
+            project = Project.objects.create(title='Project', description='', owner=self.profile)
+            self.add_members(project, member_count)
+            # version lookup for the ETag, the project with its owner, the memberships, the task counts
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse('project_detail', kwargs={'pk': project.pk}))
+            self.assertEqual(len(response.data['members']), member_count + 1)
+
+    def test_project_list_query_count_is_constant(self):
+        for project_count in (1, 8):
+            for i in range(project_count):
+                project = Project.objects.create(title=f'Project{i}', description='', owner=self.profile)
+                self.add_members(project, 3)
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('project_list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TaskBulkViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.other_board = Board.objects.create(title='Other Board', description='', project=self.project)
+        self.url = reverse('task_bulk', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_runs_constant_queries(self):
+        operations = [{'op': 'create', 'data': {'title': f'task{i}', 'description': 'desc'}} for i in range(1000)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # task and change-log inserts are batched by SQLite's 999 parameter limit
+        self.assertLessEqual(len(queries), 30)
+        self.assertEqual(Task.objects.filter(board=self.board).count(), 1000)
+        self.assertTrue(all(result['id'] for result in response.data['results']))
+
+    def test_bulk_update_status_and_move(self):
+        tasks = Task.objects.bulk_create([Task(title=f'task{i}', description='desc', board=self.board, project=self.project)
+                                          for i in range(3)])
+        operations = [
+            {'op': 'update', 'id': tasks[0].pk, 'data': {'title': 'renamed'}},
+            {'op': 'status', 'id': tasks[1].pk, 'status_task': 'doing'},
+            {'op': 'move', 'id': tasks[2].pk, 'board': self.other_board.pk},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).title, 'renamed')
+        self.assertEqual(Task.objects.get(pk=tasks[1].pk).status_task, 'doing')
+        self.assertEqual(Task.objects.get(pk=tasks[2].pk).board, self.other_board)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        operations = [
+            {'op': 'create', 'data': {'title': 'ok', 'description': 'desc'}},
+            {'op': 'create', 'data': {'description': 'missing title'}},
+            {'op': 'move', 'id': 999, 'board': self.other_board.pk},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('errors', response.data['results'][0])
+        self.assertIn('title', response.data['results'][1]['errors'])
+        self.assertIn('id', response.data['results'][2]['errors'])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_repeated_task_rejects_whole_batch(self):
+        task = Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        operations = [
+            {'op': 'status', 'id': task.pk, 'status_task': 'doing'},
+            {'op': 'move', 'id': task.pk, 'board': self.other_board.pk},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('errors', response.data['results'][0])
+        self.assertIn('id', response.data['results'][1]['errors'])
+        task.refresh_from_db()
+        self.assertEqual((task.status_task, task.board_id), ('todo', self.board.pk))
+
+
+class BoardSnapshotViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.url = reverse('board_snapshot', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_snapshot_groups_tasks_by_status(self):
+        Task.objects.bulk_create([
+            Task(title='a', description='desc', board=self.board, project=self.project, profile=self.profile),
+            Task(title='b', description='desc', board=self.board, project=self.project, status_task='doing'),
+            Task(title='c', description='desc', board=self.board, project=self.project, status_task='done'),
+            Task(title='d', description='desc', board=self.board, project=self.project, status_task='done'),
+        ])
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['board']['title'], 'Test Board')
+        self.assertEqual(response.data['counts'], {'todo': 1, 'doing': 1, 'suspend': 0, 'done': 2})
+        self.assertEqual([task['title'] for task in response.data['columns']['done']], ['c', 'd'])
+        self.assertEqual([profile['id'] for profile in response.data['profiles']], [self.profile.pk])
+
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.profile = Profile.objects.get(user=self.user)
+        self.project = Project.objects.create(title='Test Project', description='Project Description', owner=self.profile)
+        self.board = Board.objects.create(title='Test Board', description='', project=self.project)
+        self.task = Task.objects.create(title='task', description='desc', board=self.board, project=self.project)
+        self.client.force_authenticate(user=self.user)
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_task_list_etag_changes_when_a_task_changes(self):
+        url = reverse('task_list', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk})
+        etag = self.assertRevalidates(url)
+        self.task.title = 'renamed'
+        self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_project_and_board_endpoints_support_if_none_match(self):
+        self.assertRevalidates(reverse('project_detail', kwargs={'pk': self.project.pk}))
+        self.assertRevalidates(reverse('board_list', kwargs={'proj_id': self.project.pk}))
+        self.assertRevalidates(reverse('board_detail', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk}))
+        self.assertRevalidates(reverse('task_edit', kwargs={'proj_id': self.project.pk, 'board_id': self.board.pk,
+                                                            'task_id': self.task.pk}))
+
+    def test_child_change_bumps_project_version(self):
+        version = Project.objects.get(pk=self.project.pk).version
+        Board.objects.create(title='Another Board', description='', project=self.project)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).version, version + 1)
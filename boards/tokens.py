@@ -0,0 +1,128 @@
+"""
+JWT mode. Access tokens issued by TokenObtainPairView and TokenRefreshView
+carry a 'projects' claim, {project id: access level}, that access checks use
+instead of querying memberships, and CachedJWTAuthentication keeps users in a
+per-process cache, so requests authenticated by a token normally run no
+authentication queries at all.
+
+A membership change marks its user in the Django cache; the project claims of
+that user's tokens issued before the mark are ignored (access checks fall
+back to the database) until the client refreshes its token, which embeds the
+current memberships again. The marks must reach every process, so with a
+process-local cache backend (locmem or dummy) the claims are never trusted.
+"""
+import copy
+import time
+from threading import Lock
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+from .models import Profile, ProjectMembership
+from .sharding import get_shards, sharding_enabled
+
+
+PROJECTS_CLAIM = 'projects'
+REVOKED_KEY = 'jwt-project-claims-revoked:{}'
+PRINCIPAL_CACHE_MAX_USERS = 10000
+
+# {user_id: (user, expires_at)}
+_principals = {}
+_principals_lock = Lock()
+
+
+def claims_enabled():
+    return getattr(settings, 'JWT_PROJECT_CLAIMS', True)
+
+
+def get_claims_max():
+    return getattr(settings, 'JWT_PROJECT_CLAIMS_MAX', 200)
+
+
+def revocation_shared():
+    """Whether revocation marks written by one process are seen by the others."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_principal_ttl():
+    return getattr(settings, 'JWT_PRINCIPAL_CACHE_TTL', 60)
+
+
+def project_claims(user_id):
+    """{project id: access level} for the user's projects, or None if there are too many to embed."""
+    profile_ids = list(Profile.objects.filter(user_id=user_id).values_list('id', flat=True))
+    claims = {}
+    for alias in get_shards() if sharding_enabled() else [None]:
+        claims.update((str(project_id), access_level) for project_id, access_level in
+                      ProjectMembership.objects.using(alias).filter(member_id__in=profile_ids)
+                      .values_list('project_id', 'access_level')[:get_claims_max() + 1])
+    return claims if len(claims) <= get_claims_max() else None
+
+
+def token_project_claims(request):
+    """The project claims of the token that authenticated the request, if they can be trusted."""
+    token = getattr(request, 'auth', None)
+    return token.get(PROJECTS_CLAIM) if isinstance(token, Token) else None
+
+
+def revoke_project_claims(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1
+        cache.set_many({REVOKED_KEY.format(user_id): time.time() for user_id in user_ids}, timeout)
+
+
+def forget_principal(user_id):
+    with _principals_lock:
+        _principals.pop(user_id, None)
+
+
+class ProjectRefreshToken(RefreshToken):
+    @property
+    def access_token(self):
+        access = super().access_token
+        # Recomputed on every refresh, so a refreshed token reflects the current memberships. The copied
+        # 'iat' is the refresh token's, which would make the new claims look revoked.
+        access.set_iat(at_time=self.current_time)
+        access.payload.pop(PROJECTS_CLAIM, None)
+        if claims_enabled():
+            claims = project_claims(self[api_settings.USER_ID_CLAIM])
+            if claims is not None:
+                access[PROJECTS_CLAIM] = claims
+        return access
+
+
+class ProjectTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ProjectRefreshToken
+
+
+class ProjectTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ProjectRefreshToken
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        entry = _principals.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            user = super().get_user(validated_token)
+            with _principals_lock:
+                if len(_principals) >= PRINCIPAL_CACHE_MAX_USERS:
+                    _principals.clear()
+                _principals[user_id] = (user, time.monotonic() + get_principal_ttl())
+        else:
+            user = entry[0]
+        if PROJECTS_CLAIM in validated_token.payload:
+            if not revocation_shared():
+                # Another process may have revoked them without this one knowing.
+                del validated_token[PROJECTS_CLAIM]
+            else:
+                revoked = cache.get(REVOKED_KEY.format(user_id))
+                if revoked is not None and validated_token.get('iat', 0) <= revoked:
+                    del validated_token[PROJECTS_CLAIM]
+        # A copy, so that nothing a request caches on its user leaks into other requests.
+        return copy.copy(user)
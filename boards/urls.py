@@ -5,13 +5,25 @@ urlpatterns = [
     path('users/', views.UserView.as_view(), name='users'),
     path('profiles/', views.ProfileView.as_view(), name='profiles'),
     path('profiles/<int:pk>', views.ProfileDetailView.as_view(), name='profile_detail'),
+    path('search/tasks', views.TaskSearchView.as_view(), name='task_search'),
+    path('tasks/due', views.UserDueTasksView.as_view(), name='user_due_tasks'),
+    path('reminders', views.ReminderListView.as_view(), name='reminders'),
     path('project-list/', views.ProjectListView.as_view(), name='project_list'),
+    path('project-list/import', views.ProjectImportView.as_view(), name='project_import'),
     path('project-list/<int:pk>', views.ProjectDetailView.as_view(), name='project_detail'),
     path('project-list/<int:pk>/members/', views.ProjectMemberListView.as_view(), name='members_list'),
+    path('project-list/<int:pk>/changes', views.ProjectChangesView.as_view(), name='project_changes'),
+    path('project-list/<int:pk>/export', views.ProjectExportView.as_view(), name='project_export'),
+    path('project-list/<int:pk>/events', views.ProjectEventsView.as_view(), name='project_events'),
+    path('project-list/<int:pk>/due', views.ProjectDueTasksView.as_view(), name='project_due_tasks'),
     path('project-list/<int:proj_id>/members/<int:mem_id>', views.ProjectMemberDetailView.as_view(), name='members_detail'),
     path('project-list/<int:proj_id>/boards', views.BoardListView.as_view(), name='board_list'),
     path('project-list/<int:proj_id>/boards/<int:board_id>/', views.BoardDetailsView.as_view(), name='board_detail'),
+    path('project-list/<int:proj_id>/boards/<int:board_id>/move', views.BoardMoveView.as_view(), name='board_move'),
+    path('project-list/<int:proj_id>/boards/<int:board_id>/snapshot', views.BoardSnapshotView.as_view(), name='board_snapshot'),
     path('project-list/<int:proj_id>/boards/<int:board_id>/tasks', views.TaskListView.as_view(), name='task_list'),
+    path('project-list/<int:proj_id>/boards/<int:board_id>/tasks/bulk', views.TaskBulkView.as_view(), name='task_bulk'),
     path('project-list/<int:proj_id>/boards/<int:board_id>/tasks/<int:task_id>', views.TaskEditView.as_view(), name='task_edit'),
+    path('project-list/<int:proj_id>/boards/<int:board_id>/tasks/<int:task_id>/move', views.TaskMoveView.as_view(), name='task_move'),
 
 ]
\ No newline at end of file
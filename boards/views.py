@@ -1,19 +1,48 @@
+import asyncio
+import io
+import json
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
-from .models import Profile, Project, Task, Board, ProjectMembership
+from django.views import View
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Prefetch
+from .models import Profile, ProjectShard, Project, Task, Board, ProjectMembership
 from .serializers import (ProfileSerializer, UserSerializer, ProjectListSerializer, 
-                          ProjectSerializer, ProjectMembershipSerializer, BoardSerializer, TaskSerializer)
+                          ProjectSerializer, ProjectMembershipSerializer, BoardSerializer, TaskSerializer,
+                          ProjectChangeSerializer, TaskReminderSerializer, TASK_ROWS, BOARD_ROWS)
 from rest_framework.response import Response
 from rest_framework import status, generics
 from django.contrib.auth.models import User
 from rest_framework.permissions import IsAuthenticated
 from .permissions import CanViewProfile, CanEditProject, IsAdminOrMemberReadOnly
+from .access import is_member, is_admin, ais_member, astill_member
+from .asyncviews import AsyncGetMixin, alist
+from .bulk import apply_task_operations
+from .counters import counts_by_board
+from .changes import changes_since, CHANGES_PAGE_SIZE, CHANGES_MAX_PAGE_SIZE, CHANGE_SEQ_MAX
+from .realtime import get_broker
+from .importer import iter_json_documents, import_boards
+from .export import stream_ndjson, stream_csv, EXPORT_FIELDS, EXPORT_FORMATS
+from .search import search_tasks, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from .reminders import (due_query, encode_cursor, project_due_tasks, user_due_tasks, user_reminders,
+                        DUE_PAGE_SIZE, DUE_MAX_PAGE_SIZE)
+from .ranking import parse_id, rank_among, schedule_rebalance, get_rebalance_length
+from .conditional import instance_validators, project_validators, aproject_validators, not_modified, set_validators
+from .sharding import sharding_enabled, joins_global, load_projects, atomic_everywhere
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
 
 
-class TrelloPaginationsView(PageNumberPagination):
+class TrelloPaginationsView(CursorPagination):
     page_size = 10
+    ordering = 'id'
+
+
+class PositionPaginationsView(TrelloPaginationsView):
+    ordering = ('position', 'id')
 
 
 class UserView(generics.ListCreateAPIView):
@@ -36,44 +65,93 @@ class ProfileDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class ProjectListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related('projectmembership_set')
     serializer_class = ProjectListSerializer
     pagination_class = TrelloPaginationsView
 
+    def list(self, request, *args, **kwargs):
+        if not sharding_enabled():
+            return super().list(request, *args, **kwargs)
+        # Page through the global directory, then fetch the page's projects from their shards.
+        page = self.paginate_queryset(ProjectShard.objects.using(DEFAULT_DB_ALIAS).all())
+        projects = load_projects(self.get_queryset(), [entry.id for entry in page])
+        return self.get_paginated_response(self.get_serializer(projects, many=True).data)
+
+
+class ProjectImportView(APIView):
+    """Import Trello board exports, sent as an uploaded `file` or as the JSON body, as projects owned by the caller."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is not None:
+            documents = iter_json_documents(io.TextIOWrapper(upload.file, encoding='utf-8'))
+        else:
+            documents = request.data if isinstance(request.data, list) else [request.data]
+        owner = Profile.objects.get(user_id=request.user.id)
+        try:
+            # All or nothing for API callers, unlike the per-board transactions of import_trello.
+            with atomic_everywhere() if sharding_enabled() else transaction.atomic():
+                stats = import_boards(documents, owner, include_archived=request.query_params.get('archived') == '1')
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.as_dict(), status=status.HTTP_201_CREATED)
+
 
 class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related(
+        Prefetch('projectmembership_set', queryset=ProjectMembership.objects.order_by('id')))
     serializer_class = ProjectSerializer
     permission_classes = [CanEditProject, IsAuthenticated]
+    project_url_kwarg = 'pk'
+
+    def get_queryset(self):
+        # The owner's profile can only be joined when the project is stored next to the profiles.
+        if joins_global(self.kwargs['pk']):
+            return super().get_queryset().select_related('owner')
+        return super().get_queryset().prefetch_related('owner')
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = project_validators(kwargs['pk'])
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
  
 
-class ProjectMemberListView(APIView):
+class ProjectMemberListView(AsyncGetMixin, APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = TrelloPaginationsView
+    project_url_kwarg = 'pk'
     def get(self, request, pk):
-        project = Project.objects.get(pk=pk)
-        members = ProjectMembership.objects.filter(project=project)
-        for member in members:
-            if request.user.id == member.member_id:
-                members_serializer = ProjectMembershipSerializer(instance=members, many=True)
-                return Response(members_serializer.data, status=status.HTTP_200_OK)
-        else:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
+        project = get_object_or_404(Project, pk=pk)
+        if is_member(request, project.id):
+            members = ProjectMembership.objects.filter(project=project)
+            members_serializer = ProjectMembershipSerializer(instance=members, many=True)
+            return Response(members_serializer.data, status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget(self, request, pk):
+        project, member, members = await asyncio.gather(
+            Project.objects.filter(pk=pk).afirst(), ais_member(request, pk),
+            alist(ProjectMembership.objects.filter(project_id=pk)))
+        if project is None:
+            raise Http404
+        if member:
+            members_serializer = ProjectMembershipSerializer(instance=members, many=True)
+            return Response(members_serializer.data, status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
     
     def post(self, request, pk):
-        project = Project.objects.get(pk=pk)
-        members = ProjectMembership.objects.filter(project=project)
         member_deserializer = ProjectMembershipSerializer(data=request.data)
-        pmem_admin = get_object_or_404(ProjectMembership, project_id=pk, access_level=2)
-        if request.user.id == pmem_admin.member_id:
-            for member in members:
-                if (request.data['member'] == member.id) or (request.data['project'] != pk):
-                    return Response(status=status.HTTP_400_BAD_REQUEST)
-            else:
-                if member_deserializer.is_valid():
-                    member_deserializer.save()
-                    return Response(member_deserializer.data, status=status.HTTP_200_OK)
+        if is_admin(request, pk):
+            if (ProjectMembership.objects.filter(project_id=pk, member_id=request.data['member']).exists()
+                    or request.data['project'] != pk):
                 return Response(status=status.HTTP_400_BAD_REQUEST)
+            if member_deserializer.is_valid():
+                member_deserializer.save()
+                return Response(member_deserializer.data, status=status.HTTP_200_OK)
+            return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
@@ -83,127 +161,392 @@ class ProjectMemberDetailView(APIView):
     def get(self, request, proj_id, mem_id):
         pmem = get_object_or_404(ProjectMembership, pk=mem_id, project_id=proj_id)
         pmem_serializer = ProjectMembershipSerializer(instance=pmem, context={'request': request})
-        pmem_admin = get_object_or_404(ProjectMembership, project_id=proj_id, access_level=2)
-        if request.user.id == pmem_admin.member_id:
+        if is_admin(request, proj_id):
             return Response(pmem_serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     
     def delete(self, request, proj_id, mem_id):
         pmem = get_object_or_404(ProjectMembership, pk=mem_id, project_id=proj_id)
-        pmem_admin = get_object_or_404(ProjectMembership, project_id=proj_id, access_level=2)
-        if request.user.id == pmem_admin.member_id:
+        if is_admin(request, proj_id):
             pmem.delete()
             return Response(status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
 
-class BoardListView(APIView):
+class ProjectChangesView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = TrelloPaginationsView
+    project_url_kwarg = 'pk'
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        if not is_member(request, project.id):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', CHANGES_PAGE_SIZE)), CHANGES_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or since > CHANGE_SEQ_MAX or limit < 1:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        reset, changes, last_seq, has_more = changes_since(project, since, limit)
+        return Response({
+            'reset': reset,
+            'changes': ProjectChangeSerializer(instance=changes, many=True).data,
+            'last_seq': last_seq,
+            'has_more': has_more,
+        }, status=status.HTTP_200_OK)
+
+
+class ProjectExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    project_url_kwarg = 'pk'
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        if not is_member(request, project.id):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.query_params.get('fmt', 'ndjson')
+        model = request.query_params.get('model')
+        if fmt not in EXPORT_FORMATS or (model is not None and model not in EXPORT_FIELDS):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if fmt == 'csv':
+            # One model per CSV file since the record types do not share columns.
+            model = model or 'task'
+            content = stream_csv(project, model)
+            filename = f'project-{project.id}-{model}.csv'
+        else:
+            content = stream_ndjson(project, [model] if model else list(EXPORT_FIELDS))
+            filename = f'project-{project.id}.ndjson'
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ProjectEventsView(View):
+    """
+    Server-Sent Events stream of a project's change-feed entries. Needs the ASGI
+    entry point; a reconnecting client sends Last-Event-ID and first receives the
+    entries it missed from the change log.
+    """
+    keepalive_seconds = 15
+    project_url_kwarg = 'pk'
+
+    def can_subscribe(self, request, pk):
+        return request.user.is_authenticated and is_member(request, pk)
+
+    def backlog(self, pk, since):
+        project = Project.objects.filter(pk=pk).first()
+        if project is None:
+            raise Http404
+        reset, changes, last_seq, has_more = changes_since(project, since, CHANGES_MAX_PAGE_SIZE)
+        return reset or has_more, ProjectChangeSerializer(instance=changes, many=True).data
+
+    async def get(self, request, pk):
+        if not await sync_to_async(self.can_subscribe)(request, pk):
+            return HttpResponse(status=status.HTTP_400_BAD_REQUEST)
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        if last_event_id and (not last_event_id.isdigit() or int(last_event_id) > CHANGE_SEQ_MAX):
+            return HttpResponse(status=status.HTTP_400_BAD_REQUEST)
+        subscription = get_broker().subscribe(pk)
+        try:
+            if last_event_id:
+                reset, backlog = await sync_to_async(self.backlog)(pk, int(last_event_id))
+            else:
+                reset, backlog = False, []
+        except Http404:
+            subscription.close()
+            raise
+        return StreamingHttpResponse(self.stream(subscription, reset, backlog, request.user.id),
+                                     content_type='text/event-stream',
+                                     headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def format_event(self, event):
+        return f'id: {event["seq"]}\nevent: change\ndata: {json.dumps(event)}\n\n'
+
+    async def stream(self, subscription, reset, backlog, user_id):
+        try:
+            yield 'retry: 3000\n\n'
+            if reset:
+                # Too far behind: the client must reload through the REST endpoints.
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            last_seq = 0
+            for event in backlog:
+                last_seq = event['seq']
+                yield self.format_event(event)
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    event = None
+                # A removed member stops receiving events once a membership change or keep-alive shows it.
+                if (event is None or event['model'] == 'projectmembership') and \
+                        not await astill_member(user_id, subscription.project_id):
+                    return
+                if event is None:
+                    yield ': keep-alive\n\n'
+                elif event['seq'] > last_seq:
+                    yield self.format_event(event)
+            yield 'event: reset\ndata: {}\n\n'
+        finally:
+            subscription.close()
+
+
+class BoardListView(AsyncGetMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = PositionPaginationsView
+    serializer_class = BoardSerializer
 
     def get(self, request, proj_id):
         project = get_object_or_404(Project, pk=proj_id)
-        pmem = ProjectMembership.objects.filter(project_id=project.id)
-        board = Board.objects.filter(project_id=project.id)
-        board_serializer = BoardSerializer(instance=board, many=True, context={'request': request})
-        for member in pmem:
-            if request.user.id == member.member_id:
-                return Response(board_serializer.data, status=status.HTTP_200_OK)
+        if is_member(request, project.id):
+            etag, last_modified = instance_validators(project, 'boards', request.query_params.get('cursor'))
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            return set_validators(self.get_paginated_response(self.board_page(project.id)), etag, last_modified)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget(self, request, proj_id):
+        project, member = await asyncio.gather(Project.objects.filter(pk=proj_id).afirst(),
+                                               ais_member(request, proj_id))
+        if project is None:
+            raise Http404
+        if member:
+            etag, last_modified = instance_validators(project, 'boards', request.query_params.get('cursor'))
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            # The paginator evaluates the page itself, so it runs in the ORM's sync thread.
+            data = await sync_to_async(self.board_page)(project.id)
+            return set_validators(self.get_paginated_response(data), etag, last_modified)
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    def board_page(self, project_id):
+        boards = self.paginate_queryset(BOARD_ROWS.values(Board.objects.filter(project_id=project_id)))
+        counts = counts_by_board([board['id'] for board in boards])
+        return BOARD_ROWS.to_representation(boards, task_counts=lambda board: counts[board['id']])
     
     def post(self, request, proj_id):
         project = get_object_or_404(Project, pk=proj_id)
-        pmem = ProjectMembership.objects.filter(project_id=project.id)
         board_serializer = BoardSerializer(data=request.data)
-        for member in pmem:
-            if request.user.id == member.member_id and member.access_level == 2 and board_serializer.is_valid():
-                board_serializer.save()
-                return Response(board_serializer.data, status=status.HTTP_200_OK)
+        if is_admin(request, project.id) and board_serializer.is_valid():
+            board_serializer.save()
+            return Response(board_serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
 
-class BoardDetailsView(APIView):
+class BoardDetailsView(AsyncGetMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, proj_id, board_id):
         project = get_object_or_404(Project, pk=proj_id)
-        pmem = ProjectMembership.objects.filter(project_id=project.id)
         board = get_object_or_404(Board, project_id=project.id, pk=board_id)
-        board_serializer = BoardSerializer(instance=board)
-        for member in pmem:
-            if request.user.id == member.member_id:
-                return Response(board_serializer.data, status=status.HTTP_200_OK)
+        if is_member(request, project.id):
+            # The board's task counts change with its tasks, which bump the project version.
+            etag, last_modified = instance_validators(project, 'board', board.id)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            board_serializer = BoardSerializer(instance=board)
+            return set_validators(Response(board_serializer.data, status=status.HTTP_200_OK), etag, last_modified)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget(self, request, proj_id, board_id):
+        project, board, member = await asyncio.gather(
+            Project.objects.filter(pk=proj_id).afirst(),
+            Board.objects.filter(project_id=proj_id, pk=board_id).prefetch_related('task_counts').afirst(),
+            ais_member(request, proj_id))
+        if project is None or board is None:
+            raise Http404
+        if member:
+            etag, last_modified = instance_validators(project, 'board', board.id)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            board_serializer = BoardSerializer(instance=board)
+            return set_validators(Response(board_serializer.data, status=status.HTTP_200_OK), etag, last_modified)
         return Response(status=status.HTTP_400_BAD_REQUEST)
     
     def put(self, request, proj_id, board_id):
         project = get_object_or_404(Project, pk=proj_id)
-        pmem = ProjectMembership.objects.filter(project_id=project.id)
         board = get_object_or_404(Board, project_id=project.id, pk=board_id)
         board_serializer = BoardSerializer(instance=board, data=request.data)
-        for member in pmem:
-            if request.user.id == member.member_id and member.access_level == 2 and board_serializer.is_valid():
-                board_serializer.save()
-                return Response(board_serializer.data, status=status.HTTP_200_OK)
+        if is_admin(request, project.id) and board_serializer.is_valid():
+            board_serializer.save()
+            return Response(board_serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, proj_id, board_id):
         project = get_object_or_404(Project, pk=proj_id)
-        pmem = ProjectMembership.objects.filter(project_id=project.id)
         board = get_object_or_404(Board, project_id=project.id, pk=board_id)
-        for member in pmem:
-            if request.user.id == member.member_id and member.access_level == 2:
-                board.delete()
-                return Response(status=status.HTTP_200_OK)
+        if is_admin(request, project.id):
+            board.delete()
+            return Response(status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskListView(APIView):
+class BoardMoveView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, proj_id, board_id):
+        board = get_object_or_404(Board, project_id=proj_id, pk=board_id)
+        if not is_admin(request, proj_id):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        siblings = Board.objects.filter(project_id=proj_id).exclude(pk=board.pk)
+        try:
+            board.position = rank_among(siblings, request.data.get('after'), request.data.get('before'))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        board.save(update_fields=['position', 'updated_at'])
+        if len(board.position) > get_rebalance_length():
+            schedule_rebalance(Board, 'project_id', board.project_id)
+        return Response(BoardSerializer(instance=board).data, status=status.HTTP_200_OK)
+
+
+class BoardSnapshotView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = TrelloPaginationsView
 
     def get(self, request, proj_id, board_id):
-        pmem = ProjectMembership.objects.filter(project_id=proj_id)
-        tasks = Task.objects.filter(project_id=proj_id, board_id=board_id)
-        task_serializer = TaskSerializer(instance=tasks, many=True, context={'request': request})
-        for member in pmem:
-            if request.user.id == member.member_id:
-                return Response(task_serializer.data, status=status.HTTP_200_OK)
+        if not is_member(request, proj_id):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        board = get_object_or_404(Board, project_id=proj_id, pk=board_id)
+        tasks = Task.objects.filter(project_id=proj_id, board_id=board.id).order_by('position', 'id')
+        # Profiles can only be joined when the project is stored next to them.
+        joined = joins_global(proj_id)
+        if joined:
+            tasks = tasks.select_related('profile')
+        columns = {status_task: [] for status_task in Task.Status.values}
+        profiles = {}
+        for task in tasks:
+            columns.setdefault(task.status_task, []).append(task)
+            if task.profile_id is not None:
+                profiles[task.profile_id] = task.profile if joined else None
+        if not joined:
+            found = Profile.objects.in_bulk(list(profiles))
+            profiles = {profile_id: found[profile_id] for profile_id in profiles if profile_id in found}
+        counts = {name: len(column) for name, column in columns.items()}
+        return Response({
+            'board': BoardSerializer(instance=board, context={'task_counts': counts}).data,
+            'columns': {name: TaskSerializer(instance=column, many=True).data for name, column in columns.items()},
+            'counts': counts,
+            'profiles': ProfileSerializer(instance=profiles.values(), many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class TaskListView(AsyncGetMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = PositionPaginationsView
+    serializer_class = TaskSerializer
+
+    def get(self, request, proj_id, board_id):
+        if is_member(request, proj_id):
+            etag, last_modified = project_validators(proj_id, 'tasks', board_id, request.query_params.get('cursor'))
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            tasks = self.paginate_queryset(TASK_ROWS.values(Task.objects.filter(project_id=proj_id, board_id=board_id)))
+            return set_validators(self.get_paginated_response(TASK_ROWS.to_representation(tasks)), etag, last_modified)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget(self, request, proj_id, board_id):
+        member, (etag, last_modified) = await asyncio.gather(
+            ais_member(request, proj_id),
+            aproject_validators(proj_id, 'tasks', board_id, request.query_params.get('cursor')))
+        if member:
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            tasks = await sync_to_async(self.paginate_queryset)(
+                TASK_ROWS.values(Task.objects.filter(project_id=proj_id, board_id=board_id)))
+            return set_validators(self.get_paginated_response(TASK_ROWS.to_representation(tasks)), etag, last_modified)
         return Response(status=status.HTTP_400_BAD_REQUEST)
     
     def post(self, request, proj_id, board_id):
         task_serializer = TaskSerializer(data=request.data)
-        pmem_admin = get_object_or_404(ProjectMembership, project_id=proj_id, access_level=2)
-        if request.user.id == pmem_admin.member_id and task_serializer.is_valid():
+        if is_admin(request, proj_id) and task_serializer.is_valid():
             task_serializer.save()
             return Response(task_serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskEditView(APIView):
+class TaskBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, proj_id, board_id):
+        project = get_object_or_404(Project, pk=proj_id)
+        if not is_member(request, project.id) or not isinstance(request.data, list):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        ok, results = apply_task_operations(request.data, project, board_id, request.user.id,
+                                            can_create=is_admin(request, project.id))
+        if ok:
+            return Response({'results': results}, status=status.HTTP_200_OK)
+        return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskMoveView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, proj_id, board_id, task_id):
+        task = get_object_or_404(Task, project_id=proj_id, board_id=board_id, id=task_id)
+        if task.status_task == Task.Status.TODO:
+            can_move = is_member(request, proj_id)
+        else:
+            can_move = request.user.id == task.profile_id
+        try:
+            target_board_id = parse_id(request.data.get('board', board_id))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if not can_move or not Board.objects.filter(project_id=proj_id, pk=target_board_id).exists():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        siblings = Task.objects.filter(board_id=target_board_id).exclude(pk=task.pk)
+        try:
+            task.position = rank_among(siblings, request.data.get('after'), request.data.get('before'))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        task.board_id = target_board_id
+        task.save(update_fields=['board', 'position', 'updated_at'])
+        if len(task.position) > get_rebalance_length():
+            schedule_rebalance(Task, 'board_id', task.board_id)
+        return Response(TaskSerializer(instance=task).data, status=status.HTTP_200_OK)
+
+
+class TaskEditView(AsyncGetMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, proj_id, board_id, task_id):
-        pmem = ProjectMembership.objects.filter(project_id=proj_id)
-        task = Task.objects.filter(project_id=proj_id, board_id=board_id, pk=task_id)
-        task_serializer = TaskSerializer(instance=task, many=True, context={'request': request})
-        for member in pmem:
-            if request.user.id == member.member_id:
-                return Response(task_serializer.data, status=status.HTTP_200_OK)
+        if is_member(request, proj_id):
+            task = list(Task.objects.filter(project_id=proj_id, board_id=board_id, pk=task_id))
+            etag, last_modified = instance_validators(task[0]) if task else (None, None)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            task_serializer = TaskSerializer(instance=task, many=True, context={'request': request})
+            return set_validators(Response(task_serializer.data, status=status.HTTP_200_OK), etag, last_modified)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget(self, request, proj_id, board_id, task_id):
+        member, task = await asyncio.gather(
+            ais_member(request, proj_id), alist(Task.objects.filter(project_id=proj_id, board_id=board_id, pk=task_id)))
+        if member:
+            etag, last_modified = instance_validators(task[0]) if task else (None, None)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            task_serializer = TaskSerializer(instance=task, many=True, context={'request': request})
+            return set_validators(Response(task_serializer.data, status=status.HTTP_200_OK), etag, last_modified)
         return Response(status=status.HTTP_400_BAD_REQUEST)
     
     def put(self, request, proj_id, board_id, task_id):
-        pmem = ProjectMembership.objects.filter(project_id=proj_id)
         task = get_object_or_404(Task, project_id=proj_id, board_id=board_id, id=task_id)
         task_serializer = TaskSerializer(instance=task, data=request.data)
         if task.status_task == 'todo':
-            for member in pmem:
-                if request.user.id == member.member_id and task_serializer.is_valid():
-                    task_serializer.save()
-                    return Response(task_serializer.data, status=status.HTTP_200_OK)
-            else:
-                return Response(status=status.HTTP_400_BAD_REQUEST)
+            if is_member(request, proj_id) and task_serializer.is_valid():
+                task_serializer.save()
+                return Response(task_serializer.data, status=status.HTTP_200_OK)
+            return Response(status=status.HTTP_400_BAD_REQUEST)
         else:
             if request.user.id == task.profile_id and task_serializer.is_valid():
                 task_serializer.save()
@@ -212,16 +555,82 @@ class TaskEditView(APIView):
                 return Response(status=status.HTTP_400_BAD_REQUEST)
             
     def delete(self, request, proj_id, board_id, task_id):
-        pmem = ProjectMembership.objects.filter(project_id=proj_id)
         task = get_object_or_404(Task, project_id=proj_id, board_id=board_id, id=task_id)
-
-        for member in pmem:
-            if request.user.id == member.member_id and member.access_level == 2:
-                task.delete()
-                return Response(status=status.HTTP_200_OK)
+        if is_admin(request, proj_id):
+            task.delete()
+            return Response(status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
-        
 
 
-        
+class TaskSearchView(APIView):
+    """
+    Relevance-ranked task search. Pages follow the live ranks rather than a
+    snapshot, so the response sets stable_paging to false: a page fetched after
+    tasks changed may repeat or skip results.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_PAGE_SIZE)), SEARCH_MAX_PAGE_SIZE)
+            tasks, next_cursor = search_tasks(request.user.id, request.query_params.get('q'),
+                                              request.query_params.get('cursor'), max(limit, 1))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        next_url = None
+        if next_cursor is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        task_serializer = TaskSerializer(instance=tasks, many=True, context={'request': request})
+        return Response({'next': next_url, 'stable_paging': False, 'results': task_serializer.data},
+                        status=status.HTTP_200_OK)
 
+
+class ProjectDueTasksView(APIView):
+    permission_classes = [IsAuthenticated]
+    project_url_kwarg = 'pk'
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        if not is_member(request, project.id):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tasks, position = project_due_tasks(project, **due_query(request.query_params))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        next_url = None
+        if position is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(position))
+        task_serializer = TaskSerializer(instance=tasks, many=True, context={'request': request})
+        return Response({'next': next_url, 'results': task_serializer.data}, status=status.HTTP_200_OK)
+
+
+class UserDueTasksView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            tasks, position = user_due_tasks(request.user.id, **due_query(request.query_params))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        next_url = None
+        if position is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(position))
+        task_serializer = TaskSerializer(instance=tasks, many=True, context={'request': request})
+        return Response({'next': next_url, 'results': task_serializer.data}, status=status.HTTP_200_OK)
+
+
+class ReminderListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', DUE_PAGE_SIZE)), DUE_MAX_PAGE_SIZE)
+            before = parse_id(request.query_params.get('before') or None)
+            reminders, next_before = user_reminders(request.user.id, before, max(limit, 1))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        next_url = None
+        if next_before is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', next_before)
+        reminder_serializer = TaskReminderSerializer(instance=reminders, many=True)
+        return Response({'next': next_url, 'results': reminder_serializer.data}, status=status.HTTP_200_OK)